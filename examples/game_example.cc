@@ -72,7 +72,7 @@ GameResult SimulateGame(const hanabi_learning_env::HanabiGame& game,
     }
     state.ApplyMove(move);
     ++result.num_steps;
-    if (state.MoveHistory().back().scored) {
+    if (state.MoveHistory().Back().scored) {
       ++result.fireworks_played;
     }
   }
@@ -20,6 +20,7 @@ import random
 import getopt
 import resource
 import psutil
+from hanabi_learning_environment import pyhanabi
 from hanabi_learning_environment import rl_env
 from hanabi_learning_environment.agents.random_agent import RandomAgent
 from hanabi_learning_environment.agents.simple_agent import SimpleAgent
@@ -58,9 +59,16 @@ class Runner():
     self.agent_config = {'players': flags['players'], 'alpha': flags['alpha'],
                          'gamma': flags['gamma']}
     self.environment = rl_env.make('Hanabi-My-Small', num_players=flags['players'],
-                                   seed=flags['seed'])
+                                   seed=flags['seed'], observation_mode='dict')
+    self.move_types = self.environment.move_table()['type']
     self.agent_class = AGENT_CLASSES[flags['agent_class']]
 
+  def action_type(self, action):
+    """Returns the action type name of an action dict or move uid."""
+    if isinstance(action, dict):
+      return action['action_type']
+    return pyhanabi.HanabiMoveType(self.move_types[action]).name
+
   def play_episode(self, agents, actions):
     observations = self.environment.reset()
     done = False
@@ -70,13 +78,13 @@ class Runner():
       for agent_id, agent in enumerate(agents):
         observation = observations['player_observations'][agent_id]
         def get_next_state_wrapper(action):
-          return get_next_state(self.environment.state.copy(), agent_id, action,
+          return get_next_state(self.environment.state, agent_id, action,
                                 self.environment.game)
         action, reward = agent.act(observation, get_next_state_wrapper)
         if observation['current_player'] == agent_id:
           assert action is not None
           current_player_action = action
-          actions[agent_id][action['action_type']] += 1
+          actions[agent_id][self.action_type(action)] += 1
           agents_rewards[agent_id] += reward
         else:
           assert action is None
@@ -4,7 +4,6 @@ import operator
 
 from hanabi_learning_environment.rl_env import Agent
 from hanabi_learning_environment.agents.qstate import QState
-from hanabi_learning_environment.agents.q_util import action_to_hash, hash_to_action
 
 
 class GreedyAgent(Agent):
@@ -23,7 +22,8 @@ class GreedyAgent(Agent):
 
     S = QState(observation)
     choose_randomly = False
-    actions = {action_to_hash(a): 0 for a in observation['legal_moves']}
+    # Actions are the game's move uids.
+    actions = {a: 0 for a in observation['legal_moves_as_int']}
 
     # State not visited previously, initialise for all possible actions.
     if S not in self.Q:
@@ -43,11 +43,10 @@ class GreedyAgent(Agent):
     # Choose A from S using policy derived from Q
     # In case of less accurate hashing, choice is restricted to subset of valid actions
     if choose_randomly: # Random choice
-      A_hash = random.choice(list(actions.keys()))
+      A = random.choice(list(actions.keys()))
     else: # Greedy choice
       # Key corresponding to action with max value in Q[S] dict.
-      A_hash = max(actions.items(), key=operator.itemgetter(1))[0]
-    A = hash_to_action(A_hash)
+      A = max(actions.items(), key=operator.itemgetter(1))[0]
 
     _, R = get_next_state(A)
 
@@ -5,7 +5,6 @@ import operator
 
 from hanabi_learning_environment.rl_env import Agent
 from hanabi_learning_environment.agents.qstate import QState
-from hanabi_learning_environment.agents.q_util import action_to_hash, hash_to_action
 
 EPS = 0.1
 
@@ -34,23 +33,23 @@ class QAgent(Agent):
       return None, -1
     S = QState(observation)
     # State not visited previously, initialise for all possible actions.
+    # Actions are the game's move uids.
     if S not in self.Q:
-      self.Q[S] = {action_to_hash(a): 0 for a in observation['legal_moves']}
+      self.Q[S] = {a: 0 for a in observation['legal_moves_as_int']}
 
     # Choose A from S using policy derived from Q -- here eps-greedy
     if random.random() <= EPS: # Random choice
-      A_hash = random.choice(list(self.Q[S].keys()))
+      A = random.choice(list(self.Q[S].keys()))
       print('random choice')
     else: # Greedy choice
       # Key corresponding to action with max value in Q[S] dict.
-      A_hash = max(self.Q[S].items(), key=operator.itemgetter(1))[0]
-    A = hash_to_action(A_hash)
+      A = max(self.Q[S].items(), key=operator.itemgetter(1))[0]
 
     # Take (simulate) action A, observe R, S'
     S_new, R = get_next_state(A)
     max_Q_new = max(self.Q[S_new].values()) if S_new in self.Q else 0
     # Q(S, A) = Q(S, A) + alpha[R + gamma max_a Q(S', a) -Q(S, A)]
-    self.Q[S][A_hash] += self.alpha * (R + self.gamma * max_Q_new - self.Q[S][A_hash])
+    self.Q[S][A] += self.alpha * (R + self.gamma * max_Q_new - self.Q[S][A])
 
-    # This is the actual action to be performed in the environment.
+    # This is the actual action (move uid) to be performed in the environment.
     return A, R
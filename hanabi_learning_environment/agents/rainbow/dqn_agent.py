@@ -112,7 +112,8 @@ class DQNAgent(object):
                    decay=0.95,
                    momentum=0.0,
                    epsilon=1e-6,
-                   centered=True)):
+                   centered=True),
+               packed_observations=False):
     """Initializes the agent and constructs its graph.
 
     Args:
@@ -137,6 +138,9 @@ class DQNAgent(object):
       use_staging: bool, when True use a staging area to prefetch the next
         sampling batch.
       optimizer: Optimizer instance used for learning.
+      packed_observations: bool, whether observations are passed as the
+        np.packbits bytes of observation_size bits. They are then stored packed
+        in the replay memory too.
     """
 
     tf.logging.info('Creating %s agent with the following parameters:',
@@ -152,10 +156,12 @@ class DQNAgent(object):
     tf.logging.info('\t tf_device: %s', tf_device)
     tf.logging.info('\t use_staging: %s', use_staging)
     tf.logging.info('\t optimizer: %s', optimizer)
+    tf.logging.info('\t packed_observations: %s', packed_observations)
 
     # Global variables.
     self.num_actions = num_actions
     self.observation_size = observation_size
+    self.packed_observations = packed_observations
     self.num_players = num_players
     self.gamma = gamma
     self.update_horizon = update_horizon
@@ -181,7 +187,7 @@ class DQNAgent(object):
       # The state of the agent. The last axis is the number of past observations
       # that make up the state.
       states_shape = (1, observation_size, stack_size)
-      self.state = np.zeros(states_shape)
+      self.state = np.zeros(states_shape, dtype=np.uint8)
       self.state_ph = tf.placeholder(tf.uint8, states_shape, name='state_ph')
       self.legal_actions_ph = tf.placeholder(tf.float32,
                                              [self.num_actions],
@@ -225,7 +231,8 @@ class DQNAgent(object):
         stack_size=1,
         use_staging=use_staging,
         update_horizon=self.update_horizon,
-        gamma=self.gamma)
+        gamma=self.gamma,
+        packed_observations=self.packed_observations)
 
   def _build_target_q_op(self):
     """Build an op to be used as a target for the Q-value.
@@ -408,6 +415,8 @@ class DQNAgent(object):
       return np.random.choice(legal_action_indices[0])
     else:
       # Convert observation into a batch-based format.
+      if self.packed_observations:
+        observation = np.unpackbits(observation, count=self.observation_size)
       self.state[0, :, 0] = observation
 
       # Choose the action maximizing the q function for the current state.
@@ -45,7 +45,8 @@ class OutOfGraphPrioritizedReplayMemory(replay_memory.OutOfGraphReplayMemory):
   """
 
   def __init__(self, num_actions, observation_size, stack_size, replay_capacity,
-               batch_size, update_horizon=1, gamma=1.0):
+               batch_size, update_horizon=1, gamma=1.0,
+               packed_observations=False):
     """This data structure does the heavy lifting in the replay memory.
 
     Args:
@@ -56,12 +57,15 @@ class OutOfGraphPrioritizedReplayMemory(replay_memory.OutOfGraphReplayMemory):
       batch_size: int, batch size.
       update_horizon: int, length of update ('n' in n-step update).
       gamma: int, the discount factor.
+      packed_observations: bool, whether observations are added as np.packbits
+        bytes of observation_size bits.
     """
     super(OutOfGraphPrioritizedReplayMemory, self).__init__(
         num_actions=num_actions,
         observation_size=observation_size, stack_size=stack_size,
         replay_capacity=replay_capacity, batch_size=batch_size,
-        update_horizon=update_horizon, gamma=gamma)
+        update_horizon=update_horizon, gamma=gamma,
+        packed_observations=packed_observations)
 
     self.sum_tree = sum_tree.SumTree(replay_capacity)
 
@@ -85,7 +89,7 @@ class OutOfGraphPrioritizedReplayMemory(replay_memory.OutOfGraphReplayMemory):
       legal_actions: Binary vector indicating legal actions (1 == legal).
     """
     if self.is_empty() or self.terminals[self.cursor() - 1] == 1:
-      dummy_observation = np.zeros((self._observation_size))
+      dummy_observation = np.zeros((self._observation_row_size))
       dummy_legal_actions = np.zeros((self._num_actions))
       for _ in range(self._stack_size - 1):
         self._add(dummy_observation, 0, 0, 0, dummy_legal_actions, priority=0.0)
@@ -169,7 +173,8 @@ class OutOfGraphPrioritizedReplayMemory(replay_memory.OutOfGraphReplayMemory):
     return priority_batch
 
 
-@gin.configurable(blacklist=['observation_size', 'stack_size'])
+@gin.configurable(blacklist=['observation_size', 'stack_size',
+                             'packed_observations'])
 class WrappedPrioritizedReplayMemory(replay_memory.WrappedReplayMemory):
   """In graph wrapper for the python Replay Memory.
 
@@ -211,7 +216,8 @@ class WrappedPrioritizedReplayMemory(replay_memory.WrappedReplayMemory):
                replay_capacity=1000000,
                batch_size=32,
                update_horizon=1,
-               gamma=1.0):
+               gamma=1.0,
+               packed_observations=False):
     """Initializes a graph wrapper for the python Replay Memory.
 
     Args:
@@ -224,6 +230,8 @@ class WrappedPrioritizedReplayMemory(replay_memory.WrappedReplayMemory):
       batch_size: int.
       update_horizon: int, length of update ('n' in n-step update).
       gamma: int, the discount factor.
+      packed_observations: bool, whether observations are added as np.packbits
+        bytes. Sampled states are unpacked all the same.
 
     Raises:
       ValueError: If update_horizon is not positive.
@@ -232,11 +240,12 @@ class WrappedPrioritizedReplayMemory(replay_memory.WrappedReplayMemory):
     memory = OutOfGraphPrioritizedReplayMemory(num_actions, observation_size,
                                                stack_size, replay_capacity,
                                                batch_size, update_horizon,
-                                               gamma)
+                                               gamma, packed_observations)
     super(WrappedPrioritizedReplayMemory, self).__init__(
         num_actions,
         observation_size, stack_size, use_staging, replay_capacity, batch_size,
-        update_horizon, gamma, wrapped_memory=memory)
+        update_horizon, gamma, wrapped_memory=memory,
+        packed_observations=packed_observations)
 
   def tf_set_priority(self, indices, losses):
     """Sets the priorities for the given indices.
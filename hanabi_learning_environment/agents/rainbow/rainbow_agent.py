@@ -92,7 +92,8 @@ class RainbowAgent(dqn_agent.DQNAgent):
                epsilon_decay_period=1000,
                learning_rate=0.000025,
                optimizer_epsilon=0.00003125,
-               tf_device='/cpu:*'):
+               tf_device='/cpu:*',
+               packed_observations=False):
     """Initializes the agent and constructs its graph.
 
     Args:
@@ -113,6 +114,8 @@ class RainbowAgent(dqn_agent.DQNAgent):
       learning_rate: float, learning rate for the optimizer.
       optimizer_epsilon: float, epsilon for Adam optimizer.
       tf_device: str, Tensorflow device on which to run computations.
+      packed_observations: bool, whether observations are passed as the
+        np.packbits bytes of observation_size bits.
     """
     # We need this because some tools convert round floats into ints.
     vmax = float(vmax)
@@ -137,7 +140,8 @@ class RainbowAgent(dqn_agent.DQNAgent):
         epsilon_eval=epsilon_eval,
         epsilon_decay_period=epsilon_decay_period,
         graph_template=graph_template,
-        tf_device=tf_device)
+        tf_device=tf_device,
+        packed_observations=packed_observations)
     tf.logging.info('\t learning_rate: %f', learning_rate)
     tf.logging.info('\t optimizer_epsilon: %f', optimizer_epsilon)
 
@@ -158,7 +162,8 @@ class RainbowAgent(dqn_agent.DQNAgent):
         stack_size=1,
         use_staging=use_staging,
         update_horizon=self.update_horizon,
-        gamma=self.gamma)
+        gamma=self.gamma,
+        packed_observations=self.packed_observations)
 
   def _reshape_networks(self):
     # self._q is actually logits now, rename things.
@@ -73,7 +73,8 @@ class OutOfGraphReplayMemory(object):
 
   Attributes:
     add_count:  counter of how many transitions have been added.
-    observations: `np.array`, circular buffer of observations.
+    observations: `np.array`, circular buffer of uint8 observations, i.e.
+      canonical bits or compact integer features.
     actions: `np.array`, circular buffer of actions.
     rewards: `np.array`, circular buffer of rewards.
     terminals: `np.array`, circular buffer of terminals.
@@ -82,7 +83,8 @@ class OutOfGraphReplayMemory(object):
   """
 
   def __init__(self, num_actions, observation_size, stack_size, replay_capacity,
-               batch_size, update_horizon=1, gamma=1.0):
+               batch_size, update_horizon=1, gamma=1.0,
+               packed_observations=False):
     """Data structure doing the heavy lifting.
 
     Args:
@@ -93,8 +95,15 @@ class OutOfGraphReplayMemory(object):
       batch_size: int, batch size.
       update_horizon: int, length of update ('n' in n-step update).
       gamma: float, the discount factor.
+      packed_observations: bool, whether observations are added as np.packbits
+        bytes of observation_size bits. Each is then stored as its
+        (observation_size + 7) // 8 bytes, and sampled batches are unpacked
+        once as a whole.
     """
     self._observation_size = observation_size
+    self._packed_observations = packed_observations
+    self._observation_row_size = observation_row_size(observation_size,
+                                                      packed_observations)
     self._num_actions = num_actions
     self._replay_capacity = replay_capacity
     self._batch_size = batch_size
@@ -110,7 +119,7 @@ class OutOfGraphReplayMemory(object):
 
     # Create numpy arrays used to store sampled transitions.
     self.observations = np.empty(
-        (replay_capacity, observation_size), dtype=np.uint8)
+        (replay_capacity, self._observation_row_size), dtype=np.uint8)
     self.actions = np.empty((replay_capacity), dtype=np.int32)
     self.rewards = np.empty((replay_capacity), dtype=np.float32)
     self.terminals = np.empty((replay_capacity), dtype=np.uint8)
@@ -130,7 +139,8 @@ class OutOfGraphReplayMemory(object):
     If the replay memory is at capacity the oldest transition will be discarded.
 
     Args:
-      observation: `np.array` uint8, (observation_size).
+      observation: `np.array` uint8, (observation_size), or the packed bytes
+        of one with packed_observations.
       action: uint8, indicating the action in the transition.
       reward: float, indicating the reward received in the transition.
       terminal: uint8, acting as a boolean indicating whether the transition
@@ -138,7 +148,7 @@ class OutOfGraphReplayMemory(object):
       legal_actions: Binary vector indicating legal actions (1 == legal).
     """
     if self.is_empty() or self.terminals[self.cursor() - 1] == 1:
-      dummy_observation = np.zeros((self._observation_size))
+      dummy_observation = np.zeros((self._observation_row_size))
       dummy_legal_actions = np.zeros((self._num_actions))
       for _ in range(self._stack_size - 1):
         self._add(dummy_observation, 0, 0, 0, dummy_legal_actions)
@@ -194,8 +204,14 @@ class OutOfGraphReplayMemory(object):
 
   def get_observation_stack(self, index):
     state = self.get_stack(self.observations, index)
+    if self._packed_observations:
+      state = self._unpack(state)
     return np.transpose(state, [1, 0])
 
+  def _unpack(self, packed):
+    """Unpacks the packed observation rows along the last axis of packed."""
+    return np.unpackbits(packed, axis=-1, count=self._observation_size)
+
   def get_terminal_stack(self, index):
     return self.get_stack(self.terminals, index)
 
@@ -240,6 +256,15 @@ class OutOfGraphReplayMemory(object):
         (batch_size, self._observation_size, self._stack_size), dtype=np.uint8)
     self._state_batch = np.empty(
         (batch_size, self._observation_size, self._stack_size), dtype=np.uint8)
+    if self._packed_observations:
+      # Packed stacks of the sampled transitions, unpacked into the batches
+      # above once all are gathered.
+      self._packed_next_state_batch = np.empty(
+          (batch_size, self._stack_size, self._observation_row_size),
+          dtype=np.uint8)
+      self._packed_state_batch = np.empty(
+          (batch_size, self._stack_size, self._observation_row_size),
+          dtype=np.uint8)
 
   def sample_index_batch(self, batch_size):
     """Returns a batch of valid indices.
@@ -307,11 +332,16 @@ class OutOfGraphReplayMemory(object):
     next_legal_actions_batch = np.empty((batch_size, self._num_actions),
                                         dtype=np.float32)
 
+    if self._packed_observations:
+      state_batch = self._packed_state_batch
+      next_state_batch = self._packed_next_state_batch
+    else:
+      state_batch = self._state_batch
+      next_state_batch = self._next_state_batch
     for batch_element, memory_index in enumerate(indices):
       indices_batch[batch_element] = memory_index
 
-      self._state_batch[batch_element] = self.get_observation_stack(
-          memory_index)
+      state_batch[batch_element] = self._get_batch_stack(memory_index)
 
       # Compute indices in the replay memory up to n steps ahead.
       trajectory_indices = [(memory_index + j) % self._replay_capacity for
@@ -338,15 +368,32 @@ class OutOfGraphReplayMemory(object):
 
       bootstrap_state_index = (
           (memory_index + self._update_horizon) % self._replay_capacity)
-      self._next_state_batch[batch_element] = (
-          self.get_observation_stack(bootstrap_state_index))
+      next_state_batch[batch_element] = (
+          self._get_batch_stack(bootstrap_state_index))
       next_legal_actions_batch[batch_element] = (
           self.legal_actions[bootstrap_state_index])
 
+    if self._packed_observations:
+      self._state_batch[...] = np.transpose(
+          self._unpack(self._packed_state_batch), [0, 2, 1])
+      self._next_state_batch[...] = np.transpose(
+          self._unpack(self._packed_next_state_batch), [0, 2, 1])
+
     return (self._state_batch, action_batch, reward_batch,
             self._next_state_batch, terminal_batch, indices_batch,
             next_legal_actions_batch)
 
+  def _get_batch_stack(self, index):
+    """Returns the stack at index as stored in a sampled batch.
+
+    This is the (stack_size, row) stack of packed rows with
+    packed_observations, and the (observation_size, stack_size) observation
+    stack otherwise.
+    """
+    if self._packed_observations:
+      return self.get_stack(self.observations, index)
+    return self.get_observation_stack(index)
+
   def _generate_filename(self, checkpoint_dir, name, suffix):
     return os.path.join(checkpoint_dir, '{}_ckpt.{}.gz'.format(name, suffix))
 
@@ -422,7 +469,15 @@ class OutOfGraphReplayMemory(object):
             self.__dict__[attr] = pickle.load(infile)
 
 
-@gin.configurable(blacklist=['observation_size', 'stack_size'])
+def observation_row_size(observation_size, packed_observations):
+  """Returns the number of bytes the replay memory stores per observation."""
+  if packed_observations:
+    return (observation_size + 7) // 8
+  return observation_size
+
+
+@gin.configurable(blacklist=['observation_size', 'stack_size',
+                             'packed_observations'])
 class WrappedReplayMemory(object):
   """In-graph wrapper for the python replay memory.
 
@@ -457,7 +512,8 @@ class WrappedReplayMemory(object):
                batch_size=32,
                update_horizon=1,
                gamma=1.0,
-               wrapped_memory=None):
+               wrapped_memory=None,
+               packed_observations=False):
     """Initializes a graph wrapper for the python replay memory.
 
     Args:
@@ -472,6 +528,8 @@ class WrappedReplayMemory(object):
       gamma: int, the discount factor.
       wrapped_memory: The 'inner' memory data structure. Defaults to None, which
         creates the standard DQN replay memory.
+      packed_observations: bool, whether observations are added as np.packbits
+        bytes. Sampled states are unpacked all the same.
 
     Raises:
       ValueError: If update_horizon is not positive.
@@ -492,12 +550,15 @@ class WrappedReplayMemory(object):
     else:
       self.memory = OutOfGraphReplayMemory(
           num_actions, observation_size, stack_size,
-          replay_capacity, batch_size, update_horizon, gamma)
+          replay_capacity, batch_size, update_horizon, gamma,
+          packed_observations)
 
     with tf.name_scope('replay'):
       with tf.name_scope('add_placeholders'):
         self.add_obs_ph = tf.placeholder(
-            tf.uint8, [observation_size], name='add_obs_ph')
+            tf.uint8,
+            [observation_row_size(observation_size, packed_observations)],
+            name='add_obs_ph')
         self.add_action_ph = tf.placeholder(tf.int32, [], name='add_action_ph')
         self.add_reward_ph = tf.placeholder(
             tf.float32, [], name='add_reward_ph')
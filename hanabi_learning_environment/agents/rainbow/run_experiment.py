@@ -44,21 +44,25 @@ LENIENT_SCORE = False
 class ObservationStacker(object):
   """Class for stacking agent observations."""
 
-  def __init__(self, history_size, observation_size, num_players):
+  def __init__(self, history_size, observation_size, num_players,
+               packed=False):
     """Initializer for observation stacker.
 
     Args:
       history_size: int, number of time steps to stack.
       observation_size: int, size of observation vector on one time step.
       num_players: int, number of players.
+      packed: bool, whether observations are added, and stacks returned, as
+        np.packbits bytes.
     """
     self._history_size = history_size
     self._observation_size = observation_size
     self._num_players = num_players
+    self.packed = packed
     self._obs_stacks = list()
     for _ in range(0, self._num_players):
       self._obs_stacks.append(np.zeros(self._observation_size *
-                                       self._history_size))
+                                       self._history_size, dtype=np.uint8))
 
   def add_observation(self, observation, current_player):
     """Adds observation for the current player.
@@ -67,6 +71,8 @@ class ObservationStacker(object):
       observation: observation vector for current player.
       current_player: int, current player id.
     """
+    if self.packed:
+      observation = np.unpackbits(observation, count=self._observation_size)
     self._obs_stacks[current_player] = np.roll(self._obs_stacks[current_player],
                                                -self._observation_size)
     self._obs_stacks[current_player][(self._history_size - 1) *
@@ -79,6 +85,8 @@ class ObservationStacker(object):
       current_player: int, current player id.
     """
 
+    if self.packed:
+      return np.packbits(self._obs_stacks[current_player])
     return self._obs_stacks[current_player]
 
   def reset_stack(self):
@@ -112,7 +120,8 @@ def load_gin_configs(gin_files, gin_bindings):
 
 
 @gin.configurable
-def create_environment(game_type='Hanabi-Full', num_players=2):
+def create_environment(game_type='Hanabi-Full', num_players=2,
+                       packed_observations=False, encoder_type='canonical'):
   """Creates the Hanabi environment.
 
   Args:
@@ -120,12 +129,22 @@ def create_environment(game_type='Hanabi-Full', num_players=2):
       Hanabi-Full: Regular game.
       Hanabi-Small: The small version of Hanabi, with 2 cards and 2 colours.
     num_players: Int, number of players to play this game.
+    packed_observations: bool, whether the encoded observations are passed
+      along as np.packbits bytes, and so stored packed by the replay memory.
+      Requires canonical observations.
+    encoder_type: str, the observation encoding, 'canonical' or 'compact'.
+      Compact observations are small integers rather than bits, and an order
+      of magnitude shorter, so the replay memory holds them in less space.
 
   Returns:
     A Hanabi environment.
   """
+  # Agents only ever read the current player's encoding and legal moves.
+  encoding = "packed" if packed_observations else "vectorized"
   return rl_env.make(
-      environment_name=game_type, num_players=num_players, pyhanabi_path=None)
+      environment_name=game_type, num_players=num_players, pyhanabi_path=None,
+      current_player_only=True, observation_mode=(encoding, "legal_mask"),
+      encoder_type=encoder_type)
 
 
 @gin.configurable
@@ -142,7 +161,8 @@ def create_obs_stacker(environment, history_size=4):
 
   return ObservationStacker(history_size,
                             environment.vectorized_observation_shape()[0],
-                            environment.players)
+                            environment.players,
+                            packed="packed" in environment.observation_pieces)
 
 
 @gin.configurable
@@ -163,12 +183,14 @@ def create_agent(environment, obs_stacker, agent_type='DQN'):
   if agent_type == 'DQN':
     return dqn_agent.DQNAgent(observation_size=obs_stacker.observation_size(),
                               num_actions=environment.num_moves(),
-                              num_players=environment.players)
+                              num_players=environment.players,
+                              packed_observations=obs_stacker.packed)
   elif agent_type == 'Rainbow':
     return rainbow_agent.RainbowAgent(
         observation_size=obs_stacker.observation_size(),
         num_actions=environment.num_moves(),
-        num_players=environment.players)
+        num_players=environment.players,
+        packed_observations=obs_stacker.packed)
   else:
     raise ValueError('Expected valid agent_type, got {}'.format(agent_type))
 
@@ -261,16 +283,19 @@ def parse_observations(observations, num_actions, obs_stacker):
     legal_moves: `np.array` of floats, of length num_actions, whose elements
       are -inf for indices corresponding to illegal moves and 0, for those
       corresponding to legal moves.
-    observation_vector: Vectorized observation for the current player.
+    observation_vector: Vectorized observation for the current player, packed
+      if the stacker is.
   """
   current_player = observations['current_player']
   current_player_observation = (
       observations['player_observations'][current_player])
 
-  legal_moves = current_player_observation['legal_moves_as_int']
-  legal_moves = format_legal_moves(legal_moves, num_actions)
+  legal_moves_mask = current_player_observation['legal_moves_mask']
+  assert len(legal_moves_mask) == num_actions
+  legal_moves = np.where(legal_moves_mask, 0., -float('inf'))
 
-  observation_vector = current_player_observation['vectorized']
+  observation_vector = current_player_observation[
+      'packed' if obs_stacker.packed else 'vectorized']
   obs_stacker.add_observation(observation_vector, current_player)
   observation_vector = obs_stacker.get_observation_stack(current_player)
 
@@ -14,11 +14,15 @@
 
 #include <algorithm>
 #include <cassert>
+#include <cstdint>
 #include <cstdlib>
+#include <functional>
 #include <iostream>
+#include <numeric>
 #include <vector>
 
 #include "canonical_encoders.h"
+#include "util.h"
 
 namespace hanabi_learning_env {
 
@@ -54,48 +58,51 @@ int HandsSectionLength(const HanabiGame& game) {
          game.NumPlayers();
 }
 
+int HandCardsLength(const HanabiGame& game) {
+  return game.HandSize() * BitsPerCard(game);
+}
+
+// Encodes the cards of another player's hand, using <hand_size> *
+// <num_colors> * <num_ranks> bits. A player's hand can have fewer cards than
+// the initial hand size, in which case the bits of the absent cards are left
+// empty.
+template <typename T>
+void EncodeHandCards(const HanabiGame& game, const HanabiHand& hand,
+                     int offset, T* encoding) {
+  int bits_per_card = BitsPerCard(game);
+  int num_ranks = game.NumRanks();
+  for (const HanabiCard& card : hand.Cards()) {
+    // Only a player's own cards can be invalid/unobserved.
+    assert(card.IsValid());
+    assert(card.Color() < game.NumColors());
+    assert(card.Rank() < num_ranks);
+    encoding[offset + CardIndex(card.Color(), card.Rank(), num_ranks)] = 1;
+    offset += bits_per_card;
+  }
+}
+
 // Enocdes cards in all other player's hands (excluding our unknown hand),
 // and whether the hand is missing a card for all players (when deck is empty.)
 // Each card in a hand is encoded with a one-hot representation using
 // <num_colors> * <num_ranks> bits (25 bits in a standard game) per card.
 // Returns the number of entries written to the encoding.
+template <typename T>
 int EncodeHands(const HanabiGame& game, const HanabiObservation& obs,
-                int start_offset, std::vector<int>* encoding) {
-  int bits_per_card = BitsPerCard(game);
-  int num_ranks = game.NumRanks();
+                int start_offset, T* encoding) {
   int num_players = game.NumPlayers();
-  int hand_size = game.HandSize();
 
   int offset = start_offset;
   const std::vector<HanabiHand>& hands = obs.Hands();
   assert(hands.size() == num_players);
   for (int player = 1; player < num_players; ++player) {
-    const std::vector<HanabiCard>& cards = hands[player].Cards();
-    int num_cards = 0;
-
-    for (const HanabiCard& card : cards) {
-      // Only a player's own cards can be invalid/unobserved.
-      assert(card.IsValid());
-      assert(card.Color() < game.NumColors());
-      assert(card.Rank() < num_ranks);
-      (*encoding)[offset + CardIndex(card.Color(), card.Rank(), num_ranks)] = 1;
-
-      ++num_cards;
-      offset += bits_per_card;
-    }
-
-    // A player's hand can have fewer cards than the initial hand size.
-    // Leave the bits for the absent cards empty (adjust the offset to skip
-    // bits for the missing cards).
-    if (num_cards < hand_size) {
-      offset += (hand_size - num_cards) * bits_per_card;
-    }
+    EncodeHandCards(game, hands[player], offset, encoding);
+    offset += HandCardsLength(game);
   }
 
   // For each player, set a bit if their hand is missing a card.
   for (int player = 0; player < num_players; ++player) {
     if (hands[player].Cards().size() < game.HandSize()) {
-      (*encoding)[offset + player] = 1;
+      encoding[offset + player] = 1;
     }
   }
   offset += num_players;
@@ -120,8 +127,10 @@ int BoardSectionLength(const HanabiGame& game) {
 // We note several features use a thermometer representation instead of one-hot.
 // For example, life tokens could be: 000 (0), 100 (1), 110 (2), 111 (3).
 // Returns the number of entries written to the encoding.
-int EncodeBoard(const HanabiGame& game, const HanabiObservation& obs,
-                int start_offset, std::vector<int>* encoding) {
+template <typename T>
+int EncodeBoard(const HanabiGame& game, int deck_size,
+                const std::vector<int>& fireworks, int information_tokens,
+                int life_tokens, int start_offset, T* encoding) {
   int num_colors = game.NumColors();
   int num_ranks = game.NumRanks();
   int num_players = game.NumPlayers();
@@ -130,35 +139,34 @@ int EncodeBoard(const HanabiGame& game, const HanabiObservation& obs,
 
   int offset = start_offset;
   // Encode the deck size
-  for (int i = 0; i < obs.DeckSize(); ++i) {
-    (*encoding)[offset + i] = 1;
+  for (int i = 0; i < deck_size; ++i) {
+    encoding[offset + i] = 1;
   }
   offset += (max_deck_size - hand_size * num_players);  // 40 in normal 2P game
 
   // fireworks
-  const std::vector<int>& fireworks = obs.Fireworks();
   for (int c = 0; c < num_colors; ++c) {
     // fireworks[color] is the number of successfully played <color> cards.
     // If some were played, one-hot encode the highest (0-indexed) rank played
     if (fireworks[c] > 0) {
-      (*encoding)[offset + fireworks[c] - 1] = 1;
+      encoding[offset + fireworks[c] - 1] = 1;
     }
     offset += num_ranks;
   }
 
   // info tokens
-  assert(obs.InformationTokens() >= 0);
-  assert(obs.InformationTokens() <= game.MaxInformationTokens());
-  for (int i = 0; i < obs.InformationTokens(); ++i) {
-    (*encoding)[offset + i] = 1;
+  assert(information_tokens >= 0);
+  assert(information_tokens <= game.MaxInformationTokens());
+  for (int i = 0; i < information_tokens; ++i) {
+    encoding[offset + i] = 1;
   }
   offset += game.MaxInformationTokens();
 
   // life tokens
-  assert(obs.LifeTokens() >= 0);
-  assert(obs.LifeTokens() <= game.MaxLifeTokens());
-  for (int i = 0; i < obs.LifeTokens(); ++i) {
-    (*encoding)[offset + i] = 1;
+  assert(life_tokens >= 0);
+  assert(life_tokens <= game.MaxLifeTokens());
+  for (int i = 0; i < life_tokens; ++i) {
+    encoding[offset + i] = 1;
   }
   offset += game.MaxLifeTokens();
 
@@ -185,8 +193,9 @@ int DiscardSectionLength(const HanabiGame& game) { return game.MaxDeckSize(); }
 //   - one of the second highest rank have been discarded
 //   - the highest rank card has been discarded
 // Returns the number of entries written to the encoding.
+template <typename T>
 int EncodeDiscards(const HanabiGame& game, const HanabiObservation& obs,
-                   int start_offset, std::vector<int>* encoding) {
+                   int start_offset, T* encoding) {
   int num_colors = game.NumColors();
   int num_ranks = game.NumRanks();
 
@@ -200,7 +209,7 @@ int EncodeDiscards(const HanabiGame& game, const HanabiObservation& obs,
     for (int r = 0; r < num_ranks; ++r) {
       int num_discarded = discard_counts[c * num_ranks + r];
       for (int i = 0; i < num_discarded; ++i) {
-        (*encoding)[offset + i] = 1;
+        encoding[offset + i] = 1;
       }
       offset += game.NumberCardInstances(c, r);
     }
@@ -222,7 +231,9 @@ int LastActionSectionLength(const HanabiGame& game) {
          2;                   // play (successful, added information token)
 }
 
-// Encode the last player action (not chance's deal of cards). This encodes:
+// Encode the last player action (not chance's deal of cards), last_move,
+// or nothing if last_move is nullptr. Player indices in last_move must be
+// relative to the observer. This encodes:
 //  - Acting player index, relative to ourself (<num_players> bits; one-hot)
 //  - The MoveType (4 bits; one-hot)
 //  - Target player index, relative to acting player, if a reveal move
@@ -233,15 +244,16 @@ int LastActionSectionLength(const HanabiGame& game) {
 //  - Position played/discarded (<hand_size> bits; one-hot)
 //  - Card played/discarded (<num_colors> * <num_ranks> bits; one-hot)
 // Returns the number of entries written to the encoding.
-int EncodeLastAction(const HanabiGame& game, const HanabiObservation& obs,
-                     int start_offset, std::vector<int>* encoding) {
+template <typename T>
+int EncodeLastAction(const HanabiGame& game,
+                     const HanabiHistoryItem* last_move, int start_offset,
+                     T* encoding) {
   int num_colors = game.NumColors();
   int num_ranks = game.NumRanks();
   int num_players = game.NumPlayers();
   int hand_size = game.HandSize();
 
   int offset = start_offset;
-  const HanabiHistoryItem* last_move = GetLastNonDealMove(obs.LastMoves());
   if (last_move == nullptr) {
     offset += LastActionSectionLength(game);
   } else {
@@ -250,22 +262,22 @@ int EncodeLastAction(const HanabiGame& game, const HanabiObservation& obs,
     // player_id
     // Note: no assertion here. At a terminal state, the last player could have
     // been me (player id 0).
-    (*encoding)[offset + last_move->player] = 1;
+    encoding[offset + last_move->player] = 1;
     offset += num_players;
 
     // move type
     switch (last_move_type) {
       case HanabiMove::Type::kPlay:
-        (*encoding)[offset] = 1;
+        encoding[offset] = 1;
         break;
       case HanabiMove::Type::kDiscard:
-        (*encoding)[offset + 1] = 1;
+        encoding[offset + 1] = 1;
         break;
       case HanabiMove::Type::kRevealColor:
-        (*encoding)[offset + 2] = 1;
+        encoding[offset + 2] = 1;
         break;
       case HanabiMove::Type::kRevealRank:
-        (*encoding)[offset + 3] = 1;
+        encoding[offset + 3] = 1;
         break;
       default:
         std::abort();
@@ -277,19 +289,19 @@ int EncodeLastAction(const HanabiGame& game, const HanabiObservation& obs,
         last_move_type == HanabiMove::Type::kRevealRank) {
       int8_t observer_relative_target =
           (last_move->player + last_move->move.TargetOffset()) % num_players;
-      (*encoding)[offset + observer_relative_target] = 1;
+      encoding[offset + observer_relative_target] = 1;
     }
     offset += num_players;
 
     // color (if hint action)
     if (last_move_type == HanabiMove::Type::kRevealColor) {
-      (*encoding)[offset + last_move->move.Color()] = 1;
+      encoding[offset + last_move->move.Color()] = 1;
     }
     offset += num_colors;
 
     // rank (if hint action)
     if (last_move_type == HanabiMove::Type::kRevealRank) {
-      (*encoding)[offset + last_move->move.Rank()] = 1;
+      encoding[offset + last_move->move.Rank()] = 1;
     }
     offset += num_ranks;
 
@@ -298,7 +310,7 @@ int EncodeLastAction(const HanabiGame& game, const HanabiObservation& obs,
         last_move_type == HanabiMove::Type::kRevealRank) {
       for (int i = 0, mask = 1; i < hand_size; ++i, mask <<= 1) {
         if ((last_move->reveal_bitmask & mask) > 0) {
-          (*encoding)[offset + i] = 1;
+          encoding[offset + i] = 1;
         }
       }
     }
@@ -307,7 +319,7 @@ int EncodeLastAction(const HanabiGame& game, const HanabiObservation& obs,
     // position (if play or discard action)
     if (last_move_type == HanabiMove::Type::kPlay ||
         last_move_type == HanabiMove::Type::kDiscard) {
-      (*encoding)[offset + last_move->move.CardIndex()] = 1;
+      encoding[offset + last_move->move.CardIndex()] = 1;
     }
     offset += hand_size;
 
@@ -316,7 +328,7 @@ int EncodeLastAction(const HanabiGame& game, const HanabiObservation& obs,
         last_move_type == HanabiMove::Type::kDiscard) {
       assert(last_move->color >= 0);
       assert(last_move->rank >= 0);
-      (*encoding)[offset +
+      encoding[offset +
                   CardIndex(last_move->color, last_move->rank, num_ranks)] = 1;
     }
     offset += BitsPerCard(game);
@@ -324,10 +336,10 @@ int EncodeLastAction(const HanabiGame& game, const HanabiObservation& obs,
     // was successful and/or added information token (if play action)
     if (last_move_type == HanabiMove::Type::kPlay) {
       if (last_move->scored) {
-        (*encoding)[offset] = 1;
+        encoding[offset] = 1;
       }
       if (last_move->information_token) {
-        (*encoding)[offset + 1] = 1;
+        encoding[offset + 1] = 1;
       }
     }
     offset += 2;
@@ -337,11 +349,47 @@ int EncodeLastAction(const HanabiGame& game, const HanabiObservation& obs,
   return offset - start_offset;
 }
 
-int CardKnowledgeSectionLength(const HanabiGame& game) {
-  return game.NumPlayers() * game.HandSize() *
+int HandKnowledgeLength(const HanabiGame& game) {
+  return game.HandSize() *
          (BitsPerCard(game) + game.NumColors() + game.NumRanks());
 }
 
+int CardKnowledgeSectionLength(const HanabiGame& game) {
+  return game.NumPlayers() * HandKnowledgeLength(game);
+}
+
+// Encodes the knowledge of the cards of one hand, as described below for
+// EncodeCardKnowledge. Bits of cards absent from the hand are left empty.
+template <typename T>
+void EncodeHandKnowledge(const HanabiGame& game, const HanabiHand& hand,
+                         int offset, T* encoding) {
+  int num_colors = game.NumColors();
+  int num_ranks = game.NumRanks();
+  for (const HanabiHand::CardKnowledge& card_knowledge : hand.Knowledge()) {
+    // Add bits for plausible card.
+    for (int color = 0; color < num_colors; ++color) {
+      if (card_knowledge.ColorPlausible(color)) {
+        for (int rank = 0; rank < num_ranks; ++rank) {
+          if (card_knowledge.RankPlausible(rank)) {
+            encoding[offset + CardIndex(color, rank, num_ranks)] = 1;
+          }
+        }
+      }
+    }
+    offset += BitsPerCard(game);
+
+    // Add bits for explicitly revealed colors and ranks.
+    if (card_knowledge.ColorHinted()) {
+      encoding[offset + card_knowledge.Color()] = 1;
+    }
+    offset += num_colors;
+    if (card_knowledge.RankHinted()) {
+      encoding[offset + card_knowledge.Rank()] = 1;
+    }
+    offset += num_ranks;
+  }
+}
+
 // Encode the common card knowledge.
 // For each card/position in each player's hand, including the observing player,
 // encode the possible cards that could be in that position and whether the
@@ -363,55 +411,17 @@ int CardKnowledgeSectionLength(const HanabiGame& game) {
 // Uses <num_players> * <hand_size> *
 // (<num_colors> * <num_ranks> + <num_colors> + <num_ranks>) bits.
 // Returns the number of entries written to the encoding.
+template <typename T>
 int EncodeCardKnowledge(const HanabiGame& game, const HanabiObservation& obs,
-                        int start_offset, std::vector<int>* encoding) {
-  int bits_per_card = BitsPerCard(game);
-  int num_colors = game.NumColors();
-  int num_ranks = game.NumRanks();
+                        int start_offset, T* encoding) {
   int num_players = game.NumPlayers();
-  int hand_size = game.HandSize();
 
   int offset = start_offset;
   const std::vector<HanabiHand>& hands = obs.Hands();
   assert(hands.size() == num_players);
   for (int player = 0; player < num_players; ++player) {
-    const std::vector<HanabiHand::CardKnowledge>& knowledge =
-        hands[player].Knowledge();
-    int num_cards = 0;
-
-    for (const HanabiHand::CardKnowledge& card_knowledge : knowledge) {
-      // Add bits for plausible card.
-      for (int color = 0; color < num_colors; ++color) {
-        if (card_knowledge.ColorPlausible(color)) {
-          for (int rank = 0; rank < num_ranks; ++rank) {
-            if (card_knowledge.RankPlausible(rank)) {
-              (*encoding)[offset + CardIndex(color, rank, num_ranks)] = 1;
-            }
-          }
-        }
-      }
-      offset += bits_per_card;
-
-      // Add bits for explicitly revealed colors and ranks.
-      if (card_knowledge.ColorHinted()) {
-        (*encoding)[offset + card_knowledge.Color()] = 1;
-      }
-      offset += num_colors;
-      if (card_knowledge.RankHinted()) {
-        (*encoding)[offset + card_knowledge.Rank()] = 1;
-      }
-      offset += num_ranks;
-
-      ++num_cards;
-    }
-
-    // A player's hand can have fewer cards than the initial hand size.
-    // Leave the bits for the absent cards empty (adjust the offset to skip
-    // bits for the missing cards).
-    if (num_cards < hand_size) {
-      offset +=
-          (hand_size - num_cards) * (bits_per_card + num_colors + num_ranks);
-    }
+    EncodeHandKnowledge(game, hands[player], offset, encoding);
+    offset += HandKnowledgeLength(game);
   }
 
   assert(offset - start_offset == CardKnowledgeSectionLength(game));
@@ -430,24 +440,224 @@ std::vector<int> CanonicalObservationEncoder::Shape() const {
                : CardKnowledgeSectionLength(*parent_game_))};
 }
 
-std::vector<int> CanonicalObservationEncoder::Encode(
-    const HanabiObservation& obs) const {
-  // Make an empty bit string of the proper size.
-  std::vector<int> encoding(FlatLength(Shape()), 0);
+namespace {
 
+// Writes all sections of the canonical encoding into a zero-initialized
+// encoding, returning the number of entries written.
+template <typename T>
+int EncodeSections(const HanabiGame& game, const HanabiObservation& obs,
+                   T* encoding) {
   // This offset is an index to the start of each section of the bit vector.
   // It is incremented at the end of each section.
   int offset = 0;
-  offset += EncodeHands(*parent_game_, obs, offset, &encoding);
-  offset += EncodeBoard(*parent_game_, obs, offset, &encoding);
-  offset += EncodeDiscards(*parent_game_, obs, offset, &encoding);
-  offset += EncodeLastAction(*parent_game_, obs, offset, &encoding);
-  if (parent_game_->ObservationType() != HanabiGame::kMinimal) {
-    offset += EncodeCardKnowledge(*parent_game_, obs, offset, &encoding);
+  offset += EncodeHands(game, obs, offset, encoding);
+  offset += EncodeBoard(game, obs.DeckSize(), obs.Fireworks(),
+                        obs.InformationTokens(), obs.LifeTokens(), offset,
+                        encoding);
+  offset += EncodeDiscards(game, obs, offset, encoding);
+  offset += EncodeLastAction(game, GetLastNonDealMove(obs.LastMoves()), offset,
+                             encoding);
+  if (game.ObservationType() != HanabiGame::kMinimal) {
+    offset += EncodeCardKnowledge(game, obs, offset, encoding);
   }
+  return offset;
+}
 
-  assert(offset == encoding.size());
+}  // namespace
+
+std::vector<int> CanonicalObservationEncoder::Encode(
+    const HanabiObservation& obs) const {
+  // Make an empty bit string of the proper size.
+  std::vector<int> encoding(FlatLength(Shape()), 0);
+  int length = EncodeSections(*parent_game_, obs, encoding.data());
+  assert(length == encoding.size());
   return encoding;
 }
 
+void CanonicalObservationEncoder::EncodeInto(const HanabiObservation& obs,
+                                             uint8_t* encoding) const {
+  int length = FlatLength(Shape());
+  std::fill(encoding, encoding + length, 0);
+  int written = EncodeSections(*parent_game_, obs, encoding);
+  assert(written == length);
+}
+
+IncrementalCanonicalEncoder::IncrementalCanonicalEncoder(
+    const HanabiGame* parent_game, int observing_player, bool verify)
+    : parent_game_(parent_game),
+      observing_player_(observing_player),
+      verify_(verify),
+      full_encoder_(parent_game) {
+  REQUIRE(parent_game != nullptr);
+  REQUIRE(observing_player >= 0 &&
+          observing_player < parent_game->NumPlayers());
+  encoding_.resize(FlatLength(full_encoder_.Shape()), 0);
+  discard_counts_.resize(BitsPerCard(*parent_game), 0);
+  int offset =
+      HandsSectionLength(*parent_game) + BoardSectionLength(*parent_game);
+  for (int color = 0; color < parent_game->NumColors(); ++color) {
+    for (int rank = 0; rank < parent_game->NumRanks(); ++rank) {
+      discard_offsets_.push_back(offset);
+      offset += parent_game->NumberCardInstances(color, rank);
+    }
+  }
+}
+
+void IncrementalCanonicalEncoder::EncodeInto(const HanabiState& state,
+                                             uint8_t* encoding) {
+  REQUIRE(state.ParentGame() == parent_game_);
+  int num_new_moves = NumNewMoves(state);
+  if (num_new_moves < 0) {
+    EncodeFromScratch(state);
+  } else if (num_new_moves > 0) {
+    EncodeNewMoves(state, num_new_moves);
+  }
+  history_ = state.MoveHistory();
+  has_encoding_ = true;
+
+  if (verify_) {
+    std::vector<uint8_t> expected(encoding_.size());
+    full_encoder_.EncodeInto(HanabiObservation(state, observing_player_),
+                             expected.data());
+    REQUIRE(encoding_ == expected);
+  }
+  std::copy(encoding_.begin(), encoding_.end(), encoding);
+}
+
+void IncrementalCanonicalEncoder::Reset() {
+  history_ = HanabiMoveHistory();
+  has_encoding_ = false;
+}
+
+int IncrementalCanonicalEncoder::NumNewMoves(const HanabiState& state) const {
+  if (!has_encoding_) {
+    return -1;
+  }
+  const HanabiMoveHistory& history = state.MoveHistory();
+  int num_new_moves = history.Size() - history_.Size();
+  if (num_new_moves < 0) {
+    return -1;
+  }
+  if (history_.Empty()) {
+    // Every game starts from the same empty hands and full deck.
+    return num_new_moves;
+  }
+  // Histories are shared between states that continue one another, so the
+  // previous history is a prefix exactly if its most recent item is found at
+  // the same place, rather than an equal item.
+  auto it = history.rbegin();
+  for (int i = 0; i < num_new_moves; ++i) {
+    ++it;
+  }
+  return &*it == &history_.Back() ? num_new_moves : -1;
+}
+
+void IncrementalCanonicalEncoder::EncodeFromScratch(const HanabiState& state) {
+  full_encoder_.EncodeInto(HanabiObservation(state, observing_player_),
+                           encoding_.data());
+  std::fill(discard_counts_.begin(), discard_counts_.end(), 0);
+  for (const HanabiCard& card : state.DiscardPile()) {
+    ++discard_counts_[CardIndex(card.Color(), card.Rank(),
+                                parent_game_->NumRanks())];
+  }
+}
+
+void IncrementalCanonicalEncoder::EncodeNewMoves(const HanabiState& state,
+                                                 int num_new_moves) {
+  const HanabiGame& game = *parent_game_;
+  int num_players = game.NumPlayers();
+  auto observer_offset = [this, num_players](int player) {
+    return (player + num_players - observing_player_) % num_players;
+  };
+
+  // Bitmasks of the players, by offset from the observer, whose cards or
+  // card knowledge changed.
+  int hands_changed = 0;
+  int knowledge_changed = 0;
+  const HanabiHistoryItem* last_move = nullptr;
+  auto it = state.MoveHistory().rbegin();
+  for (int i = 0; i < num_new_moves; ++i, ++it) {
+    const HanabiHistoryItem& item = *it;
+    switch (item.move.MoveType()) {
+      case HanabiMove::kDeal:
+        hands_changed |= 1 << observer_offset(item.deal_to_player);
+        break;
+      case HanabiMove::kPlay:
+      case HanabiMove::kDiscard:
+        hands_changed |= 1 << observer_offset(item.player);
+        if (item.move.MoveType() == HanabiMove::kDiscard || !item.scored) {
+          AddDiscard(item.color, item.rank);
+        }
+        break;
+      case HanabiMove::kRevealColor:
+      case HanabiMove::kRevealRank:
+        knowledge_changed |=
+            1 << observer_offset(item.player + item.move.TargetOffset());
+        break;
+      default:
+        std::abort();
+    }
+    if (last_move == nullptr && item.move.MoveType() != HanabiMove::kDeal) {
+      last_move = &item;
+    }
+  }
+
+  uint8_t* encoding = encoding_.data();
+  const std::vector<HanabiHand>& hands = state.Hands();
+  int hand_length = HandCardsLength(game);
+  for (int offset = 1; offset < num_players; ++offset) {
+    if (hands_changed & (1 << offset)) {
+      int start = (offset - 1) * hand_length;
+      std::fill(encoding + start, encoding + start + hand_length, 0);
+      EncodeHandCards(game, hands[(observing_player_ + offset) % num_players],
+                      start, encoding);
+    }
+  }
+  int missing_card_start = (num_players - 1) * hand_length;
+  for (int offset = 0; offset < num_players; ++offset) {
+    const HanabiHand& hand = hands[(observing_player_ + offset) % num_players];
+    encoding[missing_card_start + offset] =
+        hand.Cards().size() < game.HandSize() ? 1 : 0;
+  }
+
+  // The board is small, and changes with nearly every move.
+  int board_start = HandsSectionLength(game);
+  std::fill(encoding + board_start,
+            encoding + board_start + BoardSectionLength(game), 0);
+  EncodeBoard(game, state.Deck().Size(), state.Fireworks(),
+              state.InformationTokens(), state.LifeTokens(), board_start,
+              encoding);
+
+  // The discard section was updated by AddDiscard().
+  int last_action_start =
+      board_start + BoardSectionLength(game) + DiscardSectionLength(game);
+  if (last_move != nullptr) {
+    HanabiHistoryItem relative_move = *last_move;
+    relative_move.player = observer_offset(last_move->player);
+    std::fill(encoding + last_action_start,
+              encoding + last_action_start + LastActionSectionLength(game), 0);
+    EncodeLastAction(game, &relative_move, last_action_start, encoding);
+  }
+
+  if (game.ObservationType() != HanabiGame::kMinimal) {
+    int knowledge_start = last_action_start + LastActionSectionLength(game);
+    int knowledge_length = HandKnowledgeLength(game);
+    for (int offset = 0; offset < num_players; ++offset) {
+      if ((hands_changed | knowledge_changed) & (1 << offset)) {
+        int start = knowledge_start + offset * knowledge_length;
+        std::fill(encoding + start, encoding + start + knowledge_length, 0);
+        EncodeHandKnowledge(game,
+                            hands[(observing_player_ + offset) % num_players],
+                            start, encoding);
+      }
+    }
+  }
+}
+
+void IncrementalCanonicalEncoder::AddDiscard(int color, int rank) {
+  int index = CardIndex(color, rank, parent_game_->NumRanks());
+  encoding_[discard_offsets_[index] + discard_counts_[index]] = 1;
+  ++discard_counts_[index];
+}
+
 }  // namespace hanabi_learning_env
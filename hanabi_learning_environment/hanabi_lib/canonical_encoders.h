@@ -18,10 +18,13 @@
 #ifndef __CANONICAL_ENCODERS_H__
 #define __CANONICAL_ENCODERS_H__
 
+#include <cstdint>
 #include <vector>
 
 #include "hanabi_game.h"
+#include "hanabi_history_item.h"
 #include "hanabi_observation.h"
+#include "hanabi_state.h"
 #include "observation_encoder.h"
 
 namespace hanabi_learning_env {
@@ -34,6 +37,8 @@ class CanonicalObservationEncoder : public ObservationEncoder {
 
   std::vector<int> Shape() const override;
   std::vector<int> Encode(const HanabiObservation& obs) const override;
+  void EncodeInto(const HanabiObservation& obs,
+                  uint8_t* encoding) const override;
 
   ObservationEncoder::Type type() const override {
     return ObservationEncoder::Type::kCanonical;
@@ -43,6 +48,55 @@ class CanonicalObservationEncoder : public ObservationEncoder {
   const HanabiGame* parent_game_ = nullptr;
 };
 
+// Canonical encoding of one player's observations over the course of a game.
+// Rather than encoding each observation from scratch, the previous encoding
+// is kept and only the parts changed by the moves made since are rewritten.
+// The encodings are identical to those of CanonicalObservationEncoder.
+class IncrementalCanonicalEncoder {
+ public:
+  // Encodes the observations of observing_player in games of parent_game,
+  // which is not owned and must outlive this object. If verify is true, every
+  // encoding is checked against CanonicalObservationEncoder, and a mismatch
+  // aborts.
+  IncrementalCanonicalEncoder(const HanabiGame* parent_game,
+                              int observing_player, bool verify = false);
+
+  int ObservationLength() const { return encoding_.size(); }
+  int ObservingPlayer() const { return observing_player_; }
+
+  // Writes the encoding of observing_player's observation of state into
+  // encoding, which holds ObservationLength() entries. The previous encoding
+  // is updated if state continues the game it encoded, i.e. the previous move
+  // history is a prefix of the state's, else state is encoded from scratch.
+  void EncodeInto(const HanabiState& state, uint8_t* encoding);
+
+  // Forgets the previous encoding.
+  void Reset();
+
+ private:
+  // Returns how many moves state has made since the previous encoding, or -1
+  // if state does not continue the previously encoded game.
+  int NumNewMoves(const HanabiState& state) const;
+  void EncodeFromScratch(const HanabiState& state);
+  void EncodeNewMoves(const HanabiState& state, int num_new_moves);
+  // Adds a discarded card to the discard section.
+  void AddDiscard(int color, int rank);
+
+  const HanabiGame* parent_game_ = nullptr;
+  int observing_player_ = -1;
+  bool verify_ = false;
+  CanonicalObservationEncoder full_encoder_;
+  std::vector<uint8_t> encoding_;
+  // Number of discarded cards, and the position of the discard section bits,
+  // of each card index.
+  std::vector<int> discard_counts_;
+  std::vector<int> discard_offsets_;
+  // Move history of the previously encoded state. Holding it also keeps its
+  // items alive, so they can be recognised by address in later histories.
+  HanabiMoveHistory history_;
+  bool has_encoding_ = false;
+};
+
 }  // namespace hanabi_learning_env
 
 #endif
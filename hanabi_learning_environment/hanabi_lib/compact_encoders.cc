@@ -0,0 +1,210 @@
+// Copyright 2018 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//    https://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+#include <algorithm>
+#include <cassert>
+#include <cstdint>
+#include <cstdlib>
+#include <vector>
+
+#include "compact_encoders.h"
+
+namespace hanabi_learning_env {
+
+namespace {
+
+int NumCardIds(const HanabiGame& game) {
+  return game.NumColors() * game.NumRanks();
+}
+
+// The id of a visible card, in [1, NumCardIds(game)].
+int CardId(const HanabiGame& game, int color, int rank) {
+  return color * game.NumRanks() + rank + 1;
+}
+
+int HandsSectionLength(const HanabiGame& game) {
+  return game.NumPlayers() * game.HandSize();
+}
+
+// Encodes the card id of every hand slot, or the hidden card id for cards the
+// observer cannot see. Slots past the end of a hand are left 0.
+template <typename T>
+int EncodeHands(const HanabiGame& game, const HanabiObservation& obs,
+                int start_offset, T* encoding) {
+  int hidden_card = NumCardIds(game) + 1;
+  int offset = start_offset;
+  for (const HanabiHand& hand : obs.Hands()) {
+    int slot = offset;
+    for (const HanabiCard& card : hand.Cards()) {
+      encoding[slot++] =
+          card.IsValid() ? CardId(game, card.Color(), card.Rank())
+                         : hidden_card;
+    }
+    offset += game.HandSize();
+  }
+  assert(offset - start_offset == HandsSectionLength(game));
+  return offset - start_offset;
+}
+
+int BoardSectionLength(const HanabiGame& game) {
+  return 1 +                 // deck size
+         game.NumColors() +  // fireworks
+         2;                  // information and life tokens
+}
+
+template <typename T>
+int EncodeBoard(const HanabiGame& game, const HanabiObservation& obs,
+                int start_offset, T* encoding) {
+  int offset = start_offset;
+  encoding[offset++] = obs.DeckSize();
+  for (int firework : obs.Fireworks()) {
+    encoding[offset++] = firework;
+  }
+  encoding[offset++] = obs.InformationTokens();
+  encoding[offset++] = obs.LifeTokens();
+  assert(offset - start_offset == BoardSectionLength(game));
+  return offset - start_offset;
+}
+
+int DiscardSectionLength(const HanabiGame& game) { return NumCardIds(game); }
+
+// Encodes the number of discarded cards of each card id.
+template <typename T>
+int EncodeDiscards(const HanabiGame& game, const HanabiObservation& obs,
+                   int start_offset, T* encoding) {
+  for (const HanabiCard& card : obs.DiscardPile()) {
+    ++encoding[start_offset + CardId(game, card.Color(), card.Rank()) - 1];
+  }
+  return DiscardSectionLength(game);
+}
+
+int LastActionSectionLength(const HanabiGame& game) { return 10; }
+
+// Encodes the fields of the last player action, as described in
+// compact_encoders.h. Player indices in the history are relative to the
+// observer. Fields which do not apply to the move type are left 0.
+template <typename T>
+int EncodeLastAction(const HanabiGame& game, const HanabiObservation& obs,
+                     int start_offset, T* encoding) {
+  const std::vector<HanabiHistoryItem>& last_moves = obs.LastMoves();
+  auto last_move = std::find_if(
+      last_moves.begin(), last_moves.end(), [](const HanabiHistoryItem& item) {
+        return item.move.MoveType() != HanabiMove::Type::kDeal;
+      });
+  if (last_move == last_moves.end()) {
+    return LastActionSectionLength(game);
+  }
+
+  T* fields = encoding + start_offset;
+  const HanabiMove& move = last_move->move;
+  fields[0] = last_move->player + 1;
+  switch (move.MoveType()) {
+    case HanabiMove::Type::kPlay:
+    case HanabiMove::Type::kDiscard:
+      fields[1] = move.MoveType() == HanabiMove::Type::kPlay ? 1 : 2;
+      fields[6] = move.CardIndex() + 1;
+      assert(last_move->color >= 0);
+      assert(last_move->rank >= 0);
+      fields[7] = CardId(game, last_move->color, last_move->rank);
+      if (move.MoveType() == HanabiMove::Type::kPlay) {
+        fields[8] = last_move->scored ? 1 : 0;
+        fields[9] = last_move->information_token ? 1 : 0;
+      }
+      break;
+    case HanabiMove::Type::kRevealColor:
+    case HanabiMove::Type::kRevealRank:
+      fields[2] =
+          (last_move->player + move.TargetOffset()) % game.NumPlayers() + 1;
+      if (move.MoveType() == HanabiMove::Type::kRevealColor) {
+        fields[1] = 3;
+        fields[3] = move.Color() + 1;
+      } else {
+        fields[1] = 4;
+        fields[4] = move.Rank() + 1;
+      }
+      fields[5] = last_move->reveal_bitmask;
+      break;
+    default:
+      std::abort();
+  }
+  return LastActionSectionLength(game);
+}
+
+int CardKnowledgeSectionLength(const HanabiGame& game) {
+  return 2 * game.NumPlayers() * game.HandSize();
+}
+
+// Encodes the plausible color and rank bitmasks of every hand slot. Slots past
+// the end of a hand are left 0.
+template <typename T>
+int EncodeCardKnowledge(const HanabiGame& game, const HanabiObservation& obs,
+                        int start_offset, T* encoding) {
+  int offset = start_offset;
+  for (const HanabiHand& hand : obs.Hands()) {
+    int slot = offset;
+    for (const HanabiHand::CardKnowledge& knowledge : hand.Knowledge()) {
+      encoding[slot++] = knowledge.ColorPlausibleMask();
+      encoding[slot++] = knowledge.RankPlausibleMask();
+    }
+    offset += 2 * game.HandSize();
+  }
+  assert(offset - start_offset == CardKnowledgeSectionLength(game));
+  return offset - start_offset;
+}
+
+// Writes all sections of the compact encoding into a zero-initialized
+// encoding, returning the number of entries written.
+template <typename T>
+int EncodeSections(const HanabiGame& game, const HanabiObservation& obs,
+                   T* encoding) {
+  int offset = 0;
+  offset += EncodeHands(game, obs, offset, encoding);
+  offset += EncodeBoard(game, obs, offset, encoding);
+  offset += EncodeDiscards(game, obs, offset, encoding);
+  offset += EncodeLastAction(game, obs, offset, encoding);
+  if (game.ObservationType() != HanabiGame::kMinimal) {
+    offset += EncodeCardKnowledge(game, obs, offset, encoding);
+  }
+  return offset;
+}
+
+}  // namespace
+
+std::vector<int> CompactObservationEncoder::Shape() const {
+  return {HandsSectionLength(*parent_game_) +
+          BoardSectionLength(*parent_game_) +
+          DiscardSectionLength(*parent_game_) +
+          LastActionSectionLength(*parent_game_) +
+          (parent_game_->ObservationType() == HanabiGame::kMinimal
+               ? 0
+               : CardKnowledgeSectionLength(*parent_game_))};
+}
+
+std::vector<int> CompactObservationEncoder::Encode(
+    const HanabiObservation& obs) const {
+  std::vector<int> encoding(Shape()[0], 0);
+  int length = EncodeSections(*parent_game_, obs, encoding.data());
+  assert(length == encoding.size());
+  return encoding;
+}
+
+void CompactObservationEncoder::EncodeInto(const HanabiObservation& obs,
+                                           uint8_t* encoding) const {
+  int length = Shape()[0];
+  std::fill(encoding, encoding + length, 0);
+  int written = EncodeSections(*parent_game_, obs, encoding);
+  assert(written == length);
+}
+
+}  // namespace hanabi_learning_env
@@ -0,0 +1,72 @@
+// Copyright 2018 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//    https://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+// A compact observation encoder. Rather than one-hot and thermometer bits,
+// every feature is a small integer, e.g. the id of a card or the number of
+// life tokens. Observations are an order of magnitude shorter than canonical
+// ones, and suit models which embed categorical features.
+
+#ifndef __COMPACT_ENCODERS_H__
+#define __COMPACT_ENCODERS_H__
+
+#include <cstdint>
+#include <vector>
+
+#include "hanabi_game.h"
+#include "hanabi_observation.h"
+#include "observation_encoder.h"
+
+namespace hanabi_learning_env {
+
+// Card ids number the cards in color-major order from 1, so that id 0 is left
+// for "no card". In hands, id <num_colors> * <num_ranks> + 1 marks a card the
+// observer cannot see. Players are relative to the observer.
+//
+// The encoding is the concatenation of:
+//  - Hands: the card id of each of the <hand_size> slots of each player,
+//    starting with the observer. Slots past the end of a hand are 0.
+//  - Board: deck size, the fireworks level of each color, information tokens
+//    and life tokens.
+//  - Discards: the number of discarded cards of each card id.
+//  - Last action (not chance's deal of cards), all 0 if there is none:
+//    acting player + 1, move type (1 play, 2 discard, 3 reveal color,
+//    4 reveal rank), target player + 1, revealed color + 1, revealed
+//    rank + 1, reveal outcome bitmask over the target's hand, position
+//    played or discarded + 1, card id played or discarded, whether a play
+//    scored and whether it added an information token.
+//  - Card knowledge, unless the observation type is kMinimal: a bitmask of
+//    the plausible colors and one of the plausible ranks of each card slot
+//    of each player, with bit i set if color or rank i is plausible.
+//    Slots past the end of a hand are 0.
+class CompactObservationEncoder : public ObservationEncoder {
+ public:
+  explicit CompactObservationEncoder(const HanabiGame* parent_game)
+      : parent_game_(parent_game) {}
+
+  std::vector<int> Shape() const override;
+  std::vector<int> Encode(const HanabiObservation& obs) const override;
+  void EncodeInto(const HanabiObservation& obs,
+                  uint8_t* encoding) const override;
+
+  ObservationEncoder::Type type() const override {
+    return ObservationEncoder::Type::kCompact;
+  }
+
+ private:
+  const HanabiGame* parent_game_ = nullptr;
+};
+
+}  // namespace hanabi_learning_env
+
+#endif
@@ -0,0 +1,79 @@
+// Copyright 2018 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//    https://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+// A small counter-based random number generator. The i-th number drawn is a
+// pure function of (key, stream, i), so independent streams (e.g. one per
+// episode) can be generated in any order or in parallel, and reproduced
+// exactly.
+
+#ifndef __COUNTER_RNG_H__
+#define __COUNTER_RNG_H__
+
+#include <cstdint>
+#include <limits>
+
+namespace hanabi_learning_env {
+
+class CounterRng {
+ public:
+  CounterRng() = default;
+  CounterRng(uint64_t key, uint64_t stream)
+      : key_(key), stream_(stream), base_(Mix(key ^ Mix(stream + kGolden))) {}
+
+  uint64_t Key() const { return key_; }
+  uint64_t Stream() const { return stream_; }
+  // Number of values drawn so far, i.e. the position in the stream.
+  uint64_t Counter() const { return counter_; }
+  void SetCounter(uint64_t counter) { counter_ = counter; }
+
+  // Returns the next 64 bit value of the stream.
+  uint64_t Next() { return Mix(base_ + (++counter_) * kGolden); }
+
+  // Returns a uniformly distributed integer in [0, n), for n > 0.
+  int UniformInt(int n) {
+    uint64_t range = static_cast<uint64_t>(n);
+    // Reject the top values which would bias the modulo.
+    uint64_t limit = std::numeric_limits<uint64_t>::max() -
+                     std::numeric_limits<uint64_t>::max() % range;
+    uint64_t value;
+    do {
+      value = Next();
+    } while (value >= limit);
+    return static_cast<int>(value % range);
+  }
+
+  // Returns a uniformly distributed double in [0, 1).
+  double UniformDouble() {
+    return (Next() >> 11) / static_cast<double>(uint64_t(1) << 53);
+  }
+
+ private:
+  static constexpr uint64_t kGolden = 0x9e3779b97f4a7c15ULL;
+
+  // SplitMix64 finalizer.
+  static uint64_t Mix(uint64_t x) {
+    x = (x ^ (x >> 30)) * 0xbf58476d1ce4e5b9ULL;
+    x = (x ^ (x >> 27)) * 0x94d049bb133111ebULL;
+    return x ^ (x >> 31);
+  }
+
+  uint64_t key_ = 0;
+  uint64_t stream_ = 0;
+  uint64_t base_ = 0;
+  uint64_t counter_ = 0;
+};
+
+}  // namespace hanabi_learning_env
+
+#endif
@@ -0,0 +1,98 @@
+// Copyright 2018 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//    https://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+// A vector with a fixed capacity, whose elements are stored inline. Copying
+// one never allocates, so objects holding FixedVectors (hands, and so states
+// and observations) copy with little more than a memcpy.
+
+#ifndef __FIXED_VECTOR_H__
+#define __FIXED_VECTOR_H__
+
+#include <algorithm>
+#include <cassert>
+#include <stdexcept>
+
+namespace hanabi_learning_env {
+
+// Holds up to N elements of type T, which must be default constructible and
+// copyable. Supports the subset of the std::vector interface used here.
+template <typename T, int N>
+class FixedVector {
+ public:
+  typedef T value_type;
+  typedef T* iterator;
+  typedef const T* const_iterator;
+
+  FixedVector() = default;
+  FixedVector(int size, const T& value) { resize(size, value); }
+
+  static constexpr int capacity() { return N; }
+  int size() const { return size_; }
+  bool empty() const { return size_ == 0; }
+
+  T& operator[](int index) {
+    assert(index >= 0 && index < size_);
+    return data_[index];
+  }
+  const T& operator[](int index) const {
+    assert(index >= 0 && index < size_);
+    return data_[index];
+  }
+  // Like operator[], but throws std::out_of_range for an invalid index.
+  const T& at(int index) const {
+    if (index < 0 || index >= size_) {
+      throw std::out_of_range("FixedVector index out of range");
+    }
+    return data_[index];
+  }
+  T& back() { return (*this)[size_ - 1]; }
+  const T& back() const { return (*this)[size_ - 1]; }
+
+  iterator begin() { return data_; }
+  iterator end() { return data_ + size_; }
+  const_iterator begin() const { return data_; }
+  const_iterator end() const { return data_ + size_; }
+
+  void push_back(const T& value) {
+    assert(size_ < N);
+    data_[size_++] = value;
+  }
+  void pop_back() {
+    assert(size_ > 0);
+    --size_;
+  }
+  // Removes the element at position, shifting later elements down by one.
+  iterator erase(iterator position) {
+    assert(position >= begin() && position < end());
+    std::copy(position + 1, end(), position);
+    pop_back();
+    return position;
+  }
+  void resize(int size, const T& value = T()) {
+    assert(size >= 0 && size <= N);
+    if (size > size_) {
+      std::fill(data_ + size_, data_ + size, value);
+    }
+    size_ = size;
+  }
+  void clear() { resize(0); }
+
+ private:
+  T data_[N];
+  int size_ = 0;
+};
+
+}  // namespace hanabi_learning_env
+
+#endif
@@ -14,6 +14,8 @@
 
 #include "hanabi_game.h"
 
+#include <sstream>
+
 #include "util.h"
 
 namespace hanabi_learning_env {
@@ -36,6 +38,7 @@ HanabiGame::HanabiGame(
   num_ranks_ = ParameterValue<int>(params_, "ranks", kMaxNumRanks);
   REQUIRE(num_ranks_ > 0 && num_ranks_ <= kMaxNumRanks);
   hand_size_ = ParameterValue<int>(params_, "hand_size", HandSizeFromRules());
+  REQUIRE(hand_size_ > 0 && hand_size_ <= kMaxHandSize);
   max_information_tokens_ = ParameterValue<int>(
       params_, "max_information_tokens", kInformationTokens);
   max_life_tokens_ =
@@ -123,6 +126,23 @@ std::unordered_map<std::string, std::string> HanabiGame::Parameters() const {
           {"observation_type", std::to_string(observation_type_)}};
 }
 
+std::string HanabiGame::RngState() const {
+  std::ostringstream rng_state;
+  rng_state << rng_;
+  return rng_state.str();
+}
+
+bool HanabiGame::SetRngState(const std::string& rng_state) {
+  std::istringstream stream(rng_state);
+  std::mt19937 rng;
+  stream >> rng;
+  if (stream.fail()) {
+    return false;
+  }
+  rng_ = rng;
+  return true;
+}
+
 int HanabiGame::NumberCardInstances(int color, int rank) const {
   if (color < 0 || color >= NumColors() || rank < 0 || rank >= NumRanks()) {
     return 0;
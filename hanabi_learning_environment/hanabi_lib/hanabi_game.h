@@ -47,6 +47,7 @@ class HanabiGame {
   // "ranks": The number of ranks. (default 5)
   //     Value must be in [1, kMaxNumRanks].
   // "hand_size": The number of cards in each player's hand. (default 5 or 4)
+  //     Value must be in [1, kMaxHandSize].
   // "max_information_tokens": Maximum number of information tokens. (default 8)
   // "max_life_tokens": Maximum number of life tokens. (default 3)
   // "seed": Pseudo-random number generator seed. (default -1)
@@ -59,8 +60,9 @@ class HanabiGame {
 
   // Number of different player moves.
   int MaxMoves() const;
-  // Get a HanabiMove by unique id.
-  HanabiMove GetMove(int uid) const { return moves_[uid]; }
+  // Get a HanabiMove by unique id. The reference is valid for the lifetime of
+  // the game.
+  const HanabiMove& GetMove(int uid) const { return moves_[uid]; }
   // Get unique id for a move. Returns -1 for invalid move.
   int GetMoveUid(HanabiMove move) const;
   int GetMoveUid(HanabiMove::Type move_type, int card_index, int target_offset,
@@ -100,6 +102,15 @@ class HanabiGame {
 
   // Get the first player to act. Might be randomly generated at each call.
   int GetSampledStartPlayer() const;
+  bool RandomStartPlayer() const { return random_start_player_; }
+  // Seed of the game's random number generator (never -1).
+  int Seed() const { return seed_; }
+
+  // Position of the random number generator used for chance outcomes, as
+  // text, so that a copy of the game can continue the same random sequence.
+  std::string RngState() const;
+  // Returns false, leaving the generator unchanged, if rng_state is invalid.
+  bool SetRngState(const std::string& rng_state);
 
  private:
   // Calculating max moves by move type.
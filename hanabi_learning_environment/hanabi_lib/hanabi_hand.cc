@@ -22,23 +22,24 @@
 namespace hanabi_learning_env {
 
 HanabiHand::ValueKnowledge::ValueKnowledge(int value_range)
-    : value_(-1), value_plausible_(std::max(value_range, 0), true) {
-  assert(value_range > 0);
+    : value_(-1),
+      range_(std::max(value_range, 0)),
+      plausible_((1 << range_) - 1) {
+  assert(value_range > 0 && value_range <= 8);
 }
 
 void HanabiHand::ValueKnowledge::ApplyIsValueHint(int value) {
-  assert(value >= 0 && value < value_plausible_.size());
+  assert(value >= 0 && value < range_);
   assert(value_ < 0 || value_ == value);
-  assert(value_plausible_[value] == true);
+  assert(IsPlausible(value));
   value_ = value;
-  std::fill(value_plausible_.begin(), value_plausible_.end(), false);
-  value_plausible_[value] = true;
+  plausible_ = 1 << value;
 }
 
 void HanabiHand::ValueKnowledge::ApplyIsNotValueHint(int value) {
-  assert(value >= 0 && value < value_plausible_.size());
+  assert(value >= 0 && value < range_);
   assert(value_ < 0 || value_ != value);
-  value_plausible_[value] = false;
+  plausible_ &= ~(1 << value);
 }
 
 HanabiHand::CardKnowledge::CardKnowledge(int num_colors, int num_ranks)
@@ -80,6 +81,7 @@ HanabiHand::HanabiHand(const HanabiHand& hand, bool hide_cards,
 void HanabiHand::AddCard(HanabiCard card,
                          const CardKnowledge& initial_knowledge) {
   REQUIRE(card.IsValid());
+  REQUIRE(cards_.size() < kMaxHandSize);
   cards_.push_back(card);
   card_knowledge_.push_back(initial_knowledge);
 }
@@ -95,7 +97,6 @@ void HanabiHand::RemoveFromHand(int card_index,
 
 uint8_t HanabiHand::RevealColor(const int color) {
   uint8_t mask = 0;
-  assert(cards_.size() <= 8);  // More than 8 cards is currently not supported.
   for (int i = 0; i < cards_.size(); ++i) {
     if (cards_[i].Color() == color) {
       if (!card_knowledge_[i].ColorHinted()) {
@@ -111,7 +112,6 @@ uint8_t HanabiHand::RevealColor(const int color) {
 
 uint8_t HanabiHand::RevealRank(const int rank) {
   uint8_t mask = 0;
-  assert(cards_.size() <= 8);  // More than 8 cards is currently not supported.
   for (int i = 0; i < cards_.size(); ++i) {
     if (cards_[i].Rank() == rank) {
       if (!card_knowledge_[i].RankHinted()) {
@@ -19,7 +19,9 @@
 #include <string>
 #include <vector>
 
+#include "fixed_vector.h"
 #include "hanabi_card.h"
+#include "util.h"
 
 namespace hanabi_learning_env {
 
@@ -37,14 +39,17 @@ class HanabiHand {
     // After recording that the value is 0, we have
     // ValueHinted()=true, value()=0, and ValueCouldBe(v)=false for v=1, and 2.
    public:
+    ValueKnowledge() = default;  // Tracks a variable with no values.
     explicit ValueKnowledge(int value_range);
-    int Range() const { return value_plausible_.size(); }
+    int Range() const { return range_; }
     // Returns true if and only if the exact value was revealed.
     // Does not perform inference to get a known value from not-value hints.
     bool ValueHinted() const { return value_ >= 0; }
     int Value() const { return value_; }  // -1 if value was not hinted.
     // Returns true if we have no hint saying variable is not the given value.
-    bool IsPlausible(int value) const { return value_plausible_[value]; }
+    bool IsPlausible(int value) const { return (plausible_ >> value) & 1; }
+    // Bitmask with bit v set if and only if IsPlausible(v).
+    uint8_t PlausibleMask() const { return plausible_; }
     // Record a hint that gives the value of the variable.
     void ApplyIsValueHint(int value);
     // Record a hint that the variable does not have the given value.
@@ -52,13 +57,15 @@ class HanabiHand {
 
    private:
     // Value if hint directly provided the value, or -1 with no direct hint.
-    int value_ = -1;
-    std::vector<bool> value_plausible_;  // Knowledge from not-value hints.
+    int8_t value_ = -1;
+    int8_t range_ = 0;
+    uint8_t plausible_ = 0;  // Knowledge from not-value hints, as a bitmask.
   };
 
   class CardKnowledge {
     // Hinted knowledge about color and rank of an initially unknown card.
    public:
+    CardKnowledge() = default;  // Knowledge about no colors or ranks.
     CardKnowledge(int num_colors, int num_ranks);
     // Returns number of possible colors being tracked.
     int NumColors() const { return color_.Range(); }
@@ -69,6 +76,8 @@ class HanabiHand {
     int Color() const { return color_.Value(); }
     // Returns true if we have no hint saying card is not the given color.
     bool ColorPlausible(int color) const { return color_.IsPlausible(color); }
+    // Bitmask with bit c set if and only if ColorPlausible(c).
+    uint8_t ColorPlausibleMask() const { return color_.PlausibleMask(); }
     void ApplyIsColorHint(int color) { color_.ApplyIsValueHint(color); }
     void ApplyIsNotColorHint(int color) { color_.ApplyIsNotValueHint(color); }
     // Returns number of possible ranks being tracked.
@@ -80,6 +89,8 @@ class HanabiHand {
     int Rank() const { return rank_.Value(); }
     // Returns true if we have no hint saying card is not the given rank.
     bool RankPlausible(int rank) const { return rank_.IsPlausible(rank); }
+    // Bitmask with bit r set if and only if RankPlausible(r).
+    uint8_t RankPlausibleMask() const { return rank_.PlausibleMask(); }
     void ApplyIsRankHint(int rank) { rank_.ApplyIsValueHint(rank); }
     void ApplyIsNotRankHint(int rank) { rank_.ApplyIsNotValueHint(rank); }
     std::string ToString() const;
@@ -89,19 +100,25 @@ class HanabiHand {
     ValueKnowledge rank_;
   };
 
+  // Cards and knowledge are held inline, in at most kMaxHandSize slots, so
+  // copying a hand does not allocate.
+  typedef FixedVector<HanabiCard, kMaxHandSize> CardVector;
+  typedef FixedVector<CardKnowledge, kMaxHandSize> KnowledgeVector;
+
   HanabiHand() {}
-  HanabiHand(const HanabiHand& hand)
-      : cards_(hand.cards_), card_knowledge_(hand.card_knowledge_) {}
+  HanabiHand(const HanabiHand& hand) = default;
   // Copy hand. Hide cards (set to invalid) if hide_cards is true.
   // Hide card knowledge (set to unknown) if hide_knowledge is true.
   HanabiHand(const HanabiHand& hand, bool hide_cards, bool hide_knowledge);
   // Cards and corresponding card knowledge are always arranged from oldest to
   // newest, with the oldest card or knowledge at index 0.
-  const std::vector<HanabiCard>& Cards() const { return cards_; }
-  const std::vector<CardKnowledge>& Knowledge() const {
-    return card_knowledge_;
-  }
+  const CardVector& Cards() const { return cards_; }
+  const KnowledgeVector& Knowledge() const { return card_knowledge_; }
   void AddCard(HanabiCard card, const CardKnowledge& initial_knowledge);
+  // Replace the card_index card with card, keeping the knowledge about it.
+  void ReplaceCard(int card_index, HanabiCard card) {
+    cards_[card_index] = card;
+  }
   // Remove card_index card from hand. Put in discard_pile if not nullptr
   // (pushes the card to the back of the discard_pile vector).
   void RemoveFromHand(int card_index, std::vector<HanabiCard>* discard_pile);
@@ -117,8 +134,8 @@ class HanabiHand {
 
  private:
   // A set of cards and knowledge about them.
-  std::vector<HanabiCard> cards_;
-  std::vector<CardKnowledge> card_knowledge_;
+  CardVector cards_;
+  KnowledgeVector card_knowledge_;
 };
 
 }  // namespace hanabi_learning_env
@@ -14,6 +14,7 @@
 
 #include "hanabi_history_item.h"
 
+#include <algorithm>
 #include <cassert>
 
 #include "util.h"
@@ -55,6 +56,51 @@ std::string HanabiHistoryItem::ToString() const {
   return str;
 }
 
+HanabiMoveHistory::Node::Node(const HanabiHistoryItem& node_item,
+                              std::shared_ptr<const Node> tail)
+    : item(node_item),
+      prev(std::move(tail)),
+      size(prev == nullptr ? 1 : prev->size + 1) {
+  if (prev != nullptr && prev->first_player_move_index < prev->size) {
+    first_player_move_index = prev->first_player_move_index;
+  } else {
+    first_player_move_index = item.player < 0 ? size : size - 1;
+  }
+}
+
+const HanabiHistoryItem& HanabiMoveHistory::Back() const {
+  REQUIRE(head_ != nullptr);
+  return head_->item;
+}
+
+const HanabiHistoryItem& HanabiMoveHistory::At(int index) const {
+  REQUIRE(index >= 0 && index < Size());
+  const Node* node = head_.get();
+  while (node->size - 1 > index) {
+    node = node->prev.get();
+  }
+  return node->item;
+}
+
+void HanabiMoveHistory::PushBack(const HanabiHistoryItem& item) {
+  head_ = std::make_shared<const Node>(item, std::move(head_));
+}
+
+void HanabiMoveHistory::PopBack() {
+  REQUIRE(head_ != nullptr);
+  head_ = head_->prev;
+}
+
+std::vector<HanabiHistoryItem> HanabiMoveHistory::ToVector() const {
+  std::vector<HanabiHistoryItem> items;
+  items.reserve(Size());
+  for (auto it = rbegin(); it != rend(); ++it) {
+    items.push_back(*it);
+  }
+  std::reverse(items.begin(), items.end());
+  return items;
+}
+
 void ChangeToObserverRelative(int observer_pid, int player_count,
                               HanabiHistoryItem* item) {
   if (item->move.MoveType() == HanabiMove::kDeal) {
@@ -16,7 +16,9 @@
 #define __HANABI_HISTORY_ITEM_H__
 
 #include <cstdint>
+#include <memory>
 #include <string>
+#include <vector>
 
 #include "hanabi_move.h"
 
@@ -56,6 +58,71 @@ struct HanabiHistoryItem {
   int8_t deal_to_player = -1;
 };
 
+// The moves made within a game, oldest first. Items are kept in a persistent
+// linked list whose nodes are shared between copies, so copying a history
+// takes constant time however long the game, and adding or removing moves in
+// one copy never affects another.
+class HanabiMoveHistory {
+ private:
+  struct Node;
+
+ public:
+  // Iterates over the items from the most recent to the oldest.
+  class ReverseIterator {
+   public:
+    const HanabiHistoryItem& operator*() const { return node_->item; }
+    const HanabiHistoryItem* operator->() const { return &node_->item; }
+    ReverseIterator& operator++() {
+      node_ = node_->prev.get();
+      return *this;
+    }
+    bool operator==(const ReverseIterator& other) const {
+      return node_ == other.node_;
+    }
+    bool operator!=(const ReverseIterator& other) const {
+      return node_ != other.node_;
+    }
+    // Index of the item in the history, with the oldest item at index 0.
+    int Index() const { return node_->size - 1; }
+
+   private:
+    friend class HanabiMoveHistory;
+    explicit ReverseIterator(const Node* node) : node_(node) {}
+    const Node* node_;
+  };
+
+  int Size() const { return head_ == nullptr ? 0 : head_->size; }
+  bool Empty() const { return head_ == nullptr; }
+  // The most recent item. History must not be empty.
+  const HanabiHistoryItem& Back() const;
+  // Index of the first move made by a player rather than by chance, or
+  // Size() if players have not moved yet.
+  int FirstPlayerMoveIndex() const {
+    return head_ == nullptr ? 0 : head_->first_player_move_index;
+  }
+  // Returns the item at index, with the oldest item at index 0. Takes
+  // O(Size() - index) time.
+  const HanabiHistoryItem& At(int index) const;
+  void PushBack(const HanabiHistoryItem& item);
+  void PopBack();
+  // Returns a copy of all items, oldest first.
+  std::vector<HanabiHistoryItem> ToVector() const;
+
+  ReverseIterator rbegin() const { return ReverseIterator(head_.get()); }
+  ReverseIterator rend() const { return ReverseIterator(nullptr); }
+
+ private:
+  struct Node {
+    Node(const HanabiHistoryItem& node_item, std::shared_ptr<const Node> tail);
+    HanabiHistoryItem item;
+    std::shared_ptr<const Node> prev;  // nullptr for the oldest item.
+    int size;                          // Number of items up to this one.
+    int first_player_move_index;       // FirstPlayerMoveIndex() up to here.
+  };
+
+  std::shared_ptr<const Node> head_;
+};
+
 }  // namespace hanabi_learning_env
 
 #endif
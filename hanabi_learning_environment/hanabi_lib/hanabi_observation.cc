@@ -74,13 +74,12 @@ HanabiObservation::HanabiObservation(const HanabiState& state,
                                 false, hide_knowledge));
   }
 
-  const auto& history = state.MoveHistory();
-  auto start = std::find_if(history.begin(), history.end(),
-                            [](const HanabiHistoryItem& item) {
-                              return item.player != kChancePlayerId;
-                            });
-  std::reverse_iterator<decltype(start)> rend(start);
-  for (auto it = history.rbegin(); it != rend; ++it) {
+  // Moves since the observing player last acted, back to (but not including)
+  // the initial deal.
+  const HanabiMoveHistory& history = state.MoveHistory();
+  int start = history.FirstPlayerMoveIndex();
+  for (auto it = history.rbegin(); it != history.rend() && it.Index() >= start;
+       ++it) {
     last_moves_.push_back(*it);
     ChangeHistoryItemToObserverRelative(observing_player,
                                         state.ParentGame()->NumPlayers(),
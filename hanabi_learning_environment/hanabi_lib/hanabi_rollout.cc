@@ -0,0 +1,135 @@
+// Copyright 2018 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//    https://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+#include "hanabi_rollout.h"
+
+#include <vector>
+
+#include "util.h"
+
+namespace hanabi_learning_env {
+
+HanabiMove RandomRolloutPolicy::Act(const HanabiState& state,
+                                    CounterRng* rng) {
+  const std::vector<HanabiMove>& moves = state.LegalMoves(state.CurPlayer());
+  REQUIRE(!moves.empty());
+  return moves[rng->UniformInt(moves.size())];
+}
+
+HanabiMove SimpleRolloutPolicy::Act(const HanabiState& state,
+                                    CounterRng* /*rng*/) {
+  const HanabiGame& game = *state.ParentGame();
+  int player = state.CurPlayer();
+  const std::vector<HanabiHand>& hands = state.Hands();
+  // As in HanabiObservation, players do not see hints in minimal games.
+  const bool hide_knowledge = game.ObservationType() == HanabiGame::kMinimal;
+
+  // Play a card which was hinted at.
+  const HanabiHand::KnowledgeVector& knowledge = hands[player].Knowledge();
+  for (int card_index = 0; card_index < knowledge.size(); ++card_index) {
+    if (!hide_knowledge && (knowledge[card_index].ColorHinted() ||
+                            knowledge[card_index].RankHinted())) {
+      return HanabiMove(HanabiMove::kPlay, card_index, -1, -1, -1);
+    }
+  }
+
+  // Reveal the color of a playable card of another player.
+  if (state.InformationTokens() > 0) {
+    for (int offset = 1; offset < game.NumPlayers(); ++offset) {
+      const HanabiHand& hand = hands[(player + offset) % game.NumPlayers()];
+      for (int i = 0; i < hand.Cards().size(); ++i) {
+        const HanabiCard& card = hand.Cards()[i];
+        if (card.Rank() == state.Fireworks()[card.Color()] &&
+            (hide_knowledge || !hand.Knowledge()[i].ColorHinted())) {
+          return HanabiMove(HanabiMove::kRevealColor, -1, offset,
+                            card.Color(), -1);
+        }
+      }
+    }
+  }
+
+  if (state.InformationTokens() < game.MaxInformationTokens()) {
+    return HanabiMove(HanabiMove::kDiscard, 0, -1, -1, -1);
+  }
+  return HanabiMove(HanabiMove::kPlay, 0, -1, -1, -1);
+}
+
+std::unique_ptr<RolloutPolicy> MakeRolloutPolicy(int type) {
+  switch (type) {
+    case RolloutPolicy::kRandom:
+      return std::unique_ptr<RolloutPolicy>(new RandomRolloutPolicy());
+    case RolloutPolicy::kSimple:
+      return std::unique_ptr<RolloutPolicy>(new SimpleRolloutPolicy());
+    default:
+      return nullptr;
+  }
+}
+
+CounterRng PolicyRng(const HanabiGame& parent_game, uint64_t stream) {
+  // The key differs from the game seed, which states deal from.
+  return CounterRng(~static_cast<uint64_t>(parent_game.Seed()), stream);
+}
+
+int MaxGameLength(const HanabiGame& parent_game) {
+  return 2 * parent_game.MaxDeckSize() + parent_game.NumColors() +
+         parent_game.MaxInformationTokens();
+}
+
+RolloutResult Rollout(HanabiState* state, RolloutPolicy* policy,
+                      CounterRng* rng, uint8_t* trace, int trace_length) {
+  REQUIRE(state != nullptr);
+  REQUIRE(policy != nullptr);
+  const HanabiGame& game = *state->ParentGame();
+  RolloutResult result;
+  while (!state->IsTerminal()) {
+    if (state->CurPlayer() == kChancePlayerId) {
+      state->ApplyRandomChance();
+      continue;
+    }
+    HanabiMove move = policy->Act(*state, rng);
+    if (trace != nullptr && result.length < trace_length) {
+      trace[result.length] = game.GetMoveUid(move);
+    }
+    state->ApplyMove(move);
+    ++result.length;
+  }
+  result.score = state->Score();
+  return result;
+}
+
+void PlayRollouts(const HanabiGame* parent_game, RolloutPolicy* policy,
+                  uint64_t first_episode, int num_games, int32_t* scores,
+                  int32_t* lengths, uint8_t* traces, int trace_length) {
+  REQUIRE(parent_game != nullptr);
+  REQUIRE(num_games >= 0);
+  REQUIRE(traces == nullptr || trace_length >= 0);
+  for (int i = 0; i < num_games; ++i) {
+    uint64_t episode = first_episode + i;
+    HanabiState state(parent_game, -1, episode);
+    CounterRng rng = PolicyRng(*parent_game, episode);
+    RolloutResult result = Rollout(
+        &state, policy, &rng,
+        traces == nullptr ? nullptr
+                          : traces + static_cast<size_t>(i) * trace_length,
+        trace_length);
+    if (scores != nullptr) {
+      scores[i] = result.score;
+    }
+    if (lengths != nullptr) {
+      lengths[i] = result.length;
+    }
+  }
+}
+
+}  // namespace hanabi_learning_env
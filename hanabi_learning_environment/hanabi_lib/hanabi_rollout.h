@@ -0,0 +1,104 @@
+// Copyright 2018 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//    https://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+// Native rollouts: complete games played by a policy without leaving the
+// library, e.g. to evaluate baseline agents, or as the rollout policy of a
+// search.
+
+#ifndef __HANABI_ROLLOUT_H__
+#define __HANABI_ROLLOUT_H__
+
+#include <cstdint>
+#include <memory>
+
+#include "counter_rng.h"
+#include "hanabi_game.h"
+#include "hanabi_move.h"
+#include "hanabi_state.h"
+
+namespace hanabi_learning_env {
+
+// Chooses the moves of every player in a rollout.
+class RolloutPolicy {
+ public:
+  // Built-in policies, see MakeRolloutPolicy.
+  enum Type { kRandom = 0, kSimple = 1 };
+  virtual ~RolloutPolicy() = default;
+
+  // Returns a legal move for state.CurPlayer(), which is not chance. Policies
+  // which stand in for agents must only use what that player observes (see
+  // HanabiObservation). Random choices must be drawn from rng, so that
+  // rollouts are reproducible.
+  virtual HanabiMove Act(const HanabiState& state, CounterRng* rng) = 0;
+};
+
+// Plays a uniformly random legal move.
+class RandomRolloutPolicy : public RolloutPolicy {
+ public:
+  HanabiMove Act(const HanabiState& state, CounterRng* rng) override;
+};
+
+// The rules of the Python SimpleAgent: play a card if anything about it was
+// revealed, else reveal the color of another player's playable card whose
+// color is not yet known, else discard the oldest card, or play it if
+// information tokens are full.
+class SimpleRolloutPolicy : public RolloutPolicy {
+ public:
+  HanabiMove Act(const HanabiState& state, CounterRng* rng) override;
+};
+
+// Returns a new built-in policy of type, or nullptr if type is unknown.
+std::unique_ptr<RolloutPolicy> MakeRolloutPolicy(int type);
+
+// Returns random stream stream for the policies of parent_game's rollouts.
+// It is independent of the stream of the same number which states deal from.
+CounterRng PolicyRng(const HanabiGame& parent_game, uint64_t stream);
+
+// An upper bound on the number of player moves in a game of parent_game.
+// Every play or discard uses up a card, and every reveal an information token,
+// of which at most one is regained per discard and completed firework.
+int MaxGameLength(const HanabiGame& parent_game);
+
+struct RolloutResult {
+  int score = 0;
+  // Number of player (not chance) moves.
+  int length = 0;
+};
+
+// Plays state to the end, dealing chance outcomes as the state does (see
+// HanabiState::ApplyRandomChance) and all player moves with policy. If trace
+// is not nullptr, the uids of the first trace_length player moves are
+// written to it.
+RolloutResult Rollout(HanabiState* state, RolloutPolicy* policy,
+                      CounterRng* rng, uint8_t* trace = nullptr,
+                      int trace_length = 0);
+
+// Plays num_games complete games of parent_game. Game i is episode
+// first_episode + i: it deals from that random stream of the game seed (see
+// HanabiState), and policy draws from PolicyRng() stream first_episode + i,
+// so the results do not depend on num_games or other users of parent_game.
+//
+// Output buffers are caller-owned, hold one row per game, and may be nullptr:
+//   scores: num_games final scores.
+//   lengths: num_games numbers of player moves.
+//   traces: num_games x trace_length move uids. A row holds the first
+//     trace_length moves of its game, and entries past its length are left
+//     unchanged. MaxGameLength() is always enough.
+void PlayRollouts(const HanabiGame* parent_game, RolloutPolicy* policy,
+                  uint64_t first_episode, int num_games, int32_t* scores,
+                  int32_t* lengths, uint8_t* traces, int trace_length);
+
+}  // namespace hanabi_learning_env
+
+#endif
@@ -16,7 +16,9 @@
 
 #include <algorithm>
 #include <cassert>
+#include <cstdint>
 #include <numeric>
+#include <string>
 
 #include "util.h"
 
@@ -48,21 +50,113 @@ uint8_t HandRankBitmask(const HanabiHand& hand, int rank) {
   }
   return mask;
 }
+
+// Version of the Serialize() format, stored as its first byte.
+constexpr int kSerializationVersion = 2;
+
+// Appends small integers to a byte string.
+class ByteWriter {
+ public:
+  explicit ByteWriter(std::string* out) : out_(out) {}
+  // Values in [-128, 255].
+  void Byte(int value) { out_->push_back(static_cast<char>(value)); }
+  // Values in [0, 65535].
+  void Uint16(int value) {
+    Byte(value & 0xff);
+    Byte((value >> 8) & 0xff);
+  }
+  void Uint64(uint64_t value) {
+    for (int i = 0; i < 8; ++i) {
+      Byte((value >> (8 * i)) & 0xff);
+    }
+  }
+
+ private:
+  std::string* out_;
+};
+
+// Reads integers written by ByteWriter. Reads past the end of data return 0,
+// and make Ok() false.
+class ByteReader {
+ public:
+  explicit ByteReader(const std::string& data) : data_(data) {}
+  int Int8() { return static_cast<int8_t>(Next()); }
+  int Uint8() { return Next(); }
+  int Uint16() {
+    int low = Next();
+    return low | (Next() << 8);
+  }
+  uint64_t Uint64() {
+    uint64_t value = 0;
+    for (int i = 0; i < 8; ++i) {
+      value |= static_cast<uint64_t>(Next()) << (8 * i);
+    }
+    return value;
+  }
+  bool AtEnd() const { return pos_ == data_.size(); }
+  bool Ok() const { return ok_; }
+
+ private:
+  uint8_t Next() {
+    if (pos_ >= data_.size()) {
+      ok_ = false;
+      return 0;
+    }
+    return static_cast<uint8_t>(data_[pos_++]);
+  }
+
+  const std::string& data_;
+  int pos_ = 0;
+  bool ok_ = true;
+};
+
+bool InRange(int value, int begin, int end) {
+  return value >= begin && value < end;
+}
 }  // namespace
 
 HanabiState::HanabiDeck::HanabiDeck(const HanabiGame& game)
     : card_count_(game.NumColors() * game.NumRanks(), 0),
+      count_tree_(card_count_.size() + 1, 0),
       total_count_(0),
       num_ranks_(game.NumRanks()) {
+  int num_cards = card_count_.size();
+  for (tree_top_bit_ = 1; 2 * tree_top_bit_ <= num_cards;) {
+    tree_top_bit_ *= 2;
+  }
   for (int color = 0; color < game.NumColors(); ++color) {
     for (int rank = 0; rank < game.NumRanks(); ++rank) {
-      auto count = game.NumberCardInstances(color, rank);
-      card_count_[CardToIndex(color, rank)] = count;
-      total_count_ += count;
+      UpdateCount(CardToIndex(color, rank),
+                  game.NumberCardInstances(color, rank));
     }
   }
 }
 
+void HanabiState::HanabiDeck::UpdateCount(int index, int delta) {
+  card_count_[index] += delta;
+  total_count_ += delta;
+  int tree_size = count_tree_.size();
+  for (int i = index + 1; i < tree_size; i += i & -i) {
+    count_tree_[i] += delta;
+  }
+}
+
+HanabiCard HanabiState::HanabiDeck::CardAt(int position) const {
+  assert(position >= 0 && position < total_count_);
+  // Descend the tree to the largest index with
+  // sum(card_count_[0, index)) <= position, the card covering position.
+  int tree_size = count_tree_.size();
+  int index = 0;
+  for (int bit = tree_top_bit_; bit > 0; bit >>= 1) {
+    if (index + bit < tree_size && count_tree_[index + bit] <= position) {
+      index += bit;
+      position -= count_tree_[index];
+    }
+  }
+  assert(card_count_[index] > position);
+  return HanabiCard(IndexToColor(index), IndexToRank(index));
+}
+
 HanabiCard HanabiState::HanabiDeck::DealCard(std::mt19937* rng) {
   if (Empty()) {
     return HanabiCard();
@@ -71,8 +165,7 @@ HanabiCard HanabiState::HanabiDeck::DealCard(std::mt19937* rng) {
       card_count_.begin(), card_count_.end());
   int index = dist(*rng);
   assert(card_count_[index] > 0);
-  --card_count_[index];
-  --total_count_;
+  UpdateCount(index, -1);
   return HanabiCard(IndexToColor(index), IndexToRank(index));
 }
 
@@ -81,12 +174,14 @@ HanabiCard HanabiState::HanabiDeck::DealCard(int color, int rank) {
   if (card_count_[index] <= 0) {
     return HanabiCard();
   }
-  assert(card_count_[index] > 0);
-  --card_count_[index];
-  --total_count_;
+  UpdateCount(index, -1);
   return HanabiCard(IndexToColor(index), IndexToRank(index));
 }
 
+void HanabiState::HanabiDeck::ReturnCard(int color, int rank) {
+  UpdateCount(CardToIndex(color, rank), 1);
+}
+
 HanabiState::HanabiState(const HanabiGame* parent_game, int start_player)
     : parent_game_(parent_game),
       deck_(*parent_game),
@@ -101,6 +196,76 @@ HanabiState::HanabiState(const HanabiGame* parent_game, int start_player)
       fireworks_(parent_game->NumColors(), 0),
       turns_to_play_(parent_game->NumPlayers()) {}
 
+HanabiState::HanabiState(const HanabiGame* parent_game, int start_player,
+                         uint64_t rng_stream)
+    : HanabiState(parent_game, 0) {
+  SetRngStream(rng_stream);
+  if (start_player >= 0 && start_player < parent_game->NumPlayers()) {
+    next_non_chance_player_ = start_player;
+  } else if (parent_game->RandomStartPlayer()) {
+    next_non_chance_player_ = rng_.UniformInt(parent_game->NumPlayers());
+  }
+}
+
+void HanabiState::SetRngStream(uint64_t rng_stream) {
+  has_rng_stream_ = true;
+  rng_ = CounterRng(static_cast<uint64_t>(ParentGame()->Seed()), rng_stream);
+}
+
+bool HanabiState::SetHandCards(int player,
+                               const std::vector<HanabiCard>& cards) {
+  REQUIRE(player >= 0 && player < hands_.size());
+  HanabiHand& hand = hands_[player];
+  REQUIRE(cards.size() == hand.Cards().size());
+  HanabiDeck deck = deck_;
+  for (const HanabiCard& card : hand.Cards()) {
+    deck.ReturnCard(card.Color(), card.Rank());
+  }
+  for (const HanabiCard& card : cards) {
+    if (!card.IsValid() || card.Color() >= ParentGame()->NumColors() ||
+        card.Rank() >= ParentGame()->NumRanks() ||
+        !deck.DealCard(card.Color(), card.Rank()).IsValid()) {
+      return false;
+    }
+  }
+  deck_ = deck;
+  for (int i = 0; i < cards.size(); ++i) {
+    hand.ReplaceCard(i, cards[i]);
+  }
+
+  // Rewrite the deals of the replaced cards, so the history does not reveal
+  // them. Replay player's hand as the history indices of its deals.
+  std::vector<HanabiHistoryItem> history = move_history_.ToVector();
+  std::vector<int> deals;
+  for (int i = 0; i < history.size(); ++i) {
+    const HanabiMove& move = history[i].move;
+    if (move.MoveType() == HanabiMove::kDeal) {
+      if (history[i].deal_to_player == player) {
+        deals.push_back(i);
+      }
+    } else if (history[i].player == player &&
+               (move.MoveType() == HanabiMove::kPlay ||
+                move.MoveType() == HanabiMove::kDiscard)) {
+      deals.erase(deals.begin() + move.CardIndex());
+    }
+  }
+  REQUIRE(deals.size() == cards.size());
+  for (int i = 0; i < cards.size(); ++i) {
+    const HanabiMove& deal = history[deals[i]].move;
+    history[deals[i]].move =
+        HanabiMove(HanabiMove::kDeal, deal.CardIndex(), deal.TargetOffset(),
+                   cards[i].Color(), cards[i].Rank());
+  }
+  move_history_ = HanabiMoveHistory();
+  for (const HanabiHistoryItem& item : history) {
+    move_history_.PushBack(item);
+  }
+  undo_stack_ = UndoStack();
+  // Reveal moves depend on the target's cards.
+  UpdateLegalMoves();
+  return true;
+}
+
 void HanabiState::AdvanceToNextPlayer() {
   if (!deck_.Empty() && PlayerToDeal() >= 0) {
     cur_player_ = kChancePlayerId;
@@ -108,6 +273,57 @@ void HanabiState::AdvanceToNextPlayer() {
     cur_player_ = next_non_chance_player_;
     next_non_chance_player_ = (cur_player_ + 1) % hands_.size();
   }
+  UpdateLegalMoves();
+}
+
+// Generates the moves that MoveIsLegal accepts for the current player
+// directly, in uid order, rather than testing every uid in the game.
+void HanabiState::UpdateLegalMoves() {
+  legal_moves_.clear();
+  if (cur_player_ == kChancePlayerId) {
+    return;
+  }
+  const HanabiGame* game = ParentGame();
+  int num_cards = hands_[cur_player_].Cards().size();
+
+  if (InformationTokens() < game->MaxInformationTokens()) {
+    for (int i = 0; i < num_cards; ++i) {
+      legal_moves_.push_back(
+          game->GetMove(game->GetMoveUid(HanabiMove::kDiscard, i, -1, -1, -1)));
+    }
+  }
+  for (int i = 0; i < num_cards; ++i) {
+    legal_moves_.push_back(
+        game->GetMove(game->GetMoveUid(HanabiMove::kPlay, i, -1, -1, -1)));
+  }
+  if (InformationTokens() <= 0) {
+    return;
+  }
+  int num_players = game->NumPlayers();
+  for (int offset = 1; offset < num_players; ++offset) {
+    const auto& cards = HandByOffset(offset)->Cards();
+    for (int color = 0; color < game->NumColors(); ++color) {
+      if (std::any_of(cards.begin(), cards.end(),
+                      [color](const HanabiCard& card) {
+                        return card.Color() == color;
+                      })) {
+        legal_moves_.push_back(game->GetMove(game->GetMoveUid(
+            HanabiMove::kRevealColor, -1, offset, color, -1)));
+      }
+    }
+  }
+  for (int offset = 1; offset < num_players; ++offset) {
+    const auto& cards = HandByOffset(offset)->Cards();
+    for (int rank = 0; rank < game->NumRanks(); ++rank) {
+      if (std::any_of(cards.begin(), cards.end(),
+                      [rank](const HanabiCard& card) {
+                        return card.Rank() == rank;
+                      })) {
+        legal_moves_.push_back(game->GetMove(game->GetMoveUid(
+            HanabiMove::kRevealRank, -1, offset, -1, rank)));
+      }
+    }
+  }
 }
 
 bool HanabiState::IncrementInformationTokens() {
@@ -177,12 +393,14 @@ bool HanabiState::MoveIsLegal(HanabiMove move) const {
       if (InformationTokens() >= ParentGame()->MaxInformationTokens()) {
         return false;
       }
-      if (move.CardIndex() >= hands_[cur_player_].Cards().size()) {
+      if (move.CardIndex() < 0 ||
+          move.CardIndex() >= hands_[cur_player_].Cards().size()) {
         return false;
       }
       break;
     case HanabiMove::kPlay:
-      if (move.CardIndex() >= hands_[cur_player_].Cards().size()) {
+      if (move.CardIndex() < 0 ||
+          move.CardIndex() >= hands_[cur_player_].Cards().size()) {
         return false;
       }
       break;
@@ -220,6 +438,24 @@ bool HanabiState::MoveIsLegal(HanabiMove move) const {
 
 void HanabiState::ApplyMove(HanabiMove move) {
   REQUIRE(MoveIsLegal(move));
+  UndoRecord undo;
+  undo.cur_player = cur_player_;
+  undo.next_non_chance_player = next_non_chance_player_;
+  undo.information_tokens = information_tokens_;
+  undo.life_tokens = life_tokens_;
+  undo.turns_to_play = turns_to_play_;
+  undo.discard_pile_size = discard_pile_.size();
+  undo.rng_counter = rng_.Counter();
+  if (move.MoveType() == HanabiMove::kRevealColor ||
+      move.MoveType() == HanabiMove::kRevealRank) {
+    undo.hand_player = (cur_player_ + move.TargetOffset()) % hands_.size();
+  } else if (move.MoveType() != HanabiMove::kDeal) {
+    undo.hand_player = cur_player_;
+  }
+  if (undo.hand_player >= 0) {
+    undo.hand = hands_[undo.hand_player];
+  }
+
   if (deck_.Empty()) {
     --turns_to_play_;
   }
@@ -270,37 +506,294 @@ void HanabiState::ApplyMove(HanabiMove move) {
     default:
       std::abort();  // Should not be possible.
   }
-  move_history_.push_back(history);
+  if (move.MoveType() == HanabiMove::kDeal) {
+    undo.deal_to_player = history.deal_to_player;
+  } else if (move.MoveType() == HanabiMove::kPlay && history.scored) {
+    undo.firework_color = history.color;
+  }
+  undo_stack_.Push(std::move(undo));
+  move_history_.PushBack(history);
   AdvanceToNextPlayer();
 }
 
+void HanabiState::UndoMove() {
+  REQUIRE(!undo_stack_.Empty());
+  const UndoRecord& undo = undo_stack_.Back();
+  if (undo.deal_to_player >= 0) {
+    HanabiHand& hand = hands_[undo.deal_to_player];
+    const HanabiCard& card = hand.Cards().back();
+    deck_.ReturnCard(card.Color(), card.Rank());
+    hand.RemoveFromHand(hand.Cards().size() - 1, nullptr);
+  }
+  if (undo.hand_player >= 0) {
+    hands_[undo.hand_player] = undo.hand;
+  }
+  if (undo.firework_color >= 0) {
+    --fireworks_[undo.firework_color];
+  }
+  discard_pile_.erase(discard_pile_.begin() + undo.discard_pile_size,
+                      discard_pile_.end());
+  cur_player_ = undo.cur_player;
+  next_non_chance_player_ = undo.next_non_chance_player;
+  information_tokens_ = undo.information_tokens;
+  life_tokens_ = undo.life_tokens;
+  turns_to_play_ = undo.turns_to_play;
+  rng_.SetCounter(undo.rng_counter);
+  move_history_.PopBack();
+  undo_stack_.Pop();
+  UpdateLegalMoves();
+}
+
 double HanabiState::ChanceOutcomeProb(HanabiMove move) const {
   return static_cast<double>(deck_.CardCount(move.Color(), move.Rank())) /
          static_cast<double>(deck_.Size());
 }
 
 void HanabiState::ApplyRandomChance() {
-  auto chance_outcomes = ChanceOutcomes();
-  REQUIRE(!chance_outcomes.second.empty());
-  ApplyMove(ParentGame()->PickRandomChance(chance_outcomes));
+  REQUIRE(cur_player_ == kChancePlayerId && !deck_.Empty());
+  if (!has_rng_stream_) {
+    // Keep the original draw from the game's shared generator, so that
+    // existing seeds still deal the same cards.
+    ApplyMove(ParentGame()->PickRandomChance(ChanceOutcomes()));
+    return;
+  }
+  // Pick each remaining card in the deck with equal probability.
+  HanabiCard card = deck_.CardAt(rng_.UniformInt(deck_.Size()));
+  ApplyMove(ParentGame()->GetChanceOutcome(
+      card.Color() * ParentGame()->NumRanks() + card.Rank()));
 }
 
-std::vector<HanabiMove> HanabiState::LegalMoves(int player) const {
-  std::vector<HanabiMove> movelist;
+void HanabiState::ResolveChance() {
+  while (cur_player_ == kChancePlayerId) {
+    ApplyRandomChance();
+  }
+}
+
+const std::vector<HanabiMove>& HanabiState::LegalMoves(int player) const {
+  static const std::vector<HanabiMove>* const kNoMoves =
+      new std::vector<HanabiMove>();
   // kChancePlayer=-1 must be handled by ChanceOutcome.
   REQUIRE(player >= 0 && player < ParentGame()->NumPlayers());
   if (player != cur_player_) {
     // Turn-based game. Empty move list for other players.
-    return movelist;
+    return *kNoMoves;
   }
-  int max_move_uid = ParentGame()->MaxMoves();
-  for (int uid = 0; uid < max_move_uid; ++uid) {
-    HanabiMove move = ParentGame()->GetMove(uid);
-    if (MoveIsLegal(move)) {
-      movelist.push_back(move);
+  return legal_moves_;
+}
+
+std::string HanabiState::Serialize() const {
+  const HanabiGame& game = *ParentGame();
+  std::string data;
+  ByteWriter writer(&data);
+  writer.Byte(kSerializationVersion);
+  writer.Byte(game.NumPlayers());
+  writer.Byte(game.NumColors());
+  writer.Byte(game.NumRanks());
+  writer.Byte(game.HandSize());
+
+  writer.Byte(cur_player_);
+  writer.Byte(next_non_chance_player_);
+  writer.Byte(information_tokens_);
+  writer.Byte(life_tokens_);
+  writer.Byte(turns_to_play_);
+  for (int firework : fireworks_) {
+    writer.Byte(firework);
+  }
+
+  // The deck is not written, as it holds exactly the cards which are not in
+  // hands, on the discard pile or on the fireworks.
+  for (const HanabiHand& hand : hands_) {
+    writer.Byte(hand.Cards().size());
+    for (int i = 0; i < hand.Cards().size(); ++i) {
+      const HanabiCard& card = hand.Cards()[i];
+      const HanabiHand::CardKnowledge& knowledge = hand.Knowledge()[i];
+      writer.Byte(card.Color());
+      writer.Byte(card.Rank());
+      writer.Byte(knowledge.Color());
+      writer.Byte(knowledge.Rank());
+      writer.Byte(knowledge.ColorPlausibleMask());
+      writer.Byte(knowledge.RankPlausibleMask());
+    }
+  }
+
+  writer.Uint16(discard_pile_.size());
+  for (const HanabiCard& card : discard_pile_) {
+    writer.Byte(card.Color());
+    writer.Byte(card.Rank());
+  }
+
+  writer.Uint16(move_history_.Size());
+  for (const HanabiHistoryItem& item : move_history_.ToVector()) {
+    writer.Byte(item.move.MoveType());
+    writer.Byte(item.move.CardIndex());
+    writer.Byte(item.move.TargetOffset());
+    writer.Byte(item.move.Color());
+    writer.Byte(item.move.Rank());
+    writer.Byte(item.player);
+    writer.Byte(item.scored);
+    writer.Byte(item.information_token);
+    writer.Byte(item.color);
+    writer.Byte(item.rank);
+    writer.Byte(item.reveal_bitmask);
+    writer.Byte(item.newly_revealed_bitmask);
+    writer.Byte(item.deal_to_player);
+  }
+
+  writer.Byte(has_rng_stream_);
+  if (has_rng_stream_) {
+    writer.Uint64(rng_.Key());
+    writer.Uint64(rng_.Stream());
+    writer.Uint64(rng_.Counter());
+  }
+  return data;
+}
+
+bool HanabiState::Deserialize(const HanabiGame* parent_game,
+                              const std::string& data, HanabiState* state) {
+  REQUIRE(parent_game != nullptr);
+  REQUIRE(state != nullptr);
+  const HanabiGame& game = *parent_game;
+  int num_players = game.NumPlayers();
+  int num_colors = game.NumColors();
+  int num_ranks = game.NumRanks();
+  ByteReader reader(data);
+  if (reader.Int8() != kSerializationVersion ||
+      reader.Int8() != num_players || reader.Int8() != num_colors ||
+      reader.Int8() != num_ranks || reader.Int8() != game.HandSize()) {
+    return false;
+  }
+
+  // Passing a start player avoids sampling one from the game's generator.
+  HanabiState result(parent_game, 0);
+  result.cur_player_ = reader.Int8();
+  result.next_non_chance_player_ = reader.Int8();
+  result.information_tokens_ = reader.Int8();
+  result.life_tokens_ = reader.Int8();
+  result.turns_to_play_ = reader.Int8();
+  if (!InRange(result.cur_player_, kChancePlayerId, num_players) ||
+      !InRange(result.next_non_chance_player_, 0, num_players) ||
+      !InRange(result.information_tokens_, 0,
+               game.MaxInformationTokens() + 1) ||
+      !InRange(result.life_tokens_, 0, game.MaxLifeTokens() + 1)) {
+    return false;
+  }
+  for (int color = 0; color < num_colors; ++color) {
+    result.fireworks_[color] = reader.Int8();
+    if (!InRange(result.fireworks_[color], 0, num_ranks + 1)) {
+      return false;
+    }
+    for (int rank = 0; rank < result.fireworks_[color]; ++rank) {
+      if (!result.deck_.DealCard(color, rank).IsValid()) {
+        return false;
+      }
     }
   }
-  return movelist;
+
+  for (HanabiHand& hand : result.hands_) {
+    int num_cards = reader.Int8();
+    if (!InRange(num_cards, 0, game.HandSize() + 1)) {
+      return false;
+    }
+    for (int i = 0; i < num_cards; ++i) {
+      int color = reader.Int8();
+      int rank = reader.Int8();
+      int known_color = reader.Int8();
+      int known_rank = reader.Int8();
+      int color_plausible = reader.Uint8();
+      int rank_plausible = reader.Uint8();
+      if (!InRange(color, 0, num_colors) || !InRange(rank, 0, num_ranks) ||
+          !InRange(known_color, -1, num_colors) ||
+          !InRange(known_rank, -1, num_ranks)) {
+        return false;
+      }
+      HanabiHand::CardKnowledge knowledge(num_colors, num_ranks);
+      if (known_color >= 0) {
+        knowledge.ApplyIsColorHint(known_color);
+      } else {
+        for (int c = 0; c < num_colors; ++c) {
+          if ((color_plausible & (1 << c)) == 0) {
+            knowledge.ApplyIsNotColorHint(c);
+          }
+        }
+      }
+      if (known_rank >= 0) {
+        knowledge.ApplyIsRankHint(known_rank);
+      } else {
+        for (int r = 0; r < num_ranks; ++r) {
+          if ((rank_plausible & (1 << r)) == 0) {
+            knowledge.ApplyIsNotRankHint(r);
+          }
+        }
+      }
+      HanabiCard card = result.deck_.DealCard(color, rank);
+      if (!card.IsValid()) {
+        return false;
+      }
+      hand.AddCard(card, knowledge);
+    }
+  }
+
+  int discard_pile_size = reader.Uint16();
+  for (int i = 0; i < discard_pile_size; ++i) {
+    int color = reader.Int8();
+    int rank = reader.Int8();
+    if (!InRange(color, 0, num_colors) || !InRange(rank, 0, num_ranks)) {
+      return false;
+    }
+    HanabiCard card = result.deck_.DealCard(color, rank);
+    if (!card.IsValid()) {
+      return false;
+    }
+    result.discard_pile_.push_back(card);
+  }
+
+  int history_size = reader.Uint16();
+  for (int i = 0; i < history_size && reader.Ok(); ++i) {
+    int move_type = reader.Int8();
+    int card_index = reader.Int8();
+    int target_offset = reader.Int8();
+    int color = reader.Int8();
+    int rank = reader.Int8();
+    if (!InRange(move_type, HanabiMove::kInvalid, HanabiMove::kDeal + 1) ||
+        !InRange(card_index, -1, game.HandSize()) ||
+        !InRange(target_offset, -1, num_players) ||
+        !InRange(color, -1, num_colors) || !InRange(rank, -1, num_ranks)) {
+      return false;
+    }
+    HanabiHistoryItem item(
+        HanabiMove(static_cast<HanabiMove::Type>(move_type), card_index,
+                   target_offset, color, rank));
+    item.player = reader.Int8();
+    item.scored = reader.Int8();
+    item.information_token = reader.Int8();
+    item.color = reader.Int8();
+    item.rank = reader.Int8();
+    item.reveal_bitmask = reader.Uint8();
+    item.newly_revealed_bitmask = reader.Uint8();
+    item.deal_to_player = reader.Int8();
+    if (!InRange(item.player, kChancePlayerId, num_players) ||
+        !InRange(item.color, -1, num_colors) ||
+        !InRange(item.rank, -1, num_ranks) ||
+        !InRange(item.deal_to_player, -1, num_players)) {
+      return false;
+    }
+    result.move_history_.PushBack(item);
+  }
+
+  result.has_rng_stream_ = reader.Int8();
+  if (result.has_rng_stream_) {
+    uint64_t key = reader.Uint64();
+    uint64_t stream = reader.Uint64();
+    result.rng_ = CounterRng(key, stream);
+    result.rng_.SetCounter(reader.Uint64());
+  }
+  if (!reader.Ok() || !reader.AtEnd()) {
+    return false;
+  }
+
+  result.UpdateLegalMoves();
+  *state = result;
+  return true;
 }
 
 bool HanabiState::CardPlayableOnFireworks(int color, int rank) const {
@@ -17,8 +17,10 @@
 
 #include <random>
 #include <string>
+#include <utility>
 #include <vector>
 
+#include "counter_rng.h"
 #include "hanabi_card.h"
 #include "hanabi_game.h"
 #include "hanabi_hand.h"
@@ -37,11 +39,18 @@ class HanabiState {
     // DealCard returns invalid card on failure.
     HanabiCard DealCard(int color, int rank);
     HanabiCard DealCard(std::mt19937* rng);
+    // Puts a dealt card back into the deck.
+    void ReturnCard(int color, int rank);
     int Size() const { return total_count_; }
     bool Empty() const { return total_count_ == 0; }
     int CardCount(int color, int rank) const {
       return card_count_[CardToIndex(color, rank)];
     }
+    // Returns the card at position in the deck, 0 <= position < Size(), with
+    // cards ordered by color and then rank. Dealing the card at a uniformly
+    // random position deals each remaining card with equal probability.
+    // Takes O(log(#colors * #ranks)) time, without touching the deck.
+    HanabiCard CardAt(int position) const;
 
    private:
     int CardToIndex(int color, int rank) const {
@@ -49,11 +58,18 @@ class HanabiState {
     }
     int IndexToColor(int index) const { return index / num_ranks_; }
     int IndexToRank(int index) const { return index % num_ranks_; }
+    // Adds delta to card_count_[index], keeping the totals consistent.
+    void UpdateCount(int index, int delta);
 
     // Number of instances in the deck for each card.
     // E.g., if card_count_[CardToIndex(card)] == 2, then there are two
     // instances of card remaining in the deck, available to be dealt out.
     std::vector<int> card_count_;
+    // Fenwick tree over card_count_, for finding the card at a position.
+    // count_tree_[i] holds the sum of card_count_[i - (i & -i), i), so
+    // count_tree_[0] is unused.
+    std::vector<int> count_tree_;
+    int tree_top_bit_ = 0;  // Largest power of 2 <= card_count_.size().
     int total_count_ = -1;  // Total number of cards available to be dealt out.
     int num_ranks_ = -1;    // From game.NumRanks(), used to map card to index.
   };
@@ -69,13 +85,26 @@ class HanabiState {
   // If start_player >= 0, the game-provided start player is overridden
   // and the first player after chance is start_player.
   explicit HanabiState(const HanabiGame* parent_game, int start_player = -1);
+  // Construct a HanabiState which draws its chance outcomes, and its start
+  // player if the game samples one, from stream rng_stream of the game seed
+  // instead of the game's shared generator. The dealt cards are then a pure
+  // function of the game seed, rng_stream and the moves applied.
+  HanabiState(const HanabiGame* parent_game, int start_player,
+              uint64_t rng_stream);
   // Copy constructor for recursive game traversals using copy + apply-move.
   HanabiState(const HanabiState& state) = default;
 
   bool MoveIsLegal(HanabiMove move) const;
   void ApplyMove(HanabiMove move);
-  // Legal moves for state. Moves point into an unchanging list in parent_game.
-  std::vector<HanabiMove> LegalMoves(int player) const;
+  // Reverts the most recent move applied with ApplyMove, including chance
+  // moves. Moves applied before this state was copied cannot be undone.
+  void UndoMove();
+  // Number of moves which UndoMove can currently revert.
+  int NumUndoableMoves() const { return undo_stack_.Size(); }
+  // Legal moves for state, in increasing uid order. Empty for all players
+  // other than the current player. Maintained by ApplyMove, so this does not
+  // re-evaluate every move in parent_game.
+  const std::vector<HanabiMove>& LegalMoves(int player) const;
   // Returns true if card with color and rank can be played on fireworks pile.
   bool CardPlayableOnFireworks(int color, int rank) const;
   bool CardPlayableOnFireworks(HanabiCard card) const {
@@ -84,7 +113,26 @@ class HanabiState {
   bool ChanceOutcomeIsLegal(HanabiMove move) const { return MoveIsLegal(move); }
   double ChanceOutcomeProb(HanabiMove move) const;
   void ApplyChanceOutcome(HanabiMove move) { ApplyMove(move); }
+  // Applies a chance outcome sampled from the state's own stream, if it has
+  // one, in O(log #cards) time. Or else samples it from the parent game's
+  // generator, over ChanceOutcomes() as the library always has, so that game
+  // seeds deal the same cards as in earlier versions.
   void ApplyRandomChance();
+  // Applies random chance outcomes until a player is to act. Does nothing if
+  // a player is already to act.
+  void ResolveChance();
+  bool HasRngStream() const { return has_rng_stream_; }
+  uint64_t RngStream() const { return rng_.Stream(); }
+  // Draw further chance outcomes from the start of stream rng_stream.
+  void SetRngStream(uint64_t rng_stream);
+  // Replaces the cards of player's hand with cards, one per card in the hand,
+  // keeping the card knowledge. The replaced cards are returned to the deck,
+  // and the new ones taken from it, and their deals in the move history are
+  // rewritten to match. Used to determinize a state for an observer, see
+  // HandSampler. Moves applied before can no longer be undone.
+  // Returns false, leaving the state unchanged, if the deck and the replaced
+  // cards do not hold cards.
+  bool SetHandCards(int player, const std::vector<HanabiCard>& cards);
   // Get the valid chance moves, and associated probabilities.
   // Guaranteed that moves.size() == probabilities.size().
   std::pair<std::vector<HanabiMove>, std::vector<double>> ChanceOutcomes()
@@ -94,6 +142,16 @@ class HanabiState {
   int Score() const;
   std::string ToString() const;
 
+  // Compact binary encoding of the state, from which Deserialize can rebuild
+  // it. Card knowledge and the move history are included; undo information is
+  // not, as for copies.
+  std::string Serialize() const;
+  // Rebuilds into state the state of parent_game which Serialize encoded as
+  // data. Returns false, leaving state unchanged, if data is not such an
+  // encoding, e.g. is truncated, of another game or of another version.
+  static bool Deserialize(const HanabiGame* parent_game,
+                          const std::string& data, HanabiState* state);
+
   int CurPlayer() const { return cur_player_; }
   int LifeTokens() const { return life_tokens_; }
   int InformationTokens() const { return information_tokens_; }
@@ -104,11 +162,50 @@ class HanabiState {
   // Get the discard pile (the element at the back is the most recent discard.)
   const std::vector<HanabiCard>& DiscardPile() const { return discard_pile_; }
   // Sequence of moves from beginning of game. Stored as <move, actor>.
-  const std::vector<HanabiHistoryItem>& MoveHistory() const {
-    return move_history_;
-  }
+  // Shared between copies of the state, see HanabiMoveHistory.
+  const HanabiMoveHistory& MoveHistory() const { return move_history_; }
 
  private:
+  // What ApplyMove changed, so UndoMove can restore it without copying the
+  // whole state.
+  struct UndoRecord {
+    int cur_player = -1;
+    int next_non_chance_player = -1;
+    int information_tokens = -1;
+    int life_tokens = -1;
+    int turns_to_play = -1;
+    int discard_pile_size = 0;
+    // Player dealt a card, or -1 if the move was not a deal.
+    int deal_to_player = -1;
+    // Player whose hand was modified by a play, discard or reveal, and a copy
+    // of that hand before the move. hand_player is -1 for deals.
+    int hand_player = -1;
+    HanabiHand hand;
+    // Color of the firework a successful play added to, or -1.
+    int firework_color = -1;
+    uint64_t rng_counter = 0;
+  };
+
+  // Stack of UndoRecords, one per applied move. Copies start empty, so
+  // copying a state does not copy its undo information.
+  class UndoStack {
+   public:
+    UndoStack() = default;
+    UndoStack(const UndoStack&) {}
+    UndoStack& operator=(const UndoStack&) {
+      records_.clear();
+      return *this;
+    }
+    int Size() const { return records_.size(); }
+    bool Empty() const { return records_.empty(); }
+    void Push(UndoRecord record) { records_.push_back(std::move(record)); }
+    const UndoRecord& Back() const { return records_.back(); }
+    void Pop() { records_.pop_back(); }
+
+   private:
+    std::vector<UndoRecord> records_;
+  };
+
   // Add card to table if possible, if not lose a life token.
   // Returns <scored,information_token_added>
   // success is true iff card was successfully added to fireworks.
@@ -122,6 +219,8 @@ class HanabiState {
     return &hands_[(cur_player_ + offset) % hands_.size()];
   }
   void AdvanceToNextPlayer();  // Set cur_player to next player to act.
+  // Recomputes legal_moves_ for the current player.
+  void UpdateLegalMoves();
   bool HintingIsLegal(HanabiMove move) const;
   int PlayerToDeal() const;  // -1 if no player needs a card.
   bool IncrementInformationTokens();
@@ -133,13 +232,19 @@ class HanabiState {
   // Back element of discard_pile_ is most recently discarded card.
   std::vector<HanabiCard> discard_pile_;
   std::vector<HanabiHand> hands_;
-  std::vector<HanabiHistoryItem> move_history_;
+  HanabiMoveHistory move_history_;
+  // Legal moves of cur_player_, empty when chance is to act.
+  std::vector<HanabiMove> legal_moves_;
   int cur_player_ = -1;
   int next_non_chance_player_ = -1;  // Next non-chance player to act.
   int information_tokens_ = -1;
   int life_tokens_ = -1;
   std::vector<int> fireworks_;
   int turns_to_play_ = -1;  // Number of turns to play once deck is empty.
+  // Whether chance outcomes are drawn from rng_ rather than the parent game.
+  bool has_rng_stream_ = false;
+  CounterRng rng_;
+  UndoStack undo_stack_;
 };
 
 }  // namespace hanabi_learning_env
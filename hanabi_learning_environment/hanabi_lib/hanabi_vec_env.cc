@@ -0,0 +1,116 @@
+// Copyright 2018 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//    https://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+#include "hanabi_vec_env.h"
+
+#include <algorithm>
+#include <functional>
+#include <numeric>
+
+#include "hanabi_observation.h"
+#include "util.h"
+
+namespace hanabi_learning_env {
+
+HanabiVecEnv::HanabiVecEnv(const HanabiGame* parent_game,
+                           const ObservationEncoder* encoder, int num_envs,
+                           uint64_t first_episode, bool verify_encoding)
+    : parent_game_(parent_game),
+      encoder_(encoder),
+      next_episode_(first_episode),
+      states_(std::max(num_envs, 0), HanabiState(parent_game)) {
+  REQUIRE(num_envs > 0);
+  std::vector<int> shape = encoder_->Shape();
+  observation_length_ = std::accumulate(shape.begin(), shape.end(), 1,
+                                        std::multiplies<int>());
+  if (encoder_->type() == ObservationEncoder::kCanonical) {
+    incremental_encoders_.reserve(num_envs * parent_game_->NumPlayers());
+    for (int i = 0; i < num_envs; ++i) {
+      for (int player = 0; player < parent_game_->NumPlayers(); ++player) {
+        incremental_encoders_.emplace_back(parent_game_, player,
+                                           verify_encoding);
+      }
+    }
+  }
+}
+
+void HanabiVecEnv::Reset(uint8_t* observations, uint8_t* legal_moves,
+                         int32_t* cur_players) {
+  for (int i = 0; i < NumEnvs(); ++i) {
+    ResetState(i);
+    WriteOutputs(i, observations, legal_moves, cur_players);
+  }
+}
+
+void HanabiVecEnv::Step(const int32_t* actions, uint8_t* observations,
+                        uint8_t* legal_moves, float* rewards, uint8_t* dones,
+                        int32_t* cur_players) {
+  REQUIRE(actions != nullptr);
+  for (int i = 0; i < NumEnvs(); ++i) {
+    HanabiState& state = states_[i];
+    REQUIRE(actions[i] >= 0 && actions[i] < parent_game_->MaxMoves());
+    int last_score = state.Score();
+    state.ApplyMove(parent_game_->GetMove(actions[i]));
+    state.ResolveChance();
+    // Reward is score differential. May be large and negative at game end.
+    if (rewards != nullptr) {
+      rewards[i] = static_cast<float>(state.Score() - last_score);
+    }
+    bool done = state.IsTerminal();
+    if (dones != nullptr) {
+      dones[i] = done ? 1 : 0;
+    }
+    if (done) {
+      ResetState(i);
+    }
+    WriteOutputs(i, observations, legal_moves, cur_players);
+  }
+}
+
+void HanabiVecEnv::ResetState(int index) {
+  states_[index] = HanabiState(parent_game_, -1, next_episode_++);
+  states_[index].ResolveChance();
+}
+
+void HanabiVecEnv::WriteOutputs(int index, uint8_t* observations,
+                                uint8_t* legal_moves,
+                                int32_t* cur_players) {
+  const HanabiState& state = states_[index];
+  if (cur_players != nullptr) {
+    cur_players[index] = state.CurPlayer();
+  }
+  if (legal_moves != nullptr) {
+    int max_moves = parent_game_->MaxMoves();
+    uint8_t* mask = legal_moves + static_cast<size_t>(index) * max_moves;
+    std::fill(mask, mask + max_moves, 0);
+    for (const HanabiMove& move : state.LegalMoves(state.CurPlayer())) {
+      mask[parent_game_->GetMoveUid(move)] = 1;
+    }
+  }
+  if (observations != nullptr) {
+    uint8_t* encoding =
+        observations + static_cast<size_t>(index) * observation_length_;
+    if (incremental_encoders_.empty()) {
+      encoder_->EncodeInto(HanabiObservation(state, state.CurPlayer()),
+                           encoding);
+    } else {
+      REQUIRE(state.CurPlayer() >= 0);
+      incremental_encoders_[index * parent_game_->NumPlayers() +
+                            state.CurPlayer()]
+          .EncodeInto(state, encoding);
+    }
+  }
+}
+
+}  // namespace hanabi_learning_env
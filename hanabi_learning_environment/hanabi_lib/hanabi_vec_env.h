@@ -0,0 +1,99 @@
+// Copyright 2018 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//    https://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+// A batch of independent Hanabi games that are stepped together, so that
+// callers (e.g. Python agents) cross the library boundary once per batch
+// instead of several times per game and step.
+
+#ifndef __HANABI_VEC_ENV_H__
+#define __HANABI_VEC_ENV_H__
+
+#include <cstdint>
+#include <vector>
+
+#include "canonical_encoders.h"
+#include "hanabi_game.h"
+#include "hanabi_state.h"
+#include "observation_encoder.h"
+
+namespace hanabi_learning_env {
+
+class HanabiVecEnv {
+ public:
+  // All games share parent_game. Observations are encoded with encoder.
+  // Neither parent_game nor encoder is owned, and both must outlive this
+  // object.
+  // Games are numbered from first_episode in the order they start, and each
+  // deals its cards from the random stream of its number (see HanabiState).
+  // Games are thus reproducible, and independent of other users of
+  // parent_game.
+  // Canonical observations are encoded incrementally, from each player's
+  // previous observation (see IncrementalCanonicalEncoder). If
+  // verify_encoding is true, each one is also checked against encoder.
+  HanabiVecEnv(const HanabiGame* parent_game, const ObservationEncoder* encoder,
+               int num_envs, uint64_t first_episode = 0,
+               bool verify_encoding = false);
+
+  int NumEnvs() const { return states_.size(); }
+  // Number of entries in a single encoded observation.
+  int ObservationLength() const { return observation_length_; }
+  const HanabiGame* ParentGame() const { return parent_game_; }
+  const HanabiState& State(int index) const { return states_.at(index); }
+
+  // Starts a new game in every environment, and writes the initial
+  // observations, legal move masks and current players.
+  //
+  // All buffers are caller-owned and hold one row per environment:
+  //   observations: NumEnvs() x ObservationLength() encoded observations of
+  //     the current player.
+  //   legal_moves: NumEnvs() x ParentGame()->MaxMoves() entries, set to 1 if
+  //     the move with that uid is legal for the current player, else 0.
+  //   cur_players: NumEnvs() current player indices.
+  // Any buffer may be nullptr, in which case it is not written.
+  void Reset(uint8_t* observations, uint8_t* legal_moves,
+             int32_t* cur_players);
+
+  // Applies move uid actions[i] for the current player of environment i, and
+  // deals cards until a player is to act. Games which end are recorded in
+  // dones and immediately reset, so the written observation, legal moves and
+  // current player of a finished environment are those of its new game.
+  //
+  // Buffers are as for Reset(), with the additions of:
+  //   rewards: NumEnvs() score differentials caused by the actions.
+  //   dones: NumEnvs() flags, set to 1 if the action ended the game.
+  // Reset() must have been called before the first Step().
+  void Step(const int32_t* actions, uint8_t* observations,
+            uint8_t* legal_moves, float* rewards, uint8_t* dones,
+            int32_t* cur_players);
+
+ private:
+  // Replaces environment index with a new game, dealt until a player acts.
+  void ResetState(int index);
+  // Writes the outputs of environment index into row index of each buffer.
+  void WriteOutputs(int index, uint8_t* observations, uint8_t* legal_moves,
+                    int32_t* cur_players);
+
+  const HanabiGame* parent_game_ = nullptr;
+  const ObservationEncoder* encoder_ = nullptr;
+  int observation_length_ = -1;
+  uint64_t next_episode_ = 0;
+  std::vector<HanabiState> states_;
+  // Encoder of each player of each environment, at index
+  // environment * NumPlayers() + player. Empty if encoder_ is not canonical.
+  std::vector<IncrementalCanonicalEncoder> incremental_encoders_;
+};
+
+}  // namespace hanabi_learning_env
+
+#endif
@@ -0,0 +1,124 @@
+// Copyright 2018 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//    https://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+#include "hand_sampler.h"
+
+#include <numeric>
+
+#include "hanabi_game.h"
+#include "hanabi_hand.h"
+#include "util.h"
+
+namespace hanabi_learning_env {
+
+HandSampler::HandSampler(const HanabiObservation& observation) {
+  const HanabiGame& game = *observation.ParentGame();
+  num_ranks_ = game.NumRanks();
+  for (int color = 0; color < game.NumColors(); ++color) {
+    for (int rank = 0; rank < num_ranks_; ++rank) {
+      // Cards below the top of each firework were played.
+      unseen_counts_.push_back(game.NumberCardInstances(color, rank) -
+                               (rank < observation.Fireworks()[color] ? 1 : 0));
+    }
+  }
+  for (const HanabiCard& card : observation.DiscardPile()) {
+    --unseen_counts_[card.Color() * num_ranks_ + card.Rank()];
+  }
+  for (const HanabiHand& hand : observation.Hands()) {
+    for (const HanabiCard& card : hand.Cards()) {
+      if (card.IsValid()) {
+        --unseen_counts_[card.Color() * num_ranks_ + card.Rank()];
+      }
+    }
+  }
+
+  const HanabiHand& own_hand = observation.Hands()[0];
+  hand_.assign(own_hand.Cards().begin(), own_hand.Cards().end());
+  for (int i = 0; i < hand_.size(); ++i) {
+    if (hand_[i].IsValid()) {
+      continue;
+    }
+    const HanabiHand::CardKnowledge& knowledge = own_hand.Knowledge()[i];
+    hidden_slots_.push_back(i);
+    allowed_cards_.emplace_back();
+    int max_allowed = 0;
+    for (int card = 0; card < unseen_counts_.size(); ++card) {
+      if (unseen_counts_[card] > 0 &&
+          knowledge.ColorPlausible(card / num_ranks_) &&
+          knowledge.RankPlausible(card % num_ranks_)) {
+        allowed_cards_.back().push_back(card);
+        max_allowed += unseen_counts_[card];
+      }
+    }
+    // The actual card is always allowed.
+    REQUIRE(max_allowed > 0);
+    max_allowed_.push_back(max_allowed);
+  }
+  REQUIRE(std::accumulate(unseen_counts_.begin(), unseen_counts_.end(), 0) ==
+          observation.DeckSize() + hidden_slots_.size());
+}
+
+void HandSampler::Sample(CounterRng* rng,
+                         std::vector<HanabiCard>* hand) const {
+  REQUIRE(rng != nullptr);
+  REQUIRE(hand != nullptr);
+  *hand = hand_;
+  std::vector<int> counts;
+  while (true) {
+    counts = unseen_counts_;
+    double acceptance = 1.0;
+    bool dealt_all = true;
+    for (int slot = 0; slot < hidden_slots_.size(); ++slot) {
+      const std::vector<int>& allowed_cards = allowed_cards_[slot];
+      int allowed = 0;
+      for (int card : allowed_cards) {
+        allowed += counts[card];
+      }
+      if (allowed == 0) {
+        dealt_all = false;
+        break;
+      }
+      acceptance *= static_cast<double>(allowed) / max_allowed_[slot];
+      int position = rng->UniformInt(allowed);
+      for (int card : allowed_cards) {
+        if (position < counts[card]) {
+          --counts[card];
+          (*hand)[hidden_slots_[slot]] =
+              HanabiCard(card / num_ranks_, card % num_ranks_);
+          break;
+        }
+        position -= counts[card];
+      }
+    }
+    if (dealt_all &&
+        (acceptance >= 1.0 || rng->UniformDouble() < acceptance)) {
+      return;
+    }
+  }
+}
+
+bool Determinize(const HanabiState& state, int observing_player,
+                 const std::vector<HanabiCard>& hand, uint64_t rng_stream,
+                 HanabiState* determinized) {
+  REQUIRE(determinized != nullptr);
+  HanabiState copy(state);
+  if (!copy.SetHandCards(observing_player, hand)) {
+    return false;
+  }
+  copy.SetRngStream(rng_stream);
+  *determinized = copy;
+  return true;
+}
+
+}  // namespace hanabi_learning_env
@@ -0,0 +1,88 @@
+// Copyright 2018 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//    https://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+// Belief-state sampling of the cards a player cannot see in their own hand,
+// e.g. to determinize states for information-set Monte Carlo search.
+
+#ifndef __HAND_SAMPLER_H__
+#define __HAND_SAMPLER_H__
+
+#include <cstdint>
+#include <vector>
+
+#include "counter_rng.h"
+#include "hanabi_card.h"
+#include "hanabi_observation.h"
+#include "hanabi_state.h"
+
+namespace hanabi_learning_env {
+
+// Samples the observing player's hand, given what they observe.
+//
+// The unseen cards are those of the deck and the observer's hidden cards:
+// all cards of the game less the discard pile, the fireworks and the cards
+// of every visible hand. The hidden cards are distributed as if the unseen
+// cards were dealt uniformly at random, conditioned on the card knowledge of
+// each slot. That is, an assignment of cards consistent with the knowledge is
+// drawn with probability proportional to the number of ways of dealing it
+// from the unseen cards. What the other players' choice of hints may reveal
+// is not taken into account.
+class HandSampler {
+ public:
+  // observation must remain valid while the sampler is in use.
+  explicit HandSampler(const HanabiObservation& observation);
+
+  // Number of cards in the observer's hand.
+  int HandSize() const { return hand_.size(); }
+  // Number of unseen instances of each card, indexed by
+  // color * num_ranks + rank.
+  const std::vector<int>& UnseenCounts() const { return unseen_counts_; }
+
+  // Writes a sample of the observer's hand into hand, one card per hand slot.
+  // Visible cards are kept as they are. All randomness is drawn from rng, so
+  // samples are reproducible.
+  //
+  // Slots are dealt one by one from the remaining unseen cards which their
+  // knowledge allows, and the sample is accepted with probability
+  // prod_i allowed_i / max_allowed_i, where allowed_i is the number of cards
+  // slot i could be dealt, and max_allowed_i that number before any slot is
+  // dealt. This corrects the sequential proposal to the exact distribution
+  // above, and almost always accepts unless knowledge is very narrow.
+  void Sample(CounterRng* rng, std::vector<HanabiCard>* hand) const;
+
+ private:
+  int num_ranks_ = 0;
+  // Observer's hand, with invalid cards in the hidden slots.
+  std::vector<HanabiCard> hand_;
+  std::vector<int> unseen_counts_;
+  // For each hidden slot: its index in the hand, the cards (indices into
+  // unseen_counts_) its knowledge allows, and how many unseen instances of
+  // them there are.
+  std::vector<int> hidden_slots_;
+  std::vector<std::vector<int>> allowed_cards_;
+  std::vector<int> max_allowed_;
+};
+
+// Makes determinized a copy of state, in which observing_player's hand holds
+// hand instead (see HanabiState::SetHandCards), and which deals further cards
+// from random stream rng_stream. The deck of the copy thus follows hand, and
+// its order is independent of the original one. Returns false, leaving
+// determinized unchanged, if the cards of hand are not available.
+bool Determinize(const HanabiState& state, int observing_player,
+                 const std::vector<HanabiCard>& hand, uint64_t rng_stream,
+                 HanabiState* determinized);
+
+}  // namespace hanabi_learning_env
+
+#endif
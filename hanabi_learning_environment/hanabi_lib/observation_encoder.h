@@ -18,6 +18,7 @@
 #ifndef __OBSERVATION_ENCODER_H__
 #define __OBSERVATION_ENCODER_H__
 
+#include <cstdint>
 #include <vector>
 
 #include "hanabi_observation.h"
@@ -26,20 +27,45 @@ namespace hanabi_learning_env {
 
 class ObservationEncoder {
  public:
-  enum Type { kCanonical = 0 };
+  enum Type { kCanonical = 0, kCompact = 1 };
   virtual ~ObservationEncoder() = default;
 
   // Returns the shape (dimension sizes of the tensor).
   virtual std::vector<int> Shape() const = 0;
 
-  // All of the canonical observation encodings are vectors of bits. We can
+  // All of the canonical observation encodings are vectors of bits, and the
+  // compact ones vectors of small integers which fit in a uint8_t. We can
   // change this if we want something more general (e.g. floats or doubles).
   virtual std::vector<int> Encode(const HanabiObservation& obs) const = 0;
 
+  // Same as Encode, but writes the entries into encoding, which must hold the
+  // product of the Shape() dimensions. Avoids allocating per observation.
+  virtual void EncodeInto(const HanabiObservation& obs,
+                          uint8_t* encoding) const = 0;
+
   // Return the type of this encoder.
   virtual Type type() const = 0;
 };
 
+// Number of bytes holding length bits packed by PackBits.
+inline int PackedLength(int length) { return (length + 7) / 8; }
+
+// Packs the length 0/1 entries of bits eight to a byte, most significant bit
+// first as numpy.packbits does, into PackedLength(length) bytes of packed.
+// Unused bits of the last byte are 0.
+inline void PackBits(const uint8_t* bits, int length, uint8_t* packed) {
+  for (int i = 0; i < length; i += 8) {
+    uint8_t byte = 0;
+    for (int j = i; j < i + 8; ++j) {
+      byte <<= 1;
+      if (j < length && bits[j] != 0) {
+        byte |= 1;
+      }
+    }
+    packed[i / 8] = byte;
+  }
+}
+
 }  // namespace hanabi_learning_env
 
 #endif
@@ -24,6 +24,8 @@ namespace hanabi_learning_env {
 
 constexpr int kMaxNumColors = 5;
 constexpr int kMaxNumRanks = 5;
+// Hands are stored inline, and hint results are reported as 8 bit masks.
+constexpr int kMaxHandSize = 8;
 
 // Returns a character representation of an integer color/rank index.
 char ColorIndexToChar(int color);
@@ -14,23 +14,74 @@
 
 #include "pyhanabi.h"
 
+#include <algorithm>
 #include <cstdlib>
 #include <cstring>
+#include <functional>
 #include <iostream>
 #include <memory>
+#include <numeric>
 #include <string>
 #include <unordered_map>
 
 #include "hanabi_lib/canonical_encoders.h"
+#include "hanabi_lib/compact_encoders.h"
+#include "hanabi_lib/hand_sampler.h"
 #include "hanabi_lib/hanabi_card.h"
 #include "hanabi_lib/hanabi_game.h"
 #include "hanabi_lib/hanabi_history_item.h"
 #include "hanabi_lib/hanabi_move.h"
 #include "hanabi_lib/hanabi_observation.h"
+#include "hanabi_lib/hanabi_rollout.h"
 #include "hanabi_lib/hanabi_state.h"
+#include "hanabi_lib/hanabi_vec_env.h"
 #include "hanabi_lib/observation_encoder.h"
 #include "hanabi_lib/util.h"
 
+namespace {
+
+// Sets mask[uid] to 1 for the uids of moves, and 0 for all other uids.
+void WriteLegalMovesMask(
+    const hanabi_learning_env::HanabiGame& game,
+    const std::vector<hanabi_learning_env::HanabiMove>& moves, uint8_t* mask) {
+  std::fill(mask, mask + game.MaxMoves(), 0);
+  for (const hanabi_learning_env::HanabiMove& move : moves) {
+    mask[game.GetMoveUid(move)] = 1;
+  }
+}
+
+// Writes the uids of moves to uids, returning how many were written.
+int WriteLegalMoveUids(
+    const hanabi_learning_env::HanabiGame& game,
+    const std::vector<hanabi_learning_env::HanabiMove>& moves, int32_t* uids) {
+  for (int i = 0; i < moves.size(); ++i) {
+    uids[i] = game.GetMoveUid(moves[i]);
+  }
+  return moves.size();
+}
+
+void FillMoveData(hanabi_learning_env::HanabiMove move,
+                  pyhanabi_move_data_t* data) {
+  data->type = move.MoveType();
+  data->card_index = move.CardIndex();
+  data->target_offset = move.TargetOffset();
+  data->color = move.Color();
+  data->rank = move.Rank();
+}
+
+// Returns the built-in rollout policy of type policy, aborting if unknown.
+std::unique_ptr<hanabi_learning_env::RolloutPolicy> NewRolloutPolicy(
+    int policy) {
+  auto rollout_policy = hanabi_learning_env::MakeRolloutPolicy(policy);
+  if (rollout_policy == nullptr) {
+    std::cerr << "Rollout policy not recognized." << std::endl;
+    std::abort();
+  }
+  return rollout_policy;
+}
+
+}  // namespace
+
 extern "C" {
 
 /* Helpers. */
@@ -223,6 +274,18 @@ void HistoryItemMove(pyhanabi_history_item_t* item, pyhanabi_move_t* move) {
           ->move);
 }
 
+int HistoryItemMoveUid(pyhanabi_history_item_t* item, pyhanabi_game_t* game) {
+  REQUIRE(item != nullptr);
+  REQUIRE(item->item != nullptr);
+  REQUIRE(game != nullptr);
+  REQUIRE(game->game != nullptr);
+  return reinterpret_cast<const hanabi_learning_env::HanabiGame*>(game->game)
+      ->GetMoveUid(
+          reinterpret_cast<const hanabi_learning_env::HanabiHistoryItem*>(
+              item->item)
+              ->move);
+}
+
 int HistoryItemPlayer(pyhanabi_history_item_t* item) {
   REQUIRE(item != nullptr);
   REQUIRE(item->item != nullptr);
@@ -296,6 +359,16 @@ void NewState(pyhanabi_game_t* game, pyhanabi_state_t* state) {
       static_cast<hanabi_learning_env::HanabiGame*>(game->game));
 }
 
+void NewStateWithRngStream(pyhanabi_game_t* game, uint64_t rng_stream,
+                           pyhanabi_state_t* state) {
+  REQUIRE(state != nullptr);
+  REQUIRE(game != nullptr);
+  REQUIRE(game->game != nullptr);
+  state->state = new hanabi_learning_env::HanabiState(
+      static_cast<hanabi_learning_env::HanabiGame*>(game->game), -1,
+      rng_stream);
+}
+
 void CopyState(const pyhanabi_state_t* src, pyhanabi_state_t* dest) {
   REQUIRE(src != nullptr);
   REQUIRE(src->state != nullptr);
@@ -311,6 +384,37 @@ void DeleteState(pyhanabi_state_t* state) {
   state->state = nullptr;
 }
 
+char* StateSerialize(pyhanabi_state_t* state, int* length) {
+  REQUIRE(state != nullptr);
+  REQUIRE(state->state != nullptr);
+  REQUIRE(length != nullptr);
+  std::string data =
+      reinterpret_cast<hanabi_learning_env::HanabiState*>(state->state)
+          ->Serialize();
+  char* buffer = static_cast<char*>(malloc(data.size()));
+  REQUIRE(buffer != nullptr || data.empty());
+  memcpy(buffer, data.data(), data.size());
+  *length = data.size();
+  return buffer;
+}
+
+bool StateDeserialize(pyhanabi_game_t* game, const char* data, int length,
+                      pyhanabi_state_t* state) {
+  REQUIRE(game != nullptr);
+  REQUIRE(game->game != nullptr);
+  REQUIRE(data != nullptr);
+  REQUIRE(state != nullptr);
+  auto hanabi_game = static_cast<hanabi_learning_env::HanabiGame*>(game->game);
+  hanabi_learning_env::HanabiState hanabi_state(hanabi_game, 0);
+  state->state = nullptr;
+  if (!hanabi_learning_env::HanabiState::Deserialize(
+          hanabi_game, std::string(data, length), &hanabi_state)) {
+    return false;
+  }
+  state->state = new hanabi_learning_env::HanabiState(hanabi_state);
+  return true;
+}
+
 const void* StateParentGame(pyhanabi_state_t* state) {
   REQUIRE(state != nullptr);
   REQUIRE(state->state != nullptr);
@@ -331,6 +435,20 @@ void StateApplyMove(pyhanabi_state_t* state, pyhanabi_move_t* move) {
   hanabi_state->ApplyMove(*hanabi_move);
 }
 
+int StateNumUndoableMoves(pyhanabi_state_t* state) {
+  REQUIRE(state != nullptr);
+  REQUIRE(state->state != nullptr);
+  return reinterpret_cast<hanabi_learning_env::HanabiState*>(state->state)
+      ->NumUndoableMoves();
+}
+
+void StateUndoMove(pyhanabi_state_t* state) {
+  REQUIRE(state != nullptr);
+  REQUIRE(state->state != nullptr);
+  reinterpret_cast<hanabi_learning_env::HanabiState*>(state->state)
+      ->UndoMove();
+}
+
 int StateCurPlayer(pyhanabi_state_t* state) {
   REQUIRE(state != nullptr);
   REQUIRE(state->state != nullptr);
@@ -346,6 +464,34 @@ void StateDealRandomCard(pyhanabi_state_t* state) {
   hanabi_state->ApplyRandomChance();
 }
 
+void StateResolveChance(pyhanabi_state_t* state) {
+  REQUIRE(state != nullptr);
+  REQUIRE(state->state != nullptr);
+  reinterpret_cast<hanabi_learning_env::HanabiState*>(state->state)
+      ->ResolveChance();
+}
+
+bool StateHasRngStream(pyhanabi_state_t* state) {
+  REQUIRE(state != nullptr);
+  REQUIRE(state->state != nullptr);
+  return reinterpret_cast<hanabi_learning_env::HanabiState*>(state->state)
+      ->HasRngStream();
+}
+
+uint64_t StateRngStream(pyhanabi_state_t* state) {
+  REQUIRE(state != nullptr);
+  REQUIRE(state->state != nullptr);
+  return reinterpret_cast<hanabi_learning_env::HanabiState*>(state->state)
+      ->RngStream();
+}
+
+void StateSetRngStream(pyhanabi_state_t* state, uint64_t rng_stream) {
+  REQUIRE(state != nullptr);
+  REQUIRE(state->state != nullptr);
+  reinterpret_cast<hanabi_learning_env::HanabiState*>(state->state)
+      ->SetRngStream(rng_stream);
+}
+
 int StateDeckSize(pyhanabi_state_t* state) {
   REQUIRE(state != nullptr);
   REQUIRE(state->state != nullptr);
@@ -477,12 +623,42 @@ bool CardPlayableOnFireworks(const pyhanabi_state_t* state, int color,
       ->CardPlayableOnFireworks(color, rank);
 }
 
+int StateMaxMoves(pyhanabi_state_t* state) {
+  REQUIRE(state != nullptr);
+  REQUIRE(state->state != nullptr);
+  return reinterpret_cast<hanabi_learning_env::HanabiState*>(state->state)
+      ->ParentGame()
+      ->MaxMoves();
+}
+
+void StateLegalMovesMask(pyhanabi_state_t* state, uint8_t* mask) {
+  REQUIRE(state != nullptr);
+  REQUIRE(state->state != nullptr);
+  REQUIRE(mask != nullptr);
+  auto hanabi_state =
+      reinterpret_cast<hanabi_learning_env::HanabiState*>(state->state);
+  WriteLegalMovesMask(*hanabi_state->ParentGame(),
+                      hanabi_state->LegalMoves(hanabi_state->CurPlayer()),
+                      mask);
+}
+
+int StateLegalMoveUids(pyhanabi_state_t* state, int32_t* uids) {
+  REQUIRE(state != nullptr);
+  REQUIRE(state->state != nullptr);
+  REQUIRE(uids != nullptr);
+  auto hanabi_state =
+      reinterpret_cast<hanabi_learning_env::HanabiState*>(state->state);
+  return WriteLegalMoveUids(*hanabi_state->ParentGame(),
+                            hanabi_state->LegalMoves(hanabi_state->CurPlayer()),
+                            uids);
+}
+
 int StateLenMoveHistory(pyhanabi_state_t* state) {
   REQUIRE(state != nullptr);
   REQUIRE(state->state != nullptr);
   return reinterpret_cast<const hanabi_learning_env::HanabiState*>(state->state)
       ->MoveHistory()
-      .size();
+      .Size();
 }
 
 void StateGetMoveHistory(pyhanabi_state_t* state, int index,
@@ -493,7 +669,20 @@ void StateGetMoveHistory(pyhanabi_state_t* state, int index,
   item->item = new hanabi_learning_env::HanabiHistoryItem(
       reinterpret_cast<const hanabi_learning_env::HanabiState*>(state->state)
           ->MoveHistory()
-          .at(index));
+          .At(index));
+}
+
+void StateGetMoveHistoryItems(pyhanabi_state_t* state,
+                              pyhanabi_history_item_t* items) {
+  REQUIRE(state != nullptr);
+  REQUIRE(state->state != nullptr);
+  const hanabi_learning_env::HanabiMoveHistory& history =
+      reinterpret_cast<const hanabi_learning_env::HanabiState*>(state->state)
+          ->MoveHistory();
+  REQUIRE(items != nullptr || history.Empty());
+  for (auto it = history.rbegin(); it != history.rend(); ++it) {
+    items[it.Index()].item = new hanabi_learning_env::HanabiHistoryItem(*it);
+  }
 }
 
 /* Wrapper definitions for HanabiGame. */
@@ -537,6 +726,23 @@ char* GameParamString(pyhanabi_game_t* game) {
   return strdup(str.c_str());
 }
 
+char* GameRngState(pyhanabi_game_t* game) {
+  REQUIRE(game != nullptr);
+  REQUIRE(game->game != nullptr);
+  std::string rng_state =
+      reinterpret_cast<hanabi_learning_env::HanabiGame*>(game->game)
+          ->RngState();
+  return strdup(rng_state.c_str());
+}
+
+bool GameSetRngState(pyhanabi_game_t* game, const char* rng_state) {
+  REQUIRE(game != nullptr);
+  REQUIRE(game->game != nullptr);
+  REQUIRE(rng_state != nullptr);
+  return reinterpret_cast<hanabi_learning_env::HanabiGame*>(game->game)
+      ->SetRngState(rng_state);
+}
+
 int NumPlayers(pyhanabi_game_t* game) {
   return reinterpret_cast<hanabi_learning_env::HanabiGame*>(game->game)
       ->NumPlayers();
@@ -594,11 +800,34 @@ void GetMoveByUid(pyhanabi_game_t* game, int move_uid, pyhanabi_move_t* move) {
   REQUIRE(move->move != nullptr);
 }
 
+void GameSharedMove(pyhanabi_game_t* game, int move_uid,
+                    pyhanabi_move_t* move) {
+  REQUIRE(game != nullptr);
+  REQUIRE(game->game != nullptr);
+  REQUIRE(move != nullptr);
+  auto hanabi_game =
+      reinterpret_cast<const hanabi_learning_env::HanabiGame*>(game->game);
+  REQUIRE(move_uid >= 0 && move_uid < hanabi_game->MaxMoves());
+  move->move = const_cast<hanabi_learning_env::HanabiMove*>(
+      &hanabi_game->GetMove(move_uid));
+}
+
 int MaxMoves(pyhanabi_game_t* game) {
   return reinterpret_cast<hanabi_learning_env::HanabiGame*>(game->game)
       ->MaxMoves();
 }
 
+void GameMoveTable(pyhanabi_game_t* game, pyhanabi_move_data_t* moves) {
+  REQUIRE(game != nullptr);
+  REQUIRE(game->game != nullptr);
+  REQUIRE(moves != nullptr);
+  auto hanabi_game =
+      reinterpret_cast<hanabi_learning_env::HanabiGame*>(game->game);
+  for (int uid = 0; uid < hanabi_game->MaxMoves(); ++uid) {
+    FillMoveData(hanabi_game->GetMove(uid), &moves[uid]);
+  }
+}
+
 /* Wrapper definitions for HanabiObservation. */
 void NewObservation(pyhanabi_state_t* state, int player,
                     pyhanabi_observation_t* observation) {
@@ -792,6 +1021,104 @@ bool ObsCardPlayableOnFireworks(const pyhanabi_observation_t* observation,
       ->CardPlayableOnFireworks(color, rank);
 }
 
+void ObsGetData(pyhanabi_observation_t* observation,
+                pyhanabi_observation_data_t* data) {
+  REQUIRE(observation != nullptr);
+  REQUIRE(observation->observation != nullptr);
+  REQUIRE(data != nullptr);
+  auto obs = reinterpret_cast<hanabi_learning_env::HanabiObservation*>(
+      observation->observation);
+  const hanabi_learning_env::HanabiGame& game = *obs->ParentGame();
+  REQUIRE(game.NumPlayers() <= PYHANABI_MAX_PLAYERS);
+  REQUIRE(game.NumColors() <= PYHANABI_MAX_COLORS);
+  REQUIRE(game.HandSize() <= PYHANABI_MAX_HAND_SIZE);
+
+  data->cur_player_offset = obs->CurPlayerOffset();
+  data->num_players = game.NumPlayers();
+  data->num_colors = game.NumColors();
+  data->information_tokens = obs->InformationTokens();
+  data->life_tokens = obs->LifeTokens();
+  data->deck_size = obs->DeckSize();
+  for (int color = 0; color < game.NumColors(); ++color) {
+    data->fireworks[color] = obs->Fireworks()[color];
+  }
+
+  const auto& hands = obs->Hands();
+  for (int pid = 0; pid < hands.size(); ++pid) {
+    const auto& cards = hands[pid].Cards();
+    const auto& knowledge = hands[pid].Knowledge();
+    data->hand_size[pid] = cards.size();
+    for (int i = 0; i < cards.size(); ++i) {
+      data->hands[pid][i].color = cards[i].Color();
+      data->hands[pid][i].rank = cards[i].Rank();
+      data->known_color[pid][i] = knowledge[i].Color();
+      data->known_rank[pid][i] = knowledge[i].Rank();
+      data->color_plausible[pid][i] = knowledge[i].ColorPlausibleMask();
+      data->rank_plausible[pid][i] = knowledge[i].RankPlausibleMask();
+    }
+  }
+
+  const auto& discards = obs->DiscardPile();
+  REQUIRE(discards.size() <= PYHANABI_MAX_DECK_SIZE);
+  data->discard_pile_size = discards.size();
+  for (int i = 0; i < discards.size(); ++i) {
+    data->discard_pile[i].color = discards[i].Color();
+    data->discard_pile[i].rank = discards[i].Rank();
+  }
+
+  const auto& last_moves = obs->LastMoves();
+  REQUIRE(last_moves.size() <= PYHANABI_MAX_LAST_MOVES);
+  data->num_last_moves = last_moves.size();
+  for (int i = 0; i < last_moves.size(); ++i) {
+    const hanabi_learning_env::HanabiHistoryItem& item = last_moves[i];
+    pyhanabi_history_item_data_t* item_data = &data->last_moves[i];
+    FillMoveData(item.move, &item_data->move);
+    item_data->player = item.player;
+    item_data->scored = item.scored;
+    item_data->information_token = item.information_token;
+    item_data->color = item.color;
+    item_data->rank = item.rank;
+    item_data->reveal_bitmask = item.reveal_bitmask;
+    item_data->newly_revealed_bitmask = item.newly_revealed_bitmask;
+    item_data->deal_to_player = item.deal_to_player;
+  }
+
+  const auto& legal_moves = obs->LegalMoves();
+  REQUIRE(legal_moves.size() <= PYHANABI_MAX_MOVES);
+  data->num_legal_moves = legal_moves.size();
+  for (int i = 0; i < legal_moves.size(); ++i) {
+    FillMoveData(legal_moves[i], &data->legal_moves[i]);
+    data->legal_move_uids[i] = game.GetMoveUid(legal_moves[i]);
+  }
+}
+
+int ObsMaxMoves(pyhanabi_observation_t* observation) {
+  REQUIRE(observation != nullptr);
+  REQUIRE(observation->observation != nullptr);
+  return reinterpret_cast<hanabi_learning_env::HanabiObservation*>(
+             observation->observation)
+      ->ParentGame()
+      ->MaxMoves();
+}
+
+void ObsLegalMovesMask(pyhanabi_observation_t* observation, uint8_t* mask) {
+  REQUIRE(observation != nullptr);
+  REQUIRE(observation->observation != nullptr);
+  REQUIRE(mask != nullptr);
+  auto obs = reinterpret_cast<hanabi_learning_env::HanabiObservation*>(
+      observation->observation);
+  WriteLegalMovesMask(*obs->ParentGame(), obs->LegalMoves(), mask);
+}
+
+int ObsLegalMoveUids(pyhanabi_observation_t* observation, int32_t* uids) {
+  REQUIRE(observation != nullptr);
+  REQUIRE(observation->observation != nullptr);
+  REQUIRE(uids != nullptr);
+  auto obs = reinterpret_cast<hanabi_learning_env::HanabiObservation*>(
+      observation->observation);
+  return WriteLegalMoveUids(*obs->ParentGame(), obs->LegalMoves(), uids);
+}
+
 void NewObservationEncoder(pyhanabi_observation_encoder_t* encoder,
                            pyhanabi_game_t* game, int type) {
   REQUIRE(encoder != nullptr);
@@ -805,6 +1132,10 @@ void NewObservationEncoder(pyhanabi_observation_encoder_t* encoder,
       encoder->encoder = static_cast<hanabi_learning_env::ObservationEncoder*>(
           new hanabi_learning_env::CanonicalObservationEncoder(hanabi_game));
       break;
+    case hanabi_learning_env::ObservationEncoder::Type::kCompact:
+      encoder->encoder = static_cast<hanabi_learning_env::ObservationEncoder*>(
+          new hanabi_learning_env::CompactObservationEncoder(hanabi_game));
+      break;
     default:
       std::cerr << "Encoder type not recognized." << std::endl;
       encoder->encoder = nullptr;
@@ -857,4 +1188,202 @@ char* EncodeObservation(pyhanabi_observation_encoder_t* encoder,
   return strdup(obs_str.c_str());
 }
 
+int ObservationLength(pyhanabi_observation_encoder_t* encoder) {
+  REQUIRE(encoder != nullptr);
+  REQUIRE(encoder->encoder != nullptr);
+  auto obs_enc = reinterpret_cast<hanabi_learning_env::ObservationEncoder*>(
+      encoder->encoder);
+  std::vector<int> shape = obs_enc->Shape();
+  return std::accumulate(shape.begin(), shape.end(), 1,
+                         std::multiplies<int>());
+}
+
+void EncodeObservationInto(pyhanabi_observation_encoder_t* encoder,
+                           pyhanabi_observation_t* observation,
+                           uint8_t* encoding) {
+  EncodeObservationsInto(encoder, 1, observation, encoding);
+}
+
+void EncodeObservationPackedInto(pyhanabi_observation_encoder_t* encoder,
+                                 pyhanabi_observation_t* observation,
+                                 uint8_t* packed) {
+  REQUIRE(packed != nullptr);
+  // Only canonical encodings are bits.
+  REQUIRE(reinterpret_cast<hanabi_learning_env::ObservationEncoder*>(
+              encoder->encoder)
+              ->type() == hanabi_learning_env::ObservationEncoder::kCanonical);
+  std::vector<uint8_t> encoding(ObservationLength(encoder));
+  EncodeObservationsInto(encoder, 1, observation, encoding.data());
+  hanabi_learning_env::PackBits(encoding.data(), encoding.size(), packed);
+}
+
+void EncodeObservationsInto(pyhanabi_observation_encoder_t* encoder,
+                            int num_observations,
+                            pyhanabi_observation_t* observations,
+                            uint8_t* encoding) {
+  REQUIRE(encoder != nullptr);
+  REQUIRE(encoder->encoder != nullptr);
+  REQUIRE(num_observations >= 0);
+  REQUIRE(num_observations == 0 || observations != nullptr);
+  REQUIRE(num_observations == 0 || encoding != nullptr);
+  auto obs_enc = reinterpret_cast<hanabi_learning_env::ObservationEncoder*>(
+      encoder->encoder);
+  int length = ObservationLength(encoder);
+  for (int i = 0; i < num_observations; ++i) {
+    REQUIRE(observations[i].observation != nullptr);
+    auto obs = reinterpret_cast<hanabi_learning_env::HanabiObservation*>(
+        observations[i].observation);
+    obs_enc->EncodeInto(*obs, encoding + static_cast<size_t>(i) * length);
+  }
+}
+
+/* Wrapper definitions for HanabiVecEnv. */
+void NewVecEnv(pyhanabi_vec_env_t* vec_env, pyhanabi_game_t* game,
+               pyhanabi_observation_encoder_t* encoder, int num_envs,
+               uint64_t first_episode, bool verify_encoding) {
+  REQUIRE(vec_env != nullptr);
+  REQUIRE(game != nullptr);
+  REQUIRE(game->game != nullptr);
+  REQUIRE(encoder != nullptr);
+  REQUIRE(encoder->encoder != nullptr);
+  vec_env->vec_env = new hanabi_learning_env::HanabiVecEnv(
+      reinterpret_cast<hanabi_learning_env::HanabiGame*>(game->game),
+      reinterpret_cast<hanabi_learning_env::ObservationEncoder*>(
+          encoder->encoder),
+      num_envs, first_episode, verify_encoding);
+  REQUIRE(vec_env->vec_env != nullptr);
+}
+
+void DeleteVecEnv(pyhanabi_vec_env_t* vec_env) {
+  REQUIRE(vec_env != nullptr);
+  REQUIRE(vec_env->vec_env != nullptr);
+  delete reinterpret_cast<hanabi_learning_env::HanabiVecEnv*>(vec_env->vec_env);
+  vec_env->vec_env = nullptr;
+}
+
+int VecEnvNumEnvs(pyhanabi_vec_env_t* vec_env) {
+  REQUIRE(vec_env != nullptr);
+  REQUIRE(vec_env->vec_env != nullptr);
+  return reinterpret_cast<hanabi_learning_env::HanabiVecEnv*>(vec_env->vec_env)
+      ->NumEnvs();
+}
+
+int VecEnvObservationLength(pyhanabi_vec_env_t* vec_env) {
+  REQUIRE(vec_env != nullptr);
+  REQUIRE(vec_env->vec_env != nullptr);
+  return reinterpret_cast<hanabi_learning_env::HanabiVecEnv*>(vec_env->vec_env)
+      ->ObservationLength();
+}
+
+void VecEnvGetState(pyhanabi_vec_env_t* vec_env, int index,
+                    pyhanabi_state_t* state) {
+  REQUIRE(vec_env != nullptr);
+  REQUIRE(vec_env->vec_env != nullptr);
+  REQUIRE(state != nullptr);
+  // The state is borrowed, and only valid until the next reset or step.
+  state->state = const_cast<hanabi_learning_env::HanabiState*>(
+      &reinterpret_cast<hanabi_learning_env::HanabiVecEnv*>(vec_env->vec_env)
+           ->State(index));
+}
+
+void VecEnvReset(pyhanabi_vec_env_t* vec_env, uint8_t* observations,
+                 uint8_t* legal_moves, int32_t* cur_players) {
+  REQUIRE(vec_env != nullptr);
+  REQUIRE(vec_env->vec_env != nullptr);
+  reinterpret_cast<hanabi_learning_env::HanabiVecEnv*>(vec_env->vec_env)
+      ->Reset(observations, legal_moves, cur_players);
+}
+
+void VecEnvStep(pyhanabi_vec_env_t* vec_env, const int32_t* actions,
+                uint8_t* observations, uint8_t* legal_moves, float* rewards,
+                uint8_t* dones, int32_t* cur_players) {
+  REQUIRE(vec_env != nullptr);
+  REQUIRE(vec_env->vec_env != nullptr);
+  reinterpret_cast<hanabi_learning_env::HanabiVecEnv*>(vec_env->vec_env)
+      ->Step(actions, observations, legal_moves, rewards, dones, cur_players);
+}
+
+/* Wrapper definitions for rollouts. */
+int MaxGameLength(pyhanabi_game_t* game) {
+  REQUIRE(game != nullptr);
+  REQUIRE(game->game != nullptr);
+  return hanabi_learning_env::MaxGameLength(
+      *reinterpret_cast<hanabi_learning_env::HanabiGame*>(game->game));
+}
+
+void PlayRollouts(pyhanabi_game_t* game, int policy, uint64_t first_episode,
+                  int num_games, int32_t* scores, int32_t* lengths,
+                  uint8_t* traces, int trace_length) {
+  REQUIRE(game != nullptr);
+  REQUIRE(game->game != nullptr);
+  hanabi_learning_env::PlayRollouts(
+      reinterpret_cast<hanabi_learning_env::HanabiGame*>(game->game),
+      NewRolloutPolicy(policy).get(), first_episode, num_games, scores, lengths,
+      traces, trace_length);
+}
+
+int StateRollout(pyhanabi_state_t* state, int policy, uint64_t policy_stream) {
+  REQUIRE(state != nullptr);
+  REQUIRE(state->state != nullptr);
+  auto hanabi_state =
+      reinterpret_cast<hanabi_learning_env::HanabiState*>(state->state);
+  hanabi_learning_env::CounterRng rng = hanabi_learning_env::PolicyRng(
+      *hanabi_state->ParentGame(), policy_stream);
+  return hanabi_learning_env::Rollout(hanabi_state,
+                                      NewRolloutPolicy(policy).get(), &rng)
+      .score;
+}
+
+/* Wrapper definitions for hand sampling. */
+void ObsSampleHands(pyhanabi_observation_t* observation, int num_samples,
+                    uint64_t seed, uint8_t* hands) {
+  REQUIRE(observation != nullptr);
+  REQUIRE(observation->observation != nullptr);
+  REQUIRE(num_samples >= 0);
+  REQUIRE(hands != nullptr || num_samples == 0);
+  auto obs = reinterpret_cast<hanabi_learning_env::HanabiObservation*>(
+      observation->observation);
+  int num_ranks = obs->ParentGame()->NumRanks();
+  hanabi_learning_env::HandSampler sampler(*obs);
+  std::vector<hanabi_learning_env::HanabiCard> hand;
+  for (int i = 0; i < num_samples; ++i) {
+    hanabi_learning_env::CounterRng rng(seed, i);
+    sampler.Sample(&rng, &hand);
+    uint8_t* row = hands + static_cast<size_t>(i) * sampler.HandSize();
+    for (int j = 0; j < hand.size(); ++j) {
+      row[j] = hand[j].Color() * num_ranks + hand[j].Rank();
+    }
+  }
+}
+
+bool StateDeterminize(pyhanabi_state_t* state, int player,
+                      const uint8_t* hand, uint64_t rng_stream,
+                      pyhanabi_state_t* determinized) {
+  REQUIRE(state != nullptr);
+  REQUIRE(state->state != nullptr);
+  REQUIRE(determinized != nullptr);
+  auto hanabi_state =
+      reinterpret_cast<hanabi_learning_env::HanabiState*>(state->state);
+  REQUIRE(player >= 0 && player < hanabi_state->ParentGame()->NumPlayers());
+  int num_ranks = hanabi_state->ParentGame()->NumRanks();
+  int num_cards = hanabi_state->ParentGame()->NumColors() * num_ranks;
+  int hand_size = hanabi_state->Hands()[player].Cards().size();
+  REQUIRE(hand != nullptr || hand_size == 0);
+  determinized->state = nullptr;
+  std::vector<hanabi_learning_env::HanabiCard> cards;
+  for (int i = 0; i < hand_size; ++i) {
+    if (hand[i] >= num_cards) {
+      return false;
+    }
+    cards.emplace_back(hand[i] / num_ranks, hand[i] % num_ranks);
+  }
+  hanabi_learning_env::HanabiState result(*hanabi_state);
+  if (!hanabi_learning_env::Determinize(*hanabi_state, player, cards,
+                                        rng_stream, &result)) {
+    return false;
+  }
+  determinized->state = new hanabi_learning_env::HanabiState(result);
+  return true;
+}
+
 } /* extern "C" */
@@ -21,6 +21,8 @@
  * The set of functions below is referred to as the 'cdef' throughout the code.
  */
 
+#include <stdint.h>
+
 extern "C" {
 
 typedef struct PyHanabiCard {
@@ -63,6 +65,72 @@ typedef struct PyHanabiObservationEncoder {
   void* encoder;
 } pyhanabi_observation_encoder_t;
 
+/* Bounds on game parameters, used to size the fixed-layout structs below. */
+#define PYHANABI_MAX_PLAYERS 5
+#define PYHANABI_MAX_COLORS 5
+#define PYHANABI_MAX_RANKS 5
+#define PYHANABI_MAX_HAND_SIZE 8
+#define PYHANABI_MAX_DECK_SIZE 50
+/* Moves since the observer last acted: one move and one deal per player. */
+#define PYHANABI_MAX_LAST_MOVES 10
+/* 2 * MAX_HAND_SIZE + (MAX_PLAYERS - 1) * (MAX_COLORS + MAX_RANKS). */
+#define PYHANABI_MAX_MOVES 56
+
+typedef struct PyHanabiMoveData {
+  int type;
+  int card_index;
+  int target_offset;
+  int color;
+  int rank;
+} pyhanabi_move_data_t;
+
+typedef struct PyHanabiHistoryItemData {
+  pyhanabi_move_data_t move;
+  int player;
+  int scored;
+  int information_token;
+  int color;
+  int rank;
+  int reveal_bitmask;
+  int newly_revealed_bitmask;
+  int deal_to_player;
+} pyhanabi_history_item_data_t;
+
+/* Contents of a hanabi_learning_env::HanabiObservation, filled in one call.
+ * Players are indexed relative to the observer, and only the first
+ * num_players / hand_size / ..._size entries of each array are set. */
+typedef struct PyHanabiObservationData {
+  int cur_player_offset;
+  int num_players;
+  int num_colors;
+  int information_tokens;
+  int life_tokens;
+  int deck_size;
+  int fireworks[PYHANABI_MAX_COLORS];
+  int hand_size[PYHANABI_MAX_PLAYERS];
+  /* Cards are color = rank = -1 when not visible to the observer. */
+  pyhanabi_card_t hands[PYHANABI_MAX_PLAYERS][PYHANABI_MAX_HAND_SIZE];
+  /* Hinted color and rank of each card, or -1 if not hinted. */
+  int known_color[PYHANABI_MAX_PLAYERS][PYHANABI_MAX_HAND_SIZE];
+  int known_rank[PYHANABI_MAX_PLAYERS][PYHANABI_MAX_HAND_SIZE];
+  /* Bit c (r) is set if color c (rank r) is plausible for the card. */
+  int color_plausible[PYHANABI_MAX_PLAYERS][PYHANABI_MAX_HAND_SIZE];
+  int rank_plausible[PYHANABI_MAX_PLAYERS][PYHANABI_MAX_HAND_SIZE];
+  int discard_pile_size;
+  pyhanabi_card_t discard_pile[PYHANABI_MAX_DECK_SIZE];
+  /* Ordered from most recent to oldest, as ObsGetLastMove. */
+  int num_last_moves;
+  pyhanabi_history_item_data_t last_moves[PYHANABI_MAX_LAST_MOVES];
+  int num_legal_moves;
+  pyhanabi_move_data_t legal_moves[PYHANABI_MAX_MOVES];
+  int legal_move_uids[PYHANABI_MAX_MOVES];
+} pyhanabi_observation_data_t;
+
+typedef struct PyHanabiVecEnv {
+  /* Points to a hanabi_learning_env::HanabiVecEnv. */
+  void* vec_env;
+} pyhanabi_vec_env_t;
+
 /* Utility Functions. */
 void DeleteString(char* str);
 
@@ -98,6 +166,8 @@ bool GetRevealRankMove(int target_offset, int rank, pyhanabi_move_t* move);
 void DeleteHistoryItem(pyhanabi_history_item_t* item);
 char* HistoryItemToString(pyhanabi_history_item_t* item);
 void HistoryItemMove(pyhanabi_history_item_t* item, pyhanabi_move_t* move);
+/* Returns the uid of the move of item in game, or -1 for a chance outcome. */
+int HistoryItemMoveUid(pyhanabi_history_item_t* item, pyhanabi_game_t* game);
 int HistoryItemPlayer(pyhanabi_history_item_t* item);
 int HistoryItemScored(pyhanabi_history_item_t* item);
 int HistoryItemInformationToken(pyhanabi_history_item_t* item);
@@ -109,12 +179,27 @@ int HistoryItemDealToPlayer(pyhanabi_history_item_t* item);
 
 /* State functions. */
 void NewState(pyhanabi_game_t* game, pyhanabi_state_t* state);
+/* New state dealing from its own random stream, see HanabiState. */
+void NewStateWithRngStream(pyhanabi_game_t* game, uint64_t rng_stream,
+                           pyhanabi_state_t* state);
 void CopyState(const pyhanabi_state_t* src, pyhanabi_state_t* dest);
 void DeleteState(pyhanabi_state_t* state);
+/* Returns a buffer of *length bytes, to be freed with DeleteString. */
+char* StateSerialize(pyhanabi_state_t* state, int* length);
+/* Returns false, leaving state->state NULL, if data is not a serialized
+ * state of game. */
+bool StateDeserialize(pyhanabi_game_t* game, const char* data, int length,
+                      pyhanabi_state_t* state);
 const void* StateParentGame(pyhanabi_state_t* state);
 void StateApplyMove(pyhanabi_state_t* state, pyhanabi_move_t* move);
+int StateNumUndoableMoves(pyhanabi_state_t* state);
+void StateUndoMove(pyhanabi_state_t* state);
 int StateCurPlayer(pyhanabi_state_t* state);
 void StateDealRandomCard(pyhanabi_state_t* state);
+void StateResolveChance(pyhanabi_state_t* state);
+bool StateHasRngStream(pyhanabi_state_t* state);
+uint64_t StateRngStream(pyhanabi_state_t* state);
+void StateSetRngStream(pyhanabi_state_t* state, uint64_t rng_stream);
 int StateDeckSize(pyhanabi_state_t* state);
 int StateFireworks(pyhanabi_state_t* state, int color);
 int StateDiscardPileSize(pyhanabi_state_t* state);
@@ -132,15 +217,27 @@ char* StateToString(pyhanabi_state_t* state);
 bool MoveIsLegal(const pyhanabi_state_t* state, const pyhanabi_move_t* move);
 bool CardPlayableOnFireworks(const pyhanabi_state_t* state, int color,
                              int rank);
+/* Writes StateMaxMoves() entries to mask, 1 for each legal move uid. */
+int StateMaxMoves(pyhanabi_state_t* state);
+void StateLegalMovesMask(pyhanabi_state_t* state, uint8_t* mask);
+/* Writes up to StateMaxMoves() legal move uids, returning how many. */
+int StateLegalMoveUids(pyhanabi_state_t* state, int32_t* uids);
 int StateLenMoveHistory(pyhanabi_state_t* state);
 void StateGetMoveHistory(pyhanabi_state_t* state, int index,
                          pyhanabi_history_item_t* item);
+/* Writes all StateLenMoveHistory() items, oldest first, in a single pass.
+ * Each is to be freed with DeleteHistoryItem. */
+void StateGetMoveHistoryItems(pyhanabi_state_t* state,
+                              pyhanabi_history_item_t* items);
 
 /* Game functions. */
 void DeleteGame(pyhanabi_game_t* game);
 void NewDefaultGame(pyhanabi_game_t* game);
 void NewGame(pyhanabi_game_t* game, int list_length, const char** param_list);
 char* GameParamString(pyhanabi_game_t* game);
+char* GameRngState(pyhanabi_game_t* game);
+/* Returns false if rng_state was not written by GameRngState. */
+bool GameSetRngState(pyhanabi_game_t* game, const char* rng_state);
 int NumPlayers(pyhanabi_game_t* game);
 int NumColors(pyhanabi_game_t* game);
 int NumRanks(pyhanabi_game_t* game);
@@ -151,7 +248,12 @@ int ObservationType(pyhanabi_game_t* game);
 int NumCards(pyhanabi_game_t* game, int color, int rank);
 int GetMoveUid(pyhanabi_game_t* game, pyhanabi_move_t* move);
 void GetMoveByUid(pyhanabi_game_t* game, int move_uid, pyhanabi_move_t* move);
+/* Points move at the game's own move with move_uid, instead of a new copy.
+ * It stays valid while game exists, and must not be passed to DeleteMove. */
+void GameSharedMove(pyhanabi_game_t* game, int move_uid, pyhanabi_move_t* move);
 int MaxMoves(pyhanabi_game_t* game);
+/* Writes MaxMoves(game) entries, the move with each uid. */
+void GameMoveTable(pyhanabi_game_t* game, pyhanabi_move_data_t* moves);
 
 /* Observation functions. */
 void NewObservation(pyhanabi_state_t* state, int player,
@@ -180,6 +282,12 @@ void ObsGetLegalMove(pyhanabi_observation_t* observation, int index,
                      pyhanabi_move_t* move);
 bool ObsCardPlayableOnFireworks(const pyhanabi_observation_t* observation,
                                 int color, int rank);
+void ObsGetData(pyhanabi_observation_t* observation,
+                pyhanabi_observation_data_t* data);
+/* As the StateLegalMoves functions, for the observing player. */
+int ObsMaxMoves(pyhanabi_observation_t* observation);
+void ObsLegalMovesMask(pyhanabi_observation_t* observation, uint8_t* mask);
+int ObsLegalMoveUids(pyhanabi_observation_t* observation, int32_t* uids);
 
 /* ObservationEncoder functions. */
 void NewObservationEncoder(pyhanabi_observation_encoder_t* encoder,
@@ -188,6 +296,65 @@ void DeleteObservationEncoder(pyhanabi_observation_encoder_t* encoder);
 char* ObservationShape(pyhanabi_observation_encoder_t* encoder);
 char* EncodeObservation(pyhanabi_observation_encoder_t* encoder,
                         pyhanabi_observation_t* observation);
+int ObservationLength(pyhanabi_observation_encoder_t* encoder);
+/* Writes ObservationLength() entries to encoding. */
+void EncodeObservationInto(pyhanabi_observation_encoder_t* encoder,
+                           pyhanabi_observation_t* observation,
+                           uint8_t* encoding);
+/* As EncodeObservationInto, but with the bits packed eight to a byte,
+ * most significant bit first as numpy.packbits, into
+ * (ObservationLength() + 7) / 8 bytes of packed. The encoder must be
+ * canonical. */
+void EncodeObservationPackedInto(pyhanabi_observation_encoder_t* encoder,
+                                 pyhanabi_observation_t* observation,
+                                 uint8_t* packed);
+/* Writes one row of ObservationLength() entries per observation. */
+void EncodeObservationsInto(pyhanabi_observation_encoder_t* encoder,
+                            int num_observations,
+                            pyhanabi_observation_t* observations,
+                            uint8_t* encoding);
+
+/* VecEnv functions. */
+/* Output buffers hold one row per environment, and may be NULL. */
+void NewVecEnv(pyhanabi_vec_env_t* vec_env, pyhanabi_game_t* game,
+               pyhanabi_observation_encoder_t* encoder, int num_envs,
+               uint64_t first_episode, bool verify_encoding);
+void DeleteVecEnv(pyhanabi_vec_env_t* vec_env);
+int VecEnvNumEnvs(pyhanabi_vec_env_t* vec_env);
+int VecEnvObservationLength(pyhanabi_vec_env_t* vec_env);
+void VecEnvGetState(pyhanabi_vec_env_t* vec_env, int index,
+                    pyhanabi_state_t* state);
+void VecEnvReset(pyhanabi_vec_env_t* vec_env, uint8_t* observations,
+                 uint8_t* legal_moves, int32_t* cur_players);
+void VecEnvStep(pyhanabi_vec_env_t* vec_env, const int32_t* actions,
+                uint8_t* observations, uint8_t* legal_moves, float* rewards,
+                uint8_t* dones, int32_t* cur_players);
+
+/* Rollout functions. policy is a RolloutPolicy::Type of hanabi_rollout.h. */
+/* Upper bound on the number of player moves in a game. */
+int MaxGameLength(pyhanabi_game_t* game);
+/* Plays num_games games, numbered from first_episode. Output buffers hold one
+ * row per game and may be NULL. traces rows hold the uids of the first
+ * trace_length moves of each game. */
+void PlayRollouts(pyhanabi_game_t* game, int policy, uint64_t first_episode,
+                  int num_games, int32_t* scores, int32_t* lengths,
+                  uint8_t* traces, int trace_length);
+/* Plays state to the end in place, with policy drawing from random stream
+ * policy_stream, and returns the score. */
+int StateRollout(pyhanabi_state_t* state, int policy, uint64_t policy_stream);
+
+/* Hand sampling functions. Cards are indexed by color * num_ranks + rank. */
+/* Samples num_samples hands of the observing player, given observation (see
+ * HandSampler), into hands rows of ObsGetHandSize(observation, 0) cards.
+ * Sample i draws from random stream i of key seed. */
+void ObsSampleHands(pyhanabi_observation_t* observation, int num_samples,
+                    uint64_t seed, uint8_t* hands);
+/* Makes determinized a copy of state in which player holds hand, and which
+ * deals further cards from random stream rng_stream. Returns false, leaving
+ * determinized->state NULL, if the cards of hand are not available. */
+bool StateDeterminize(pyhanabi_state_t* state, int player,
+                      const uint8_t* hand, uint64_t rng_stream,
+                      pyhanabi_state_t* determinized);
 
 } /* extern "C" */
 
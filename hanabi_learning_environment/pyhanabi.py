@@ -13,10 +13,12 @@
 # limitations under the License.
 
 """Python interface to Hanabi code."""
+import contextlib
 import os
 import re
 import cffi
 import enum
+import functools
 import sys
 
 DEFAULT_CDEF_PREFIXES = (None, ".", os.path.dirname(__file__), "/include")
@@ -26,10 +28,17 @@ PYHANABI_LIB = ["libpyhanabi.so", "libpyhanabi.dylib"]
 COLOR_CHAR = ["R", "Y", "G", "W", "B"]  # consistent with hanabi_lib/util.cc
 CHANCE_PLAYER_ID = -1
 
-ffi = cffi.FFI()
-lib = None
-cdef_loaded_flag = False
-lib_loaded_flag = False
+try:
+  # Compiled at build time from pyhanabi.h by pyhanabi_build.py, if possible.
+  # It needs neither try_cdef() nor try_load().
+  from hanabi_learning_environment._pyhanabi_cffi import ffi, lib
+  cdef_loaded_flag = True
+  lib_loaded_flag = True
+except ImportError:
+  ffi = cffi.FFI()
+  lib = None
+  cdef_loaded_flag = False
+  lib_loaded_flag = False
 
 
 if sys.version_info < (3,):
@@ -42,6 +51,8 @@ else:
 def try_cdef(header=PYHANABI_HEADER, prefixes=DEFAULT_CDEF_PREFIXES):
   """Try parsing library header file. Must be called before any pyhanabi calls.
 
+  Does nothing if the compiled _pyhanabi_cffi module was imported.
+
   Args:
     header: filename of pyhanabi header file.
     prefixes: list of paths to search for pyhanabi header file.
@@ -77,6 +88,8 @@ def try_cdef(header=PYHANABI_HEADER, prefixes=DEFAULT_CDEF_PREFIXES):
 def try_load(library=None, prefixes=DEFAULT_LIB_PREFIXES):
   """Try loading library. Must be called before any pyhanabi calls.
 
+  Does nothing if the compiled _pyhanabi_cffi module was imported.
+
   Args:
     library: filename of pyhanabi library file.
     prefixes: list of paths to search for pyhanabi library file.
@@ -162,6 +175,9 @@ class HanabiCard(object):
   def __init__(self, color, rank):
     """A simple HanabiCard object.
 
+    Cards returned by states and observations are shared between calls, and
+    must not be modified.
+
     Args:
       color: an integer, starting at 0. Colors are in this order RYGWB.
       rank: an integer, starting at 0 (representing a 1 card). In the standard
@@ -188,6 +204,9 @@ class HanabiCard(object):
   def __eq__(self, other):
     return self._color == other.color() and self._rank == other.rank()
 
+  def __hash__(self):
+    return hash((self._color, self._rank))
+
   def valid(self):
     return self._color >= 0 and self._rank >= 0
 
@@ -200,6 +219,18 @@ class HanabiCard(object):
     return {"color": color_idx_to_char(self.color()), "rank": self.rank()}
 
 
+_CARDS = {}
+
+
+def _card(color, rank):
+  """Returns the shared HanabiCard of color and rank, creating it once."""
+  try:
+    return _CARDS[color, rank]
+  except KeyError:
+    card = _CARDS[color, rank] = HanabiCard(color, rank)
+    return card
+
+
 class HanabiCardKnowledge(object):
   """Accumulated knowledge about color and rank of an initially unknown card.
 
@@ -296,12 +327,26 @@ class HanabiMoveType(enum.IntEnum):
 class HanabiMove(object):
   """Description of an agent move or chance event.
 
+  Moves are immutable. Those returned by HanabiGame.get_move(), and by the
+  legal_moves() and move history methods, are shared per game and uid.
+
   Python wrapper of C++ HanabiMove class.
   """
 
-  def __init__(self, move):
+  def __init__(self, move, game=None):
+    """Wraps a pyhanabi_move_t.
+
+    Args:
+      move: pyhanabi_move_t*, a move created by the library, which this object
+        takes ownership of and deletes when collected.
+      game: HanabiGame, or None. If given, move points into the game's own
+        moves instead, and is neither owned nor deleted.
+    """
     assert move is not None
+    if game is None:
+      move = ffi.gc(move, lib.DeleteMove)
     self._move = move
+    self._game = game
 
   @property
   def c_move(self):
@@ -361,12 +406,6 @@ class HanabiMove(object):
   def __repr__(self):
     return self.__str__()
 
-  def __del__(self):
-    if self._move is not None:
-      lib.DeleteMove(self._move)
-      self._move = None
-    del self
-
   def to_dict(self):
     """Serialize to dict.
 
@@ -395,6 +434,35 @@ class HanabiMove(object):
 
     return move_dict
 
+  @staticmethod
+  def data_to_dict(move_data):
+    """Serialize a pyhanabi_move_data_t to the same dict as to_dict().
+
+    Args:
+      move_data: pyhanabi_move_data_t, e.g. from HanabiObservation.snapshot().
+
+    Raises:
+      ValueError: If move type is not supported.
+    """
+    move_dict = {}
+    move_type = HanabiMoveType(move_data.type)
+    move_dict["action_type"] = move_type.name
+    if move_type == HanabiMoveType.PLAY or move_type == HanabiMoveType.DISCARD:
+      move_dict["card_index"] = move_data.card_index
+    elif move_type == HanabiMoveType.REVEAL_COLOR:
+      move_dict["target_offset"] = move_data.target_offset
+      move_dict["color"] = color_idx_to_char(move_data.color)
+    elif move_type == HanabiMoveType.REVEAL_RANK:
+      move_dict["target_offset"] = move_data.target_offset
+      move_dict["rank"] = move_data.rank
+    elif move_type == HanabiMoveType.DEAL:
+      move_dict["color"] = color_idx_to_char(move_data.color)
+      move_dict["rank"] = move_data.rank
+    else:
+      raise ValueError("Unsupported move: {}".format(move_type))
+
+    return move_dict
+
 
 class HanabiHistoryItem(object):
   """A move that has been made within a game, along with the side-effects.
@@ -407,10 +475,22 @@ class HanabiHistoryItem(object):
   Python wrapper of C++ HanabiHistoryItem class.
   """
 
-  def __init__(self, item):
+  def __init__(self, item, game=None):
+    """Wraps a pyhanabi_history_item_t.
+
+    Args:
+      item: pyhanabi_history_item_t*, owned by this object.
+      game: HanabiGame of the item, or None. If given, move() returns the
+        game's shared moves.
+    """
     self._item = item
+    self._game = game
 
   def move(self):
+    if self._game is not None:
+      uid = lib.HistoryItemMoveUid(self._item, self._game.c_game)
+      if uid >= 0:
+        return self._game.get_move(uid)
     c_move = ffi.new("pyhanabi_move_t*")
     lib.HistoryItemMove(self._item, c_move)
     return HanabiMove(c_move)
@@ -492,6 +572,35 @@ class HanabiEndOfGameType(enum.IntEnum):
   COMPLETED_FIREWORKS = 3
 
 
+class RolloutPolicyType(enum.IntEnum):
+  """Built-in native rollout policies, consistent with hanabi_rollout.h."""
+  # Uniformly random legal moves.
+  RANDOM = 0
+  # The rules of agents.simple_agent.SimpleAgent.
+  SIMPLE = 1
+
+
+def _cached_view(copy=None):
+  """Decorates a HanabiState view method to reuse its result until mutation.
+
+  Args:
+    copy: function returning a copy of a cached result, so callers modifying
+      their result do not corrupt the cache, or None for immutable results.
+  """
+  def decorator(method):
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self):
+      try:
+        value = self._views[name]
+      except KeyError:
+        value = self._views[name] = method(self)
+      return value if copy is None else copy(value)
+    return wrapper
+  return decorator
+
+
 class HanabiState(object):
   """Current environment state for an active Hanabi game.
 
@@ -500,36 +609,153 @@ class HanabiState(object):
   by cur_player() returning CHANCE_PLAYER_ID).
 
   Python wrapper of C++ HanabiState class.
+
+  Derived views such as fireworks() and legal_moves() are computed once per
+  version of the state, and reused until a move is applied or undone. The
+  state must therefore only be changed through its own methods.
   """
 
-  def __init__(self, game, c_state=None):
+  def __init__(self, game, c_state=None, episode=None):
     """Returns a new state.
 
     Args:
       game: HanabiGame describing the parameters for a game of Hanabi.
       c_state: C++ state to copy, or None for a new state.
+      episode: int >= 0, or None. If given, the new state deals cards (and
+        samples a random start player) from its own random stream, selected
+        by the game seed and episode, instead of the game's shared generator.
+        The game is then reproducible regardless of other states of game.
 
-    NOTE: If c_state is supplied, game is ignored and c_state game is used.
+    NOTE: If c_state is supplied, game must be the game of c_state, or None to
+    use the c_state game without keeping a reference to it.
     """
     self._state = ffi.new("pyhanabi_state_t*")
+    self._parent_game = game
+    self._version = 0
+    self._views = {}
     if c_state is None:
       self._game = game.c_game
-      lib.NewState(self._game, self._state)
+      if episode is None:
+        lib.NewState(self._game, self._state)
+      else:
+        lib.NewStateWithRngStream(self._game, episode, self._state)
     else:
-      self._game = lib.StateParentGame(c_state)
+      if game is None:
+        self._game = _borrowed_game(lib.StateParentGame(c_state))
+      else:
+        self._game = game.c_game
       lib.CopyState(c_state, self._state)
 
   def copy(self):
     """Returns a copy of the state."""
-    return HanabiState(None, self._state)
+    return HanabiState(self._parent_game, self._state)
+
+  def serialize(self):
+    """Returns the state as compact bytes, which deserialize() restores."""
+    length = ffi.new("int*")
+    c_data = lib.StateSerialize(self._state, length)
+    data = ffi.unpack(c_data, length[0])
+    lib.DeleteString(c_data)
+    return data
+
+  @staticmethod
+  def deserialize(game, data):
+    """Returns the state of game which serialize() encoded as data.
+
+    Raises:
+      ValueError: If data is not a state of game serialized by this version of
+        the library.
+    """
+    state = HanabiState.__new__(HanabiState)
+    state.__setstate__({"game": game, "state": data})
+    return state
+
+  def __getstate__(self):
+    game = self._parent_game
+    if game is None:
+      game = HanabiGame(_parameters(self._game))
+    return {"game": game, "state": self.serialize()}
+
+  def __setstate__(self, state):
+    self._parent_game = state["game"]
+    self._game = self._parent_game.c_game
+    self._state = ffi.new("pyhanabi_state_t*")
+    self._version = 0
+    self._views = {}
+    data = state["state"]
+    if not lib.StateDeserialize(self._game, data, len(data), self._state):
+      self._state = None
+      raise ValueError("Invalid serialized state for this game.")
+
+  def version(self):
+    """Returns a counter which changes whenever the state is mutated.
+
+    Useful for callers caching their own views of the state. Copies start
+    again from version 0.
+    """
+    return self._version
+
+  def _mutated(self):
+    """Bumps the version and drops the views cached for the old one."""
+    self._version += 1
+    self._views.clear()
 
   def observation(self, player):
     """Returns player's observed view of current environment state."""
-    return HanabiObservation(self._state, self._game, player)
+    return HanabiObservation(self._state, self._game, player,
+                             self._parent_game)
 
   def apply_move(self, move):
     """Advance the environment state by making move for acting player."""
     lib.StateApplyMove(self._state, move.c_move)
+    self._mutated()
+
+  def num_undoable_moves(self):
+    """Returns how many of the applied moves undo() can revert.
+
+    Moves applied before the state was copied cannot be undone.
+    """
+    return lib.StateNumUndoableMoves(self._state)
+
+  def undo(self):
+    """Reverts the most recently applied move, including card deals.
+
+    Raises:
+      ValueError: if there is no move to undo.
+    """
+    if lib.StateNumUndoableMoves(self._state) == 0:
+      raise ValueError("No move to undo.")
+    lib.StateUndoMove(self._state)
+    self._mutated()
+
+  @contextlib.contextmanager
+  def lookahead(self, move, deal_chance=True):
+    """Applies move for the duration of a with block, then reverts it.
+
+    A cheap alternative to copying the state to simulate a move:
+
+      with state.lookahead(move):
+        score = state.score()
+
+    Args:
+      move: HanabiMove, a legal move for the acting player.
+      deal_chance: bool, whether to also deal the cards which follow move.
+        Deals from the game's shared generator (see episode()) are not
+        rewound, and change the cards dealt later.
+
+    Yields:
+      The state itself, with move applied.
+    """
+    num_undoable = lib.StateNumUndoableMoves(self._state)
+    self.apply_move(move)
+    try:
+      if deal_chance:
+        self.resolve_chance()
+      yield self
+    finally:
+      while lib.StateNumUndoableMoves(self._state) > num_undoable:
+        lib.StateUndoMove(self._state)
+      self._mutated()
 
   def cur_player(self):
     """Returns index of next player to act.
@@ -542,15 +768,17 @@ class HanabiState(object):
     """Returns number of cards left in the deck."""
     return lib.StateDeckSize(self._state)
 
+  @_cached_view(copy=list)
   def discard_pile(self):
     """Returns a list of all discarded cards, in order they were discarded."""
     discards = []
     c_card = ffi.new("pyhanabi_card_t*")
     for index in range(lib.StateDiscardPileSize(self._state)):
       lib.StateGetDiscard(self._state, index, c_card)
-      discards.append(HanabiCard(c_card.color, c_card.rank))
+      discards.append(_card(c_card.color, c_card.rank))
     return discards
 
+  @_cached_view(copy=list)
   def fireworks(self):
     """Returns a list of fireworks levels by value, ordered by color (RYGWB).
 
@@ -567,7 +795,85 @@ class HanabiState(object):
   def deal_random_card(self):
     """If cur_player == CHANCE_PLAYER_ID, make a random card-deal move."""
     lib.StateDealRandomCard(self._state)
+    self._mutated()
+
+  def resolve_chance(self):
+    """Deals random cards until cur_player != CHANCE_PLAYER_ID.
+
+    Equivalent to calling deal_random_card() in a loop, in a single call.
+    """
+    lib.StateResolveChance(self._state)
+    self._mutated()
+
+  def rollout(self, policy=RolloutPolicyType.SIMPLE, policy_stream=0):
+    """Plays the game to the end in native code, and returns the score.
+
+    Every player's moves are chosen by policy, and cards are dealt as by
+    deal_random_card(). Copy the state first to keep it.
+
+    Args:
+      policy: RolloutPolicyType, the policy of all players.
+      policy_stream: int >= 0, the random stream random policies draw from.
+    """
+    score = lib.StateRollout(self._state, policy, policy_stream)
+    self._mutated()
+    return score
+
+  def determinize(self, player, hand, episode=0):
+    """Returns a copy of the state in which player holds hand instead.
+
+    Cards return to and are drawn from the deck as needed, and the deals of
+    player's cards in the move history are rewritten to match, so the copy is
+    a consistent game, which does not reveal the replaced cards. It deals
+    further cards from random stream episode. Moves before the change can not
+    be undone in the copy.
+
+    Args:
+      player: int, index of the player whose hand is replaced.
+      hand: sequence of card indices, color * num_ranks + rank, one per card
+        of player's hand, e.g. a row of HanabiObservation.sample_hands().
+      episode: int >= 0, random stream of the copy (see __init__).
+
+    Raises:
+      ValueError: If player is out of range, hand has the wrong length, or
+        holds cards which are not in the deck or player's hand, e.g. played,
+        discarded or held by another player.
+    """
+    if not 0 <= player < self.num_players():
+      raise ValueError("Expected player in [0, {}), got {}.".format(
+          self.num_players(), player))
+    hand_size = lib.StateGetHandSize(self._state, player)
+    if len(hand) != hand_size:
+      raise ValueError("Expected {} cards, got {}.".format(
+          hand_size, len(hand)))
+    state = HanabiState.__new__(HanabiState)
+    state._parent_game = self._parent_game
+    state._game = self._game
+    state._state = ffi.new("pyhanabi_state_t*")
+    state._version = 0
+    state._views = {}
+    if not lib.StateDeterminize(self._state, player,
+                                ffi.new("uint8_t[]", list(hand)), episode,
+                                state._state):
+      state._state = None
+      raise ValueError("Cards {} are not available to player {}.".format(
+          list(hand), player))
+    return state
+
+  def episode(self):
+    """Returns the random stream the state deals from, or None.
+
+    None means cards are dealt from the game's shared generator.
+    """
+    if not lib.StateHasRngStream(self._state):
+      return None
+    return lib.StateRngStream(self._state)
+
+  def set_episode(self, episode):
+    """Deal future cards from the start of random stream episode."""
+    lib.StateSetRngStream(self._state, episode)
 
+  @_cached_view(copy=lambda hands: [list(hand) for hand in hands])
   def player_hands(self):
     """Returns a list of all hands, with cards ordered oldest to newest."""
     hand_list = []
@@ -577,7 +883,7 @@ class HanabiState(object):
       hand_size = lib.StateGetHandSize(self._state, pid)
       for i in range(hand_size):
         lib.StateGetHandCard(self._state, pid, i, c_card)
-        player_hand.append(HanabiCard(c_card.color, c_card.rank))
+        player_hand.append(_card(c_card.color, c_card.rank))
       hand_list.append(player_hand)
     return hand_list
 
@@ -594,8 +900,12 @@ class HanabiState(object):
     return (lib.StateEndOfGameStatus(self._state) !=
             HanabiEndOfGameType.NOT_FINISHED)
 
+  @_cached_view(copy=list)
   def legal_moves(self):
     """Returns list of legal moves for currently acting player."""
+    if self._parent_game is not None:
+      get_move = self._parent_game.get_move
+      return [get_move(uid) for uid in self.legal_move_uids()]
     moves = []
     c_movelist = lib.StateLegalMoves(self._state)
     num_moves = lib.NumMoves(c_movelist)
@@ -606,6 +916,33 @@ class HanabiState(object):
     lib.DeleteMoveList(c_movelist)
     return moves
 
+  def legal_moves_mask(self, buffer=None):
+    """Returns legality of every move uid for the currently acting player.
+
+    Cheaper than legal_moves(), as no HanabiMove objects are created.
+
+    Args:
+      buffer: writable object supporting the buffer protocol with one byte per
+        move uid, e.g. a uint8 NumPy array of length game.max_moves(). If
+        None, a new bytearray is allocated.
+
+    Returns:
+      buffer, holding 1 for the uid of each legal move and 0 otherwise.
+    """
+    max_moves = lib.StateMaxMoves(self._state)
+    if buffer is None:
+      buffer = bytearray(max_moves)
+    lib.StateLegalMovesMask(self._state,
+                            _c_buffer("uint8_t[]", buffer, max_moves))
+    return buffer
+
+  @_cached_view(copy=list)
+  def legal_move_uids(self):
+    """Returns list of uids of the legal moves for currently acting player."""
+    uids = ffi.new("int32_t[]", lib.StateMaxMoves(self._state))
+    num_moves = lib.StateLegalMoveUids(self._state, uids)
+    return list(uids[0:num_moves])
+
   def move_is_legal(self, move):
     """Returns true if and only if move is legal for active agent."""
     return lib.MoveIsLegal(self._state, move.c_move)
@@ -627,6 +964,7 @@ class HanabiState(object):
     """Returns the number of players in the game."""
     return lib.StateNumPlayers(self._state)
 
+  @_cached_view()
   def score(self):
     """Returns the co-operative game score at a terminal state.
 
@@ -638,10 +976,12 @@ class HanabiState(object):
     """Returns list of moves made, from oldest to most recent."""
     history = []
     history_len = lib.StateLenMoveHistory(self._state)
+    c_items = ffi.new("pyhanabi_history_item_t[]", history_len)
+    lib.StateGetMoveHistoryItems(self._state, c_items)
     for i in range(history_len):
       c_history_item = ffi.new("pyhanabi_history_item_t*")
-      lib.StateGetMoveHistory(self._state, i, c_history_item)
-      history.append(HanabiHistoryItem(c_history_item))
+      c_history_item.item = c_items[i].item
+      history.append(HanabiHistoryItem(c_history_item, self._parent_game))
     return history
 
   def __str__(self):
@@ -676,6 +1016,25 @@ class AgentObservationType(enum.IntEnum):
   SEER = 2
 
 
+def _borrowed_game(c_game_ptr):
+  """Returns a pyhanabi_game_t for a C++ HanabiGame owned elsewhere."""
+  c_game = ffi.new("pyhanabi_game_t*")
+  c_game.game = ffi.cast("void*", c_game_ptr)
+  return c_game
+
+
+def _parameters(c_game):
+  """Returns dict of the parameters of a pyhanabi_game_t."""
+  c_string = lib.GameParamString(c_game)
+  string = encode_ffi_string(c_string)
+  lib.DeleteString(c_string)
+  params = {}
+  for line in string.splitlines():
+    key, value = line.split("=", 1)
+    params[key] = value
+  return params
+
+
 class HanabiGame(object):
   """Game parameters describing a specific instance of Hanabi.
 
@@ -699,6 +1058,7 @@ class HanabiGame(object):
     "random_start_player": boolean. If true, start with random player, not 0.
     "observation_type": int AgentObservationType.
     """
+    self._moves = None
     if params is None:
       self._game = ffi.new("pyhanabi_game_t*")
       lib.NewDefaultGame(self._game)
@@ -711,8 +1071,14 @@ class HanabiGame(object):
       self._game = ffi.new("pyhanabi_game_t*")
       lib.NewGame(self._game, len(param_list), c_array)
 
-  def new_initial_state(self):
-    return HanabiState(self)
+  def new_initial_state(self, episode=None):
+    """Returns the initial state of a new game.
+
+    Args:
+      episode: int >= 0, or None. If given, the cards dealt in the game are a
+        function of the game seed and episode only. See HanabiState.
+    """
+    return HanabiState(self, episode=episode)
 
   @property
   def c_game(self):
@@ -732,6 +1098,21 @@ class HanabiGame(object):
     lib.DeleteString(c_string)
     return string
 
+  def parameters(self):
+    """Returns dict of all parameter choices, with string values."""
+    return _parameters(self._game)
+
+  def __getstate__(self):
+    c_string = lib.GameRngState(self._game)
+    rng_state = encode_ffi_string(c_string)
+    lib.DeleteString(c_string)
+    return {"params": self.parameters(), "rng_state": rng_state}
+
+  def __setstate__(self, state):
+    self.__init__(state["params"])
+    if not lib.GameSetRngState(self._game, state["rng_state"].encode('ascii')):
+      raise ValueError("Invalid random number generator state.")
+
   def num_players(self):
     """Returns the number of players in the game."""
     return lib.NumPlayers(self._game)
@@ -769,6 +1150,10 @@ class HanabiGame(object):
     """Returns the number of possible legal moves in the game."""
     return lib.MaxMoves(self._game)
 
+  def max_game_length(self):
+    """Returns an upper bound on the number of player moves in a game."""
+    return lib.MaxGameLength(self._game)
+
   def num_cards(self, color, rank):
     """Returns number of instances of Card(color, rank) in the initial deck."""
     return lib.NumCards(self._game, color, rank)
@@ -778,10 +1163,36 @@ class HanabiGame(object):
     return lib.GetMoveUid(self._game, move.c_move)
 
   def get_move(self, move_uid):
-    """Returns a HanabiMove represented by 0 <= move_uid < max_moves()."""
-    move = ffi.new("pyhanabi_move_t*")
-    lib.GetMoveByUid(self._game, move_uid, move)
-    return HanabiMove(move)
+    """Returns a HanabiMove represented by 0 <= move_uid < max_moves().
+
+    The move is created on first use, and the same object is returned for
+    every later call with move_uid.
+
+    Raises:
+      ValueError: If move_uid is out of range.
+    """
+    if self._moves is None:
+      self._moves = [None] * self.max_moves()
+    if not 0 <= move_uid < len(self._moves):
+      raise ValueError("Expected move uid in [0, {}), got {}.".format(
+          len(self._moves), move_uid))
+    move = self._moves[move_uid]
+    if move is None:
+      c_move = ffi.new("pyhanabi_move_t*")
+      lib.GameSharedMove(self._game, move_uid, c_move)
+      move = self._moves[move_uid] = HanabiMove(c_move, self)
+    return move
+
+  def move_table(self):
+    """Returns every move of the game, indexed by uid, in a single call.
+
+    Returns:
+      pyhanabi_move_data_t array of length max_moves(), see pyhanabi.h. Entries
+      are as HanabiMove.data_to_dict expects.
+    """
+    moves = ffi.new("pyhanabi_move_data_t[]", self.max_moves())
+    lib.GameMoveTable(self._game, moves)
+    return moves
 
 
 class HanabiObservation(object):
@@ -795,10 +1206,11 @@ class HanabiObservation(object):
   Python wrapper of C++ HanabiObservation class.
   """
 
-  def __init__(self, state, game, player):
+  def __init__(self, state, game, player, parent_game=None):
     """Construct using HanabiState.observation(player)."""
     self._observation = ffi.new("pyhanabi_observation_t*")
     self._game = game
+    self._parent_game = parent_game
     lib.NewObservation(state, player, self._observation)
 
   def __str__(self):
@@ -828,6 +1240,19 @@ class HanabiObservation(object):
     """Returns the number of players in the game."""
     return lib.ObsNumPlayers(self._observation)
 
+  def snapshot(self):
+    """Returns the whole observation, read from C++ in a single call.
+
+    Cheaper than calling the individual accessors when most of the
+    observation is needed.
+
+    Returns:
+      pyhanabi_observation_data_t, see pyhanabi.h for the layout.
+    """
+    data = ffi.new("pyhanabi_observation_data_t*")
+    lib.ObsGetData(self._observation, data)
+    return data
+
   def observed_hands(self):
     """Returns a list of all hands, with cards ordered oldest to newest.
 
@@ -840,7 +1265,7 @@ class HanabiObservation(object):
       hand_size = lib.ObsGetHandSize(self._observation, pid)
       for i in range(hand_size):
         lib.ObsGetHandCard(self._observation, pid, i, c_card)
-        player_hand.append(HanabiCard(c_card.color, c_card.rank))
+        player_hand.append(_card(c_card.color, c_card.rank))
       hand_list.append(player_hand)
     return hand_list
 
@@ -868,7 +1293,7 @@ class HanabiObservation(object):
     c_card = ffi.new("pyhanabi_card_t*")
     for index in range(lib.ObsDiscardPileSize(self._observation)):
       lib.ObsGetDiscard(self._observation, index, c_card)
-      discards.append(HanabiCard(c_card.color, c_card.rank))
+      discards.append(_card(c_card.color, c_card.rank))
     return discards
 
   def fireworks(self):
@@ -894,7 +1319,7 @@ class HanabiObservation(object):
     for i in range(lib.ObsNumLastMoves(self._observation)):
       history_item = ffi.new("pyhanabi_history_item_t*")
       lib.ObsGetLastMove(self._observation, i, history_item)
-      history_items.append(HanabiHistoryItem(history_item))
+      history_items.append(HanabiHistoryItem(history_item, self._parent_game))
     return history_items
 
   def information_tokens(self):
@@ -910,6 +1335,9 @@ class HanabiObservation(object):
 
     List is empty if cur_player() != 0 (observer is not currently acting).
     """
+    if self._parent_game is not None:
+      get_move = self._parent_game.get_move
+      return [get_move(uid) for uid in self.legal_move_uids()]
     moves = []
     for i in range(lib.ObsNumLegalMoves(self._observation)):
       move = ffi.new("pyhanabi_move_t*")
@@ -917,6 +1345,49 @@ class HanabiObservation(object):
       moves.append(HanabiMove(move))
     return moves
 
+  def legal_moves_mask(self, buffer=None):
+    """Returns legality of every move uid for observing player.
+
+    All entries are 0 if cur_player() != 0. See HanabiState.legal_moves_mask.
+    """
+    max_moves = lib.ObsMaxMoves(self._observation)
+    if buffer is None:
+      buffer = bytearray(max_moves)
+    lib.ObsLegalMovesMask(self._observation,
+                          _c_buffer("uint8_t[]", buffer, max_moves))
+    return buffer
+
+  def legal_move_uids(self):
+    """Returns list of uids of the legal moves for observing player."""
+    uids = ffi.new("int32_t[]", lib.ObsMaxMoves(self._observation))
+    num_moves = lib.ObsLegalMoveUids(self._observation, uids)
+    return list(uids[0:num_moves])
+
+  def sample_hands(self, num_samples, seed=0, buffer=None):
+    """Returns samples of the observing player's own hand.
+
+    Hidden cards are drawn as if the unseen cards (those not in the discard
+    pile, fireworks or other hands) were dealt at random, conditioned on the
+    card knowledge of each slot. Visible cards are kept. Sample i depends only
+    on seed and i, so samples are reproducible.
+
+    Args:
+      num_samples: int, number of hands to sample.
+      seed: int >= 0, random key of the samples.
+      buffer: writable buffer of num_samples x hand size uint8 entries, e.g. a
+        contiguous NumPy array, or None to allocate a bytearray.
+
+    Returns:
+      buffer, holding one hand per row as card indices, color * num_ranks +
+      rank, ordered as the hand. See HanabiState.determinize().
+    """
+    length = num_samples * lib.ObsGetHandSize(self._observation, 0)
+    if buffer is None:
+      buffer = bytearray(length)
+    lib.ObsSampleHands(self._observation, num_samples, seed,
+                       _c_buffer("uint8_t[]", buffer, length))
+    return buffer
+
   def card_playable_on_fireworks(self, color, rank):
     """Returns true if and only if card can be successfully played.
 
@@ -930,6 +1401,9 @@ class HanabiObservation(object):
 class ObservationEncoderType(enum.IntEnum):
   """Encoder types, consistent with observation_encoder.h."""
   CANONICAL = 0
+  # Small integer features, e.g. card ids and token counts, rather than bits.
+  # See compact_encoders.h for the layout.
+  COMPACT = 1
 
 
 class ObservationEncoder(object):
@@ -943,6 +1417,7 @@ class ObservationEncoder(object):
   def __init__(self, game, enc_type=ObservationEncoderType.CANONICAL):
     """Construct using HanabiState.observation(player)."""
     self._game = game.c_game
+    self._type = ObservationEncoderType(enc_type)
     self._encoder = ffi.new("pyhanabi_observation_encoder_t*")
     lib.NewObservationEncoder(self._encoder, self._game, enc_type)
 
@@ -953,6 +1428,15 @@ class ObservationEncoder(object):
       self._game = None
     del self
 
+  @property
+  def c_encoder(self):
+    """Return the C++ ObservationEncoder object."""
+    return self._encoder
+
+  def type(self):
+    """Returns the ObservationEncoderType of this encoder."""
+    return self._type
+
   def shape(self):
     c_shape_str = lib.ObservationShape(self._encoder)
     shape_string = encode_ffi_string(c_shape_str)
@@ -960,16 +1444,236 @@ class ObservationEncoder(object):
     shape = [int(x) for x in shape_string.split(",")]
     return shape
 
+  def observation_length(self):
+    """Returns the number of entries in a single encoded observation."""
+    return lib.ObservationLength(self._encoder)
+
   def encode(self, observation):
-    """Encode the observation as a sequence of bits."""
-    c_encoding_str = lib.EncodeObservation(self._encoder,
-                                           observation.observation())
-    encoding_string = encode_ffi_string(c_encoding_str)
-    lib.DeleteString(c_encoding_str)
-    # Canonical observations are bit strings, so it is ok to encode using a
-    # string. For float or double observations, make a custom object
-    encoding = [int(x) for x in encoding_string.split(",")]
-    return encoding
+    """Encode the observation as a sequence of bits, or small integers."""
+    # Canonical observations are bits, and compact ones at most 255, so they
+    # fit in a byte each. For float or double observations, make a custom
+    # object.
+    encoding = self.encode_into(observation,
+                                bytearray(self.observation_length()))
+    return list(encoding)
+
+  def encode_into(self, observation, buffer):
+    """Encode the observation directly into a writable buffer.
+
+    Args:
+      observation: A HanabiObservation.
+      buffer: writable object supporting the buffer protocol with
+        observation_length() bytes, e.g. a contiguous uint8 NumPy array or a
+        row of one.
+
+    Returns:
+      buffer, holding the bits of the encoded observation.
+    """
+    lib.EncodeObservationInto(
+        self._encoder, observation.observation(),
+        _c_buffer("uint8_t[]", buffer, self.observation_length()))
+    return buffer
+
+  def packed_length(self):
+    """Returns the number of bytes of a single packed encoded observation."""
+    return (self.observation_length() + 7) // 8
+
+  def encode_packed(self, observation, buffer=None):
+    """Encode the observation with its bits packed eight to a byte.
+
+    The packing is that of numpy.packbits, so numpy.unpackbits(buffer,
+    count=observation_length()) recovers the bits of encode().
+
+    Args:
+      observation: A HanabiObservation.
+      buffer: writable object supporting the buffer protocol with
+        packed_length() bytes, or None to allocate a new bytearray.
+
+    Returns:
+      buffer, holding the packed encoded observation.
+
+    Raises:
+      ValueError: If the encoder is not canonical, whose entries are bits.
+    """
+    if self._type != ObservationEncoderType.CANONICAL:
+      raise ValueError("Only canonical observations can be packed, not "
+                       "{}.".format(self._type.name))
+    if buffer is None:
+      buffer = bytearray(self.packed_length())
+    lib.EncodeObservationPackedInto(
+        self._encoder, observation.observation(),
+        _c_buffer("uint8_t[]", buffer, self.packed_length()))
+    return buffer
+
+  def encode_batch(self, observations, buffer=None):
+    """Encode several observations into consecutive rows of a buffer.
+
+    Args:
+      observations: sequence of HanabiObservation, e.g. those of every player.
+      buffer: writable object supporting the buffer protocol with
+        len(observations) * observation_length() bytes, e.g. a contiguous
+        uint8 NumPy array of shape [len(observations), observation_length()].
+        If None, a new bytearray is allocated.
+
+    Returns:
+      buffer, holding one encoded observation per row.
+    """
+    length = self.observation_length()
+    if buffer is None:
+      buffer = bytearray(len(observations) * length)
+    c_observations = ffi.new("pyhanabi_observation_t[]", len(observations))
+    for i, observation in enumerate(observations):
+      c_observations[i].observation = observation.observation().observation
+    lib.EncodeObservationsInto(
+        self._encoder, len(observations), c_observations,
+        _c_buffer("uint8_t[]", buffer, len(observations) * length))
+    return buffer
+
+
+def _c_buffer(c_type, buf, length, writable=True):
+  """Returns a C pointer into buf, or NULL if buf is None.
+
+  Args:
+    c_type: str, C array type of the buffer elements, e.g. "uint8_t[]".
+    buf: object supporting the buffer protocol (e.g. a contiguous NumPy array
+      of matching dtype), or None.
+    length: int, required number of elements in buf.
+    writable: bool, whether buf will be written to.
+  """
+  if buf is None:
+    return ffi.NULL
+  c_buf = ffi.from_buffer(c_type, buf, require_writable=writable)
+  if len(c_buf) != length:
+    raise ValueError("Expected buffer of {} elements of {}, got {}.".format(
+        length, c_type, len(c_buf)))
+  return c_buf
+
+
+class HanabiVecEnv(object):
+  """A batch of Hanabi games which are reset and stepped in single calls.
+
+  All games share one HanabiGame, and observations are encoded for each game's
+  current player. Results are written into caller-provided buffers, such as
+  contiguous NumPy arrays, with one row per game:
+    observations: uint8, num_envs x observation_length() encodings.
+    legal_moves: uint8, num_envs x game.max_moves() masks, 1 for legal moves.
+    rewards: float32, num_envs score differentials.
+    dones: uint8, num_envs flags, 1 if the step finished the game.
+    cur_players: int32, num_envs current players.
+  Any buffer may be None to skip computing it.
+
+  Python wrapper of C++ HanabiVecEnv class.
+  """
+
+  def __init__(self, game, num_envs, encoder, first_episode=0,
+               verify_encoding=False):
+    """Creates num_envs games, which need a reset() before stepping.
+
+    Canonical observations are encoded incrementally, by updating each
+    player's previous observation with the moves made since.
+
+    Args:
+      game: HanabiGame shared by all games.
+      num_envs: int, number of games.
+      encoder: ObservationEncoder used to encode the observations.
+      first_episode: int, games are numbered consecutively from first_episode
+        as they start, and deal from the random stream of their number (see
+        HanabiState). Use disjoint ranges to shard games reproducibly.
+      verify_encoding: bool, if True, check every incrementally encoded
+        observation against encoder. A mismatch aborts the process.
+    """
+    # Keep references, as the C++ object does not own game or encoder.
+    self._game = game
+    self._encoder = encoder
+    self._vec_env = ffi.new("pyhanabi_vec_env_t*")
+    lib.NewVecEnv(self._vec_env, game.c_game, encoder.c_encoder, num_envs,
+                  first_episode, verify_encoding)
+    self._num_envs = lib.VecEnvNumEnvs(self._vec_env)
+    self._observation_length = lib.VecEnvObservationLength(self._vec_env)
+    self._num_moves = game.max_moves()
+
+  def __del__(self):
+    if self._vec_env is not None:
+      lib.DeleteVecEnv(self._vec_env)
+      self._vec_env = None
+    del self
+
+  def num_envs(self):
+    """Returns the number of games."""
+    return self._num_envs
+
+  def observation_length(self):
+    """Returns the number of entries in one encoded observation."""
+    return self._observation_length
+
+  def state(self, index):
+    """Returns a copy of the HanabiState of game index."""
+    c_state = ffi.new("pyhanabi_state_t*")
+    lib.VecEnvGetState(self._vec_env, index, c_state)
+    return HanabiState(self._game, c_state)
+
+  def reset(self, observations=None, legal_moves=None, cur_players=None):
+    """Starts a new game in every environment and writes its outputs."""
+    lib.VecEnvReset(
+        self._vec_env,
+        _c_buffer("uint8_t[]", observations,
+                  self._num_envs * self._observation_length),
+        _c_buffer("uint8_t[]", legal_moves, self._num_envs * self._num_moves),
+        _c_buffer("int32_t[]", cur_players, self._num_envs))
+
+  def step(self, actions, observations=None, legal_moves=None, rewards=None,
+           dones=None, cur_players=None):
+    """Applies one move uid per game, resetting games which finish.
+
+    Args:
+      actions: int32 buffer of num_envs legal move uids.
+      observations, legal_moves, rewards, dones, cur_players: output buffers.
+        Finished games are reset, so their observations, legal moves and
+        current players describe the start of the next game.
+    """
+    lib.VecEnvStep(
+        self._vec_env,
+        _c_buffer("int32_t[]", actions, self._num_envs, writable=False),
+        _c_buffer("uint8_t[]", observations,
+                  self._num_envs * self._observation_length),
+        _c_buffer("uint8_t[]", legal_moves, self._num_envs * self._num_moves),
+        _c_buffer("float[]", rewards, self._num_envs),
+        _c_buffer("uint8_t[]", dones, self._num_envs),
+        _c_buffer("int32_t[]", cur_players, self._num_envs))
+
+
+def play_rollouts(game, num_games, policy=RolloutPolicyType.SIMPLE,
+                  first_episode=0, scores=None, lengths=None, traces=None,
+                  trace_length=None):
+  """Plays num_games complete games in native code, with a built-in policy.
+
+  Game i deals from random stream first_episode + i (see HanabiState), and
+  its policy draws from a stream of the same number, so results are
+  reproducible and games can be sharded with disjoint episode ranges.
+  Results are written into caller-provided buffers with one row per game,
+  any of which may be None:
+    scores: int32, num_games final scores.
+    lengths: int32, num_games numbers of player moves.
+    traces: uint8, num_games x trace_length move uids, holding the first
+      trace_length moves of each game. Entries past a game's length are left
+      unchanged.
+
+  Args:
+    game: HanabiGame to play.
+    num_games: int, number of games.
+    policy: RolloutPolicyType, the policy of all players.
+    first_episode: int, number of the first game.
+    scores, lengths, traces: output buffers.
+    trace_length: int, length of the traces rows. Defaults to
+      game.max_game_length(), which holds every move.
+  """
+  if trace_length is None:
+    trace_length = game.max_game_length()
+  lib.PlayRollouts(
+      game.c_game, policy, first_episode, num_games,
+      _c_buffer("int32_t[]", scores, num_games),
+      _c_buffer("int32_t[]", lengths, num_games),
+      _c_buffer("uint8_t[]", traces, num_games * trace_length), trace_length)
 
 
 try_cdef()
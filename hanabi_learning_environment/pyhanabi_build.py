@@ -0,0 +1,60 @@
+# Copyright 2018 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Generates the source of the compiled pyhanabi cffi module.
+
+Run at build time by CMake, as
+
+  python pyhanabi_build.py pyhanabi.h _pyhanabi_cffi.cpp
+
+The output is compiled together with pyhanabi.cc into the extension module
+hanabi_learning_environment._pyhanabi_cffi, which pyhanabi.py imports instead
+of parsing pyhanabi.h and loading libpyhanabi.so at run time.
+"""
+import re
+import sys
+import cffi
+
+MODULE_NAME = "hanabi_learning_environment._pyhanabi_cffi"
+
+
+def read_cdef(header_file):
+  """Returns the C declarations of the extern "C" block of header_file."""
+  reading_cdef = False
+  cdef_string = ""
+  for line in open(header_file).readlines():
+    line = line.rstrip()
+    if re.match("extern *\"C\" *{", line):
+      reading_cdef = True
+      continue
+    elif re.match("} */[*] *extern *\"C\" *[*]/", line):
+      reading_cdef = False
+      continue
+    if reading_cdef:
+      cdef_string = cdef_string + line + "\n"
+  return cdef_string
+
+
+def main(argv):
+  if len(argv) != 3:
+    sys.exit("Usage: {} pyhanabi.h output.cpp".format(argv[0]))
+  header_file, output_file = argv[1:]
+  ffibuilder = cffi.FFI()
+  ffibuilder.cdef(read_cdef(header_file))
+  ffibuilder.set_source(MODULE_NAME, "#include \"pyhanabi.h\"\n")
+  ffibuilder.emit_c_code(output_file)
+
+
+if __name__ == "__main__":
+  main(sys.argv)
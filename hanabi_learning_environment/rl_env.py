@@ -16,11 +16,29 @@
 from __future__ import absolute_import
 from __future__ import division
 
+import copy
+import ctypes
+import multiprocessing
+import traceback
+
+import numpy as np
+
 from hanabi_learning_environment import pyhanabi
 from hanabi_learning_environment.pyhanabi import color_char_to_idx
 
 MOVE_TYPES = [_.name for _ in pyhanabi.HanabiMoveType]
 
+# Fields of pyhanabi_move_data_t, in layout order, see move_table().
+MOVE_TABLE_FIELDS = ("type", "card_index", "target_offset", "color", "rank")
+
+# Random streams at and above this episode are used by HanabiEnv.fork().
+FORK_EPISODE_BASE = 1 << 62
+
+# Parts of a player observation which HanabiEnv can compute, see
+# HanabiEnv.__init__. The "full" observation mode holds the first three.
+OBSERVATION_PIECES = ("dict", "vectorized", "legal_mask", "packed",
+                      "structured")
+
 #-------------------------------------------------------------------------------
 # Environment API
 #-------------------------------------------------------------------------------
@@ -82,7 +100,9 @@ class HanabiEnv(Environment):
   ```
   """
 
-  def __init__(self, config):
+  def __init__(self, config, current_player_only=False, observation_mode="full",
+               check_legality=True,
+               encoder_type=pyhanabi.ObservationEncoderType.CANONICAL):
     r"""Creates an environment with the given game configuration.
 
     Args:
@@ -99,17 +119,54 @@ class HanabiEnv(Environment):
             1: First-order common knowledge observation.
           - seed: int, Random seed.
           - random_start_player: bool, Random start player.
+      current_player_only: bool, If True, observations only hold an entry for
+        the current player, and the entries of other players are None.
+        Otherwise the entries of all players are built when first accessed.
+      observation_mode: str, or sequence of str, The pieces of OBSERVATION_PIECES
+        to compute for each player observation. Pieces not selected are
+        skipped entirely. "full" (default) selects dict, vectorized and
+        legal_mask.
+          - dict: The dict features, e.g. observed_hands and legal_moves.
+          - vectorized: The encoding of encoder_type, as "vectorized".
+          - packed: The canonical encoding as np.packbits bytes, "packed".
+            np.unpackbits(packed, count=observation length) recovers it.
+            Requires the canonical encoder_type.
+          - legal_mask: The legal moves as a uint8 mask, "legal_moves_mask".
+          - structured: The dict features as NumPy arrays, "structured".
+        Every observation holds current_player, current_player_offset,
+        legal_moves_as_int and pyhanabi.
+      check_legality: bool, Whether step() checks that actions are legal, and
+        raises AssertionError if not. Trusted agents may disable the check, in
+        which case an illegal action aborts inside the game library.
+      encoder_type: pyhanabi.ObservationEncoderType, The encoding of the
+        vectorized observations. COMPACT observations hold small integer
+        features, and are an order of magnitude shorter than CANONICAL ones.
+
+    Raises:
+      ValueError: Packed observations of a non-canonical encoder_type.
     """
     assert isinstance(config, dict), "Expected config to be of type dict."
     self.game = pyhanabi.HanabiGame(config)
-
-    self.observation_encoder = pyhanabi.ObservationEncoder(
-        self.game, pyhanabi.ObservationEncoderType.CANONICAL)
+    self.current_player_only = current_player_only
+    self.observation_pieces = _observation_pieces(observation_mode)
+    self.check_legality = check_legality
+
+    self.observation_encoder = pyhanabi.ObservationEncoder(self.game,
+                                                           encoder_type)
+    if ("packed" in self.observation_pieces and
+        encoder_type != pyhanabi.ObservationEncoderType.CANONICAL):
+      raise ValueError("Only canonical observations can be packed.")
     self.players = self.game.num_players()
+    self._num_forks = 0
 
-  def reset(self):
+  def reset(self, episode=None):
     r"""Resets the environment for a new game.
 
+    Args:
+      episode: int >= 0, or None. If given, the cards of the new game are dealt
+        from a random stream chosen by the game seed and episode, so the game
+        does not depend on previously played games.
+
     Returns:
       observation: dict, containing the full observation about the game at the
         current step. *WARNING* This observation contains all the hands of the
@@ -207,10 +264,9 @@ class HanabiEnv(Environment):
                                   'num_players': 2,
                                   'vectorized': [ 0, 0, 1, ... ]}]}
     """
-    self.state = self.game.new_initial_state()
+    self.state = self.game.new_initial_state(episode=episode)
 
-    while self.state.cur_player() == pyhanabi.CHANCE_PLAYER_ID:
-      self.state.deal_random_card()
+    self.state.resolve_chance()
 
     obs = self._make_observation_all_players()
     obs["current_player"] = self.state.cur_player()
@@ -232,6 +288,17 @@ class HanabiEnv(Environment):
     """
     return self.game.max_moves()
 
+  def move_table(self):
+    """Returns the move of each uid, as NumPy arrays.
+
+    Returns:
+      dict, mapping each of MOVE_TABLE_FIELDS to an int32 array of length
+      num_moves(), whose element uid holds that field of move uid (-1 where
+      the move type has no such field). "type" holds `pyhanabi.HanabiMoveType`
+      values.
+    """
+    return move_table(self.game)
+
   def step(self, action):
     """Take one step in the game.
 
@@ -340,22 +407,13 @@ class HanabiEnv(Environment):
     Raises:
       AssertionError: When an illegal action is provided.
     """
-    if isinstance(action, dict):
-      # Convert dict action HanabiMove
-      action = self._build_move(action)
-    elif isinstance(action, int):
-      # Convert int action into a Hanabi move.
-      action = self.game.get_move(action)
-    else:
-      raise ValueError("Expected action as dict or int, got: {}".format(
-          action))
+    action = self._action_to_move(action)
 
     last_score = self.state.score()
     # Apply the action to the state.
     self.state.apply_move(action)
 
-    while self.state.cur_player() == pyhanabi.CHANCE_PLAYER_ID:
-      self.state.deal_random_card()
+    self.state.resolve_chance()
 
     observation = self._make_observation_all_players()
     done = self.state.is_terminal()
@@ -365,59 +423,162 @@ class HanabiEnv(Environment):
 
     return (observation, reward, done, info)
 
-  def _make_observation_all_players(self):
+  def fork(self, episode=None):
+    """Returns an independent copy of the environment, e.g. for search.
+
+    The copy shares the game, encoder and options of this environment, but
+    has its own copy of the state, so stepping either does not affect the
+    other. It deals future cards from its own random stream.
+
+    Args:
+      episode: int >= 0, or None. The random stream the copy deals from. By
+        default, the n-th fork of this environment deals from a stream at or
+        above FORK_EPISODE_BASE, which reset() never uses unless asked to,
+        hashed from n and the stream of this environment. Forks of different
+        environments, or of forks, thus deal independently.
+
+    Returns:
+      A `HanabiEnv` at the current step of this one.
+    """
+    if episode is None:
+      episode = _fork_episode(self.state.episode(), self._num_forks)
+      self._num_forks += 1
+    forked = copy.copy(self)
+    forked.state = self.state.copy()
+    forked.state.set_episode(episode)
+    forked._num_forks = 0  # pylint: disable=protected-access
+    return forked
+
+  def peek(self, actions, deal_chance=False):
+    """Returns the outcome of each of several candidate actions.
+
+    Each action is applied to the current state and then undone, so the
+    environment is left unchanged, and no state is copied beyond what the
+    returned observations hold.
+
+    Args:
+      actions: list of actions, as accepted by step(), legal for the current
+        player.
+      deal_chance: bool, Whether to deal the cards which replace played and
+        discarded cards before observing. Only possible if the game deals
+        from a random stream, i.e. was reset() with an episode or forked.
+        The dealt cards are those step() would deal, so planning agents
+        should leave this False. current_player is then CHANCE_PLAYER_ID in
+        outcomes which are waiting for a card, and with current_player_only,
+        their observation is that of the next player to act.
+
+    Returns:
+      list of (observation, reward, done) tuples, one per action, as returned
+      by step().
+
+    Raises:
+      ValueError: If deal_chance is set, and the game deals from the game's
+        shared generator, which undoing the deals would not rewind.
+    """
+    if deal_chance and self.state.episode() is None:
+      raise ValueError("Can only deal chance when peeking a game with a "
+                       "random stream, see reset(episode).")
+    outcomes = []
+    next_player = (self.state.cur_player() + 1) % self.players
+    for action in actions:
+      move = self._action_to_move(action)
+      last_score = self.state.score()
+      with self.state.lookahead(move, deal_chance=deal_chance):
+        observation = self._make_observation_all_players(next_player)
+        outcomes.append((observation, self.state.score() - last_score,
+                         self.state.is_terminal()))
+    return outcomes
+
+  def _action_to_move(self, action):
+    """Returns the HanabiMove for a dict or int action, checking legality."""
+    if isinstance(action, dict):
+      # Convert dict action HanabiMove
+      return self._build_move(action)
+    elif isinstance(action, (int, np.integer)):
+      # Convert int action into a Hanabi move.
+      move = self.game.get_move(int(action))
+      if self.check_legality:
+        self._check_legal(move)
+      return move
+    else:
+      raise ValueError("Expected action as dict or int, got: {}".format(
+          action))
+
+  def _make_observation_all_players(self, chance_observer=None):
     """Make observation for all players.
 
+    The per-player observations are only built for the current player if
+    current_player_only is set, and otherwise on first access.
+
+    Args:
+      chance_observer: int or None, the player observing instead of the
+        current player with current_player_only, if a card is to be dealt.
+
     Returns:
       dict, containing observations for all players.
     """
     obs = {}
-    player_observations = [self._extract_dict_from_backend(
-        player_id, self.state.observation(player_id))
-        for player_id in range(self.players)]  # pylint: disable=bad-continuation
+    cur_player = self.state.cur_player()
+    if self.current_player_only:
+      player_observations = [None] * self.players
+      observer = cur_player
+      if (cur_player == pyhanabi.CHANCE_PLAYER_ID and
+          chance_observer is not None):
+        observer = chance_observer
+      if 0 <= observer < self.players:
+        player_observations[observer] = self._extract_dict_from_backend(
+            observer, self.state.observation(observer))
+    else:
+      player_observations = _LazyPlayerObservations(self, self.state.copy())
     obs["player_observations"] = player_observations
-    obs["current_player"] = self.state.cur_player()
+    obs["current_player"] = cur_player
     return obs
 
   @staticmethod
   def extract_dict_static(player_id, observation, state):
+    data = observation.snapshot()
+    num_players = data.num_players
+
     obs_dict = {}
     obs_dict["current_player"] = state.cur_player()
-    obs_dict["current_player_offset"] = observation.cur_player_offset()
-    obs_dict["life_tokens"] = observation.life_tokens()
-    obs_dict["information_tokens"] = observation.information_tokens()
-    obs_dict["num_players"] = observation.num_players()
-    obs_dict["deck_size"] = observation.deck_size()
+    obs_dict["current_player_offset"] = data.cur_player_offset
+    obs_dict["life_tokens"] = data.life_tokens
+    obs_dict["information_tokens"] = data.information_tokens
+    obs_dict["num_players"] = num_players
+    obs_dict["deck_size"] = data.deck_size
 
     obs_dict["fireworks"] = {}
-    fireworks = state.fireworks()
-    for color, firework in zip(pyhanabi.COLOR_CHAR, fireworks):
-      obs_dict["fireworks"][color] = firework
+    fireworks = data.fireworks
+    for color in range(data.num_colors):
+      obs_dict["fireworks"][pyhanabi.COLOR_CHAR[color]] = fireworks[color]
 
-    obs_dict["legal_moves"] = []
-    for move in observation.legal_moves():
-      obs_dict["legal_moves"].append(move.to_dict())
+    obs_dict["legal_moves"] = [
+        pyhanabi.HanabiMove.data_to_dict(data.legal_moves[i])
+        for i in range(data.num_legal_moves)
+    ]
 
     obs_dict["observed_hands"] = []
-    for player_hand in observation.observed_hands():
-      cards = [card.to_dict() for card in player_hand]
-      obs_dict["observed_hands"].append(cards)
+    for pid in range(num_players):
+      cards = data.hands[pid][0:data.hand_size[pid]]
+      obs_dict["observed_hands"].append([
+          {"color": pyhanabi.color_idx_to_char(card.color), "rank": card.rank}
+          for card in cards])
 
     obs_dict["discard_pile"] = [
-        card.to_dict() for card in observation.discard_pile()
+        {"color": pyhanabi.color_idx_to_char(card.color), "rank": card.rank}
+        for card in data.discard_pile[0:data.discard_pile_size]
     ]
 
     # Return hints received.
     obs_dict["card_knowledge"] = []
-    for player_hints in observation.card_knowledge():
+    for pid in range(num_players):
       player_hints_as_dicts = []
-      for hint in player_hints:
+      known_colors = data.known_color[pid]
+      known_ranks = data.known_rank[pid]
+      for i in range(data.hand_size[pid]):
         hint_d = {}
-        if hint.color() is not None:
-          hint_d["color"] = pyhanabi.color_idx_to_char(hint.color())
-        else:
-          hint_d["color"] = None
-        hint_d["rank"] = hint.rank()
+        hint_d["color"] = pyhanabi.color_idx_to_char(known_colors[i])
+        hint_d["rank"] = known_ranks[i] if known_ranks[i] >= 0 else None
         player_hints_as_dicts.append(hint_d)
       obs_dict["card_knowledge"].append(player_hints_as_dicts)
 
@@ -425,26 +586,97 @@ class HanabiEnv(Environment):
 
     return obs_dict
 
-  def _extract_dict_from_backend(self, player_id, observation):
+  def _extract_dict_from_backend(self, player_id, observation, state=None):
     """Extract a dict of features from an observation from the backend.
 
     Args:
       player_id: Int, player from whose perspective we generate the observation.
       observation: A `pyhanabi.HanabiObservation` object.
+      state: The `pyhanabi.HanabiState` observed, or None for the current state.
 
     Returns:
       obs_dict: dict, mapping from HanabiObservation to a dict.
     """
-    obs_dict = self.extract_dict_static(player_id, observation, self.state)
+    if state is None:
+      state = self.state
+    pieces = self.observation_pieces
+    if "dict" in pieces:
+      obs_dict = self.extract_dict_static(player_id, observation, state)
+    else:
+      obs_dict = {"current_player": state.cur_player(),
+                  "current_player_offset": observation.cur_player_offset(),
+                  "pyhanabi": observation}
+
+    obs_dict["legal_moves_as_int"] = observation.legal_move_uids()
+    if "legal_mask" in pieces:
+      obs_dict["legal_moves_mask"] = observation.legal_moves_mask(
+          np.zeros(self.num_moves(), dtype=np.uint8))
+    if "vectorized" in pieces:
+      obs_dict["vectorized"] = self.observation_encoder.encode(observation)
+    if "packed" in pieces:
+      obs_dict["packed"] = self.observation_encoder.encode_packed(
+          observation,
+          np.empty(self.observation_encoder.packed_length(), dtype=np.uint8))
+    if "structured" in pieces:
+      obs_dict["structured"] = self.extract_structured_static(
+          observation, self.game.hand_size())
 
-    obs_dict["legal_moves_as_int"] = []
-    for move in observation.legal_moves():
-      obs_dict["legal_moves_as_int"].append(self.game.get_move_uid(move))
+    return obs_dict
 
-    # ipdb.set_trace()
-    obs_dict["vectorized"] = self.observation_encoder.encode(observation)
+  @staticmethod
+  def extract_structured_static(observation, hand_size):
+    """Returns the dict features of an observation as NumPy arrays.
 
-    return obs_dict
+    Args:
+      observation: A `pyhanabi.HanabiObservation` object.
+      hand_size: int, Hand size of the game.
+
+    Returns:
+      dict, mapping feature names to int32 arrays. Hands are relative to the
+      observer, as in the dict observation. Per-card arrays have shape
+      [num_players, hand_size], and entries past the end of a shorter hand are
+      -1, or 0 for the plausibility bitmasks. Cards which are not visible to
+      the observer have color and rank -1.
+    """
+    data = observation.snapshot()
+    num_players = data.num_players
+
+    def array(field, shape):
+      values = np.frombuffer(pyhanabi.ffi.buffer(field), dtype=np.int32)
+      return values.reshape(shape)
+
+    max_players = pyhanabi.lib.PYHANABI_MAX_PLAYERS
+    max_hand_size = pyhanabi.lib.PYHANABI_MAX_HAND_SIZE
+    card_shape = (max_players, max_hand_size)
+    hand_sizes = array(data.hand_size, max_players)[:num_players].copy()
+    in_hand = np.arange(hand_size) < hand_sizes[:, np.newaxis]
+
+    def per_card(field, fill, shape=card_shape):
+      values = array(field, shape)[:num_players, :hand_size]
+      if len(shape) > 2:
+        in_card = in_hand[:, :, np.newaxis]
+      else:
+        in_card = in_hand
+      return np.where(in_card, values, fill).astype(np.int32)
+
+    return {
+        "current_player_offset": data.cur_player_offset,
+        "life_tokens": data.life_tokens,
+        "information_tokens": data.information_tokens,
+        "deck_size": data.deck_size,
+        "fireworks": array(data.fireworks, -1)[:data.num_colors].copy(),
+        "hand_size": hand_sizes,
+        # [..., 0] is the card color and [..., 1] its rank.
+        "observed_hands": per_card(data.hands, -1, card_shape + (2,)),
+        "known_color": per_card(data.known_color, -1),
+        "known_rank": per_card(data.known_rank, -1),
+        "color_plausible": per_card(data.color_plausible, 0),
+        "rank_plausible": per_card(data.rank_plausible, 0),
+        "discard_pile": array(data.discard_pile, (-1, 2))[
+            :data.discard_pile_size].copy(),
+        "legal_moves_as_int": array(data.legal_move_uids, -1)[
+            :data.num_legal_moves].copy(),
+    }
 
   @staticmethod
   def build_move_static(action):
@@ -503,129 +735,696 @@ class HanabiEnv(Environment):
       ValueError: Unknown action type.
     """
     move = self.build_move_static(action)
-    legal_moves = self.state.legal_moves()
-    assert (str(move) in map(
-        str,
-        legal_moves)), "Illegal action: {}. Move should be one of : {}".format(
-            move, legal_moves)
+    if self.check_legality:
+      self._check_legal(move)
 
     return move
 
+  def _check_legal(self, move):
+    """Raises AssertionError if move is not legal in the current state."""
+    if not self.state.move_is_legal(move):
+      legal_moves = self.state.legal_moves()
+      raise AssertionError(
+          "Illegal action: {}. Move should be one of : {}".format(
+              move, legal_moves))
 
-def make(environment_name="Hanabi-Full", num_players=2, seed=12345, pyhanabi_path=None):
-  """Make an environment.
+
+def move_table(game):
+  """Returns the move of each uid of a `pyhanabi.HanabiGame`, see
+  `HanabiEnv.move_table`."""
+  moves = game.move_table()
+  table = np.frombuffer(pyhanabi.ffi.buffer(moves), dtype=np.int32).reshape(
+      len(moves), len(MOVE_TABLE_FIELDS))
+  return {field: table[:, i].copy()
+          for i, field in enumerate(MOVE_TABLE_FIELDS)}
+
+
+def _fork_episode(episode, n):
+  """Returns the random stream of the n-th fork of a game dealing from episode.
 
   Args:
-    environment_name: str, Name of the environment to instantiate.
-    num_players: int, Number of players in this game.
-    pyhanabi_path: str, absolute path to header files for c code linkage.
+    episode: int >= 0, or None for a game dealing from the shared generator.
+    n: int >= 0, number of earlier forks of the game.
+  """
+  mask = (1 << 64) - 1
+  value = 0
+  for word in (mask if episode is None else episode, n):
+    # SplitMix64 finalizer, as in counter_rng.h.
+    value = (word ^ value) + 0x9e3779b97f4a7c15 & mask
+    value = (value ^ (value >> 30)) * 0xbf58476d1ce4e5b9 & mask
+    value = (value ^ (value >> 27)) * 0x94d049bb133111eb & mask
+    value ^= value >> 31
+  return FORK_EPISODE_BASE | (value & (FORK_EPISODE_BASE - 1))
+
+
+def _encoder_type(name):
+  """Returns the pyhanabi.ObservationEncoderType named name, e.g. "compact"."""
+  try:
+    return pyhanabi.ObservationEncoderType[name.upper()]
+  except KeyError:
+    raise ValueError("Unknown encoder type {}, expected one of {}".format(
+        name, [t.name.lower() for t in pyhanabi.ObservationEncoderType]))
+
+
+def _observation_pieces(observation_mode):
+  """Returns the set of OBSERVATION_PIECES selected by an observation_mode."""
+  if isinstance(observation_mode, str):
+    observation_mode = [observation_mode]
+  pieces = set()
+  for piece in observation_mode:
+    if piece == "full":
+      pieces.update(("dict", "vectorized", "legal_mask"))
+    elif piece in OBSERVATION_PIECES:
+      pieces.add(piece)
+    else:
+      raise ValueError("Unknown observation piece {}, expected one of {}".format(
+          piece, ("full",) + OBSERVATION_PIECES))
+  return frozenset(pieces)
 
-  Returns:
-    env: An `Environment` object.
 
-  Raises:
-    ValueError: Unknown environment name.
+class _LazyPlayerObservations(object):
+  """List of per-player observation dicts, each built when first accessed.
+
+  Holds its own copy of the observed state, so entries describe the step they
+  were returned from even after the environment has stepped again.
+  """
+
+  def __init__(self, env, state):
+    self._env = env
+    self._state = state
+    self._observations = [None] * env.players
+
+  def __len__(self):
+    return len(self._observations)
+
+  def __getitem__(self, index):
+    if isinstance(index, slice):
+      return [self[i] for i in range(*index.indices(len(self)))]
+    if index < 0:
+      index += len(self)
+    if not 0 <= index < len(self):
+      raise IndexError("player index out of range")
+    if self._observations[index] is None:
+      self._observations[index] = self._env._extract_dict_from_backend(  # pylint: disable=protected-access
+          index, self._state.observation(index), self._state)
+    return self._observations[index]
+
+  def __iter__(self):
+    for index in range(len(self)):
+      yield self[index]
+
+  def __eq__(self, other):
+    return list(self) == list(other)
+
+  def __ne__(self, other):
+    return not self == other
+
+  def __repr__(self):
+    return repr(list(self))
+
+
+class HanabiVecEnv(object):
+  """Batched RL interface to num_envs Hanabi games, stepped in native code.
+
+  Actions are move uids, one per game, and observations hold the encoded
+  observation and legal moves of each game's current player. Finished games
+  are reset automatically.
+
+  ```python
+
+  environment = rl_env.make_vec('Hanabi-Full', num_envs=64)
+  observations = environment.reset()
+  while training:
+      # Agents pick one legal move uid per game.
+      actions = ...
+      observations, rewards, dones, info = environment.step(actions)
+  ```
+
+  The returned NumPy arrays are reused, and overwritten by the next call to
+  reset() or step(). Copy them to keep them across steps.
+  """
+
+  def __init__(self, config, num_envs, first_episode=0,
+               encoder_type=pyhanabi.ObservationEncoderType.CANONICAL):
+    """Creates num_envs games with the given game configuration.
+
+    Args:
+      config: dict, With parameters for the game, as for `HanabiEnv`.
+      num_envs: int, Number of games stepped together.
+      first_episode: int, Number of the first game. Games are numbered in the
+        order they start, and the cards of each are a function of the game
+        seed and its number only.
+      encoder_type: pyhanabi.ObservationEncoderType, The encoding of the
+        observations, as for `HanabiEnv`.
+    """
+    assert isinstance(config, dict), "Expected config to be of type dict."
+    self.game = pyhanabi.HanabiGame(config)
+
+    self.observation_encoder = pyhanabi.ObservationEncoder(self.game,
+                                                           encoder_type)
+    self.players = self.game.num_players()
+    self.num_envs = num_envs
+    self._vec_env = pyhanabi.HanabiVecEnv(self.game, num_envs,
+                                          self.observation_encoder,
+                                          first_episode)
+
+    self._observations = np.zeros(
+        (num_envs, self._vec_env.observation_length()), dtype=np.uint8)
+    self._legal_moves = np.zeros((num_envs, self.num_moves()), dtype=np.uint8)
+    self._rewards = np.zeros(num_envs, dtype=np.float32)
+    self._dones = np.zeros(num_envs, dtype=np.uint8)
+    self._cur_players = np.zeros(num_envs, dtype=np.int32)
+
+  def vectorized_observation_shape(self):
+    """Returns the shape of the vectorized observation of a single game."""
+    return self.observation_encoder.shape()
+
+  def num_moves(self):
+    """Returns the total number of moves in this game (legal or not)."""
+    return self.game.max_moves()
+
+  def state(self, index):
+    """Returns a copy of the `pyhanabi.HanabiState` of game index."""
+    return self._vec_env.state(index)
+
+  def reset(self):
+    """Starts a new game in every environment.
+
+    Returns:
+      observations: dict, with one row per game for the current player:
+        - 'vectorized': uint8 array [num_envs, observation length], the
+          encoded observations.
+        - 'legal_moves_mask': uint8 array [num_envs, num_moves()], 1 for
+          legal move uids and 0 otherwise.
+        - 'current_player': int32 array [num_envs].
+    """
+    self._vec_env.reset(self._observations, self._legal_moves,
+                        self._cur_players)
+    return self._make_observations()
+
+  def step(self, actions):
+    """Take one step in every game.
+
+    Args:
+      actions: sequence of num_envs ints, the legal move uid played in each
+        game.
+
+    Returns:
+      observations: dict, as returned by reset(). Games which finished are
+        reset, and their rows describe the start of the next game.
+      rewards: float32 array [num_envs], score differentials. May be large
+        and negative at game end.
+      dones: bool array [num_envs], whether the action finished the game.
+      info: dict, Optional debugging information.
+    """
+    actions = np.ascontiguousarray(actions, dtype=np.int32)
+    assert actions.shape == (self.num_envs,), (
+        "Expected {} actions, got shape {}".format(self.num_envs,
+                                                  actions.shape))
+    self._vec_env.step(actions, self._observations, self._legal_moves,
+                       self._rewards, self._dones, self._cur_players)
+    return (self._make_observations(), self._rewards,
+            self._dones.view(np.bool_), {})
+
+  def _make_observations(self):
+    return {
+        "vectorized": self._observations,
+        "legal_moves_mask": self._legal_moves,
+        "current_player": self._cur_players
+    }
+
+
+class AsyncHanabiVecEnv(object):
+  """Batched RL interface to num_envs Hanabi games, sharded across processes.
+
+  Each of num_workers worker processes steps a contiguous shard of the games
+  in a native `pyhanabi.HanabiVecEnv`. Observations, legal moves, rewards,
+  dones and current players are written by the workers straight into shared
+  memory, so only the actions travel over pipes. The interface and the
+  returned arrays are those of `HanabiVecEnv`.
+
+  ```python
+
+  environment = rl_env.make_async_vec('Hanabi-Full', num_envs=256,
+                                      num_workers=8)
+  observations = environment.reset()
+  while training:
+      environment.step_async(actions)
+      # Work on something else while the workers step.
+      observations, rewards, dones, info = environment.step_wait()
+  environment.close()
+  ```
   """
 
+  # Episode numbers of worker w start at first_episode + w * stride, so the
+  # shards deal from disjoint random streams.
+  EPISODE_STRIDE = 1 << 40
+
+  def __init__(self, config, num_envs, num_workers, first_episode=0,
+               pyhanabi_path=None,
+               encoder_type=pyhanabi.ObservationEncoderType.CANONICAL):
+    """Creates num_envs games with the given game configuration.
+
+    Args:
+      config: dict, With parameters for the game, as for `HanabiEnv`.
+      num_envs: int, Number of games stepped together.
+      num_workers: int, Number of worker processes, at most num_envs.
+      first_episode: int, Number of the first game of the first worker.
+      pyhanabi_path: str, absolute path to header files for c code linkage,
+        loaded by the workers.
+      encoder_type: pyhanabi.ObservationEncoderType, The encoding of the
+        observations, as for `HanabiEnv`.
+    """
+    assert isinstance(config, dict), "Expected config to be of type dict."
+    assert 0 < num_workers <= num_envs, (
+        "Expected 1 to {} workers, got {}".format(num_envs, num_workers))
+    self.game = pyhanabi.HanabiGame(config)
+    self.observation_encoder = pyhanabi.ObservationEncoder(self.game,
+                                                           encoder_type)
+    self.players = self.game.num_players()
+    self.num_envs = num_envs
+    observation_length = int(np.prod(self.observation_encoder.shape()))
+
+    buffers = {
+        "observations": (ctypes.c_uint8, (num_envs, observation_length)),
+        "legal_moves": (ctypes.c_uint8, (num_envs, self.num_moves())),
+        "rewards": (ctypes.c_float, (num_envs,)),
+        "dones": (ctypes.c_uint8, (num_envs,)),
+        "cur_players": (ctypes.c_int32, (num_envs,)),
+    }
+    shared = {name: (multiprocessing.RawArray(c_type, int(np.prod(shape))),
+                     shape) for name, (c_type, shape) in buffers.items()}
+    self._buffers = {name: _shared_array(raw, shape)
+                     for name, (raw, shape) in shared.items()}
+
+    # Worker w steps games [self._shards[w], self._shards[w + 1]).
+    self._shards = [num_envs * w // num_workers for w in range(num_workers + 1)]
+    self._pipes = []
+    self._processes = []
+    for w in range(num_workers):
+      pipe, worker_pipe = multiprocessing.Pipe()
+      process = multiprocessing.Process(
+          target=_async_vec_env_worker,
+          args=(worker_pipe, config, shared, self._shards[w],
+                self._shards[w + 1], first_episode + w * self.EPISODE_STRIDE,
+                pyhanabi_path, int(encoder_type)))
+      process.daemon = True
+      process.start()
+      worker_pipe.close()
+      self._pipes.append(pipe)
+      self._processes.append(process)
+    self._waiting = False
+    self._closed = False
+
+  def vectorized_observation_shape(self):
+    """Returns the shape of the vectorized observation of a single game."""
+    return self.observation_encoder.shape()
+
+  def num_moves(self):
+    """Returns the total number of moves in this game (legal or not)."""
+    return self.game.max_moves()
+
+  def state(self, index):
+    """Returns a copy of the `pyhanabi.HanabiState` of game index."""
+    assert not self._waiting, "Cannot read states while a step is running."
+    worker = next(w for w in range(len(self._pipes))
+                  if index < self._shards[w + 1])
+    self._pipes[worker].send(("state", index - self._shards[worker]))
+    return self._receive([self._pipes[worker]])[0]
+
+  def reset(self):
+    """Starts a new game in every environment.
+
+    Returns:
+      observations: dict, as returned by `HanabiVecEnv.reset`.
+    """
+    assert not self._waiting, "Cannot reset while a step is running."
+    for pipe in self._pipes:
+      pipe.send(("reset", None))
+    self._receive(self._pipes)
+    return self._make_observations()
+
+  def step_async(self, actions):
+    """Starts one step in every game, without waiting for it to finish.
+
+    Args:
+      actions: sequence of num_envs ints, the legal move uid played in each
+        game.
+    """
+    assert not self._waiting, "step_wait() must be called before stepping."
+    actions = np.ascontiguousarray(actions, dtype=np.int32)
+    assert actions.shape == (self.num_envs,), (
+        "Expected {} actions, got shape {}".format(self.num_envs,
+                                                  actions.shape))
+    for w, pipe in enumerate(self._pipes):
+      pipe.send(("step", actions[self._shards[w]:self._shards[w + 1]]))
+    self._waiting = True
+
+  def step_wait(self):
+    """Waits for the step started by step_async().
+
+    Returns:
+      The results of `HanabiVecEnv.step`. The arrays are shared with the
+      workers, and overwritten by the next reset() or step.
+    """
+    assert self._waiting, "step_async() must be called before step_wait()."
+    self._waiting = False
+    self._receive(self._pipes)
+    return (self._make_observations(), self._buffers["rewards"],
+            self._buffers["dones"].view(np.bool_), {})
+
+  def step(self, actions):
+    """Take one step in every game, as `HanabiVecEnv.step`."""
+    self.step_async(actions)
+    return self.step_wait()
+
+  def close(self):
+    """Stops the worker processes."""
+    if self._closed:
+      return
+    self._closed = True
+    for pipe in self._pipes:
+      try:
+        if self._waiting:
+          pipe.recv()
+        pipe.send(("close", None))
+      except (EOFError, IOError):
+        pass  # The worker has already exited.
+    for process in self._processes:
+      process.join()
+
+  def _receive(self, pipes):
+    """Returns the result of each pipe's pending command.
+
+    Raises:
+      RuntimeError: A worker failed, or exited. All pending results are
+        consumed first, so the remaining workers stay usable.
+    """
+    results = []
+    errors = []
+    for pipe in pipes:
+      try:
+        result, error = pipe.recv()
+      except EOFError:
+        result, error = None, "Worker process exited."
+      results.append(result)
+      if error is not None:
+        errors.append(error)
+    if errors:
+      raise RuntimeError("HanabiVecEnv worker failed:\n{}".format(errors[0]))
+    return results
+
+  def _make_observations(self):
+    return {
+        "vectorized": self._buffers["observations"],
+        "legal_moves_mask": self._buffers["legal_moves"],
+        "current_player": self._buffers["cur_players"]
+    }
+
+
+def _shared_array(raw_array, shape):
+  """Returns a NumPy view of a multiprocessing.RawArray."""
+  return np.ctypeslib.as_array(raw_array).reshape(shape)
+
+
+def _async_vec_env_worker(pipe, config, shared, begin, end, first_episode,
+                          pyhanabi_path, encoder_type):
+  """Steps games [begin, end) of an AsyncHanabiVecEnv, as commanded on pipe.
+
+  Replies to each command with a (result, error) pair, where error is None on
+  success and a formatted traceback otherwise.
+  """
+  _load_pyhanabi(pyhanabi_path)
+  buffers = {name: _shared_array(raw, shape)[begin:end]
+             for name, (raw, shape) in shared.items()}
+  game = pyhanabi.HanabiGame(config)
+  encoder = pyhanabi.ObservationEncoder(game, encoder_type)
+  vec_env = pyhanabi.HanabiVecEnv(game, end - begin, encoder, first_episode)
+  while True:
+    command, data = pipe.recv()
+    try:
+      result = None
+      if command == "step":
+        vec_env.step(data, buffers["observations"], buffers["legal_moves"],
+                     buffers["rewards"], buffers["dones"],
+                     buffers["cur_players"])
+      elif command == "reset":
+        vec_env.reset(buffers["observations"], buffers["legal_moves"],
+                      buffers["cur_players"])
+      elif command == "state":
+        result = vec_env.state(data)
+      elif command == "close":
+        pipe.close()
+        return
+      else:
+        raise ValueError("Unknown command {}".format(command))
+      pipe.send((result, None))
+    except Exception:  # pylint: disable=broad-except
+      pipe.send((None, traceback.format_exc()))
+
+
+def _load_pyhanabi(pyhanabi_path):
+  """Loads the pyhanabi header and library from pyhanabi_path, if not None."""
   if pyhanabi_path is not None:
     prefixes=(pyhanabi_path,)
     assert pyhanabi.try_cdef(prefixes=prefixes), "cdef failed to load"
     assert pyhanabi.try_load(prefixes=prefixes), "library failed to load"
 
+
+def game_config(environment_name="Hanabi-Full", num_players=2, seed=12345):
+  """Returns the game config of a named environment.
+
+  Args:
+    environment_name: str, Name of the environment.
+    num_players: int, Number of players in this game.
+    seed: int, Random seed.
+
+  Returns:
+    config: dict, game parameters as expected by `HanabiEnv`.
+
+  Raises:
+    ValueError: Unknown environment name.
+  """
   if (environment_name == "Hanabi-Full" or
       environment_name == "Hanabi-Full-CardKnowledge"):
-    return HanabiEnv(
-        config={
-            "colors":
-                5,
-            "ranks":
-                5,
-            "players":
-                num_players,
-            "max_information_tokens":
-                8,
-            "max_life_tokens":
-                3,
-            "observation_type":
-                pyhanabi.AgentObservationType.CARD_KNOWLEDGE.value,
-            "seed":
-                seed
-        })
+    return {
+        "colors":
+            5,
+        "ranks":
+            5,
+        "players":
+            num_players,
+        "max_information_tokens":
+            8,
+        "max_life_tokens":
+            3,
+        "observation_type":
+            pyhanabi.AgentObservationType.CARD_KNOWLEDGE.value,
+        "seed":
+            seed
+    }
   elif environment_name == "Hanabi-Full-Minimal":
-    return HanabiEnv(
-        config={
-            "colors": 5,
-            "ranks": 5,
-            "players": num_players,
-            "max_information_tokens": 8,
-            "max_life_tokens": 3,
-            "observation_type": pyhanabi.AgentObservationType.MINIMAL.value,
-            "seed": seed
-        })
+    return {
+        "colors": 5,
+        "ranks": 5,
+        "players": num_players,
+        "max_information_tokens": 8,
+        "max_life_tokens": 3,
+        "observation_type": pyhanabi.AgentObservationType.MINIMAL.value,
+        "seed": seed
+    }
   elif environment_name == "Hanabi-Small":
-    return HanabiEnv(
-        config={
-            "colors":
-                2,
-            "ranks":
-                5,
-            "players":
-                num_players,
-            "hand_size":
-                2,
-            "max_information_tokens":
-                3,
-            "max_life_tokens":
-                1,
-            "observation_type":
-                pyhanabi.AgentObservationType.CARD_KNOWLEDGE.value,
-            "seed":
-                seed
-        })
+    return {
+        "colors":
+            2,
+        "ranks":
+            5,
+        "players":
+            num_players,
+        "hand_size":
+            2,
+        "max_information_tokens":
+            3,
+        "max_life_tokens":
+            1,
+        "observation_type":
+            pyhanabi.AgentObservationType.CARD_KNOWLEDGE.value,
+        "seed":
+            seed
+    }
   elif environment_name == "Hanabi-Very-Small":
-    return HanabiEnv(
-        config={
-            "colors":
-                1,
-            "ranks":
-                5,
-            "players":
-                num_players,
-            "hand_size":
-                2,
-            "max_information_tokens":
-                3,
-            "max_life_tokens":
-                1,
-            "observation_type":
-                pyhanabi.AgentObservationType.CARD_KNOWLEDGE.value,
-            "seed":
-                seed
-        })
+    return {
+        "colors":
+            1,
+        "ranks":
+            5,
+        "players":
+            num_players,
+        "hand_size":
+            2,
+        "max_information_tokens":
+            3,
+        "max_life_tokens":
+            1,
+        "observation_type":
+            pyhanabi.AgentObservationType.CARD_KNOWLEDGE.value,
+        "seed":
+            seed
+    }
   elif environment_name == "Hanabi-My-Small":
-    return HanabiEnv(
-        config={
-            "colors":
-                4,
-            "ranks":
-                3, # 3*{1} + 2*{2} + 1*{3}
-            "players":
-                num_players,
-            "hand_size":
-                4,
-            "max_information_tokens":
-                8,
-            "max_life_tokens":
-                3,
-            "observation_type":
-                pyhanabi.AgentObservationType.CARD_KNOWLEDGE.value,
-            "seed":
-                seed
-        })
+    return {
+        "colors":
+            4,
+        "ranks":
+            3, # 3*{1} + 2*{2} + 1*{3}
+        "players":
+            num_players,
+        "hand_size":
+            4,
+        "max_information_tokens":
+            8,
+        "max_life_tokens":
+            3,
+        "observation_type":
+            pyhanabi.AgentObservationType.CARD_KNOWLEDGE.value,
+        "seed":
+            seed
+    }
   else:
     raise ValueError("Unknown environment {}".format(environment_name))
 
 
+def make(environment_name="Hanabi-Full", num_players=2, seed=12345, pyhanabi_path=None,
+         current_player_only=False, observation_mode="full", check_legality=True,
+         encoder_type="canonical"):
+  """Make an environment.
+
+  Args:
+    environment_name: str, Name of the environment to instantiate.
+    num_players: int, Number of players in this game.
+    pyhanabi_path: str, absolute path to header files for c code linkage.
+    current_player_only: bool, Whether observations only hold an entry for the
+      current player (see HanabiEnv).
+    observation_mode: str, or sequence of str, The parts of each player
+      observation to compute (see HanabiEnv).
+    check_legality: bool, Whether step() checks actions are legal (see
+      HanabiEnv).
+    encoder_type: str, Name of the pyhanabi.ObservationEncoderType of the
+      vectorized observations, "canonical" or "compact".
+
+  Returns:
+    env: An `Environment` object.
+
+  Raises:
+    ValueError: Unknown environment name, observation piece or encoder type.
+  """
+  _load_pyhanabi(pyhanabi_path)
+  return HanabiEnv(config=game_config(environment_name, num_players, seed),
+                   current_player_only=current_player_only,
+                   observation_mode=observation_mode,
+                   check_legality=check_legality,
+                   encoder_type=_encoder_type(encoder_type))
+
+
+def make_async_vec(environment_name="Hanabi-Full", num_envs=1, num_workers=1,
+                   num_players=2, seed=12345, pyhanabi_path=None,
+                   encoder_type="canonical"):
+  """Make a batched environment running num_envs games in worker processes.
+
+  Args:
+    environment_name: str, Name of the environment to instantiate.
+    num_envs: int, Number of games stepped together.
+    num_workers: int, Number of worker processes the games are sharded across.
+    num_players: int, Number of players in each game.
+    seed: int, Random seed.
+    pyhanabi_path: str, absolute path to header files for c code linkage.
+    encoder_type: str, Name of the observation encoder type (see make).
+
+  Returns:
+    env: An `AsyncHanabiVecEnv` object.
+
+  Raises:
+    ValueError: Unknown environment name or encoder type.
+  """
+  _load_pyhanabi(pyhanabi_path)
+  return AsyncHanabiVecEnv(
+      config=game_config(environment_name, num_players, seed),
+      num_envs=num_envs, num_workers=num_workers, pyhanabi_path=pyhanabi_path,
+      encoder_type=_encoder_type(encoder_type))
+
+
+def make_vec(environment_name="Hanabi-Full", num_envs=1, num_players=2,
+             seed=12345, pyhanabi_path=None, encoder_type="canonical"):
+  """Make a batched environment running num_envs games.
+
+  Args:
+    environment_name: str, Name of the environment to instantiate.
+    num_envs: int, Number of games stepped together.
+    num_players: int, Number of players in each game.
+    seed: int, Random seed.
+    pyhanabi_path: str, absolute path to header files for c code linkage.
+    encoder_type: str, Name of the observation encoder type (see make).
+
+  Returns:
+    env: A `HanabiVecEnv` object.
+
+  Raises:
+    ValueError: Unknown environment name or encoder type.
+  """
+  _load_pyhanabi(pyhanabi_path)
+  return HanabiVecEnv(config=game_config(environment_name, num_players, seed),
+                      num_envs=num_envs,
+                      encoder_type=_encoder_type(encoder_type))
+
+
+def play_rollouts(environment_name="Hanabi-Full", num_games=1, num_players=2,
+                  seed=12345, policy="simple", first_episode=0,
+                  record_traces=False, pyhanabi_path=None):
+  """Plays num_games complete games with a built-in policy, in native code.
+
+  Evaluates the baseline agents without running Python per move, see
+  `pyhanabi.play_rollouts`.
+
+  Args:
+    environment_name: str, Name of the environment to play.
+    num_games: int, Number of games.
+    num_players: int, Number of players in each game.
+    seed: int, Random seed.
+    policy: str, Name of the pyhanabi.RolloutPolicyType of all players,
+      "simple" (the rules of SimpleAgent) or "random".
+    first_episode: int, Number of the first game. The cards and policy choices
+      of each game are a function of the seed and its number only.
+    record_traces: bool, Whether to return the move uids of every game.
+    pyhanabi_path: str, absolute path to header files for c code linkage.
+
+  Returns:
+    dict, with one row per game:
+      - 'scores': int32 array [num_games], the final scores.
+      - 'lengths': int32 array [num_games], the numbers of player moves.
+      - 'traces': if record_traces, uint8 array [num_games, max game length]
+        of move uids, padded with 255 past the length of each game.
+
+  Raises:
+    ValueError: Unknown environment name or policy.
+  """
+  _load_pyhanabi(pyhanabi_path)
+  try:
+    policy_type = pyhanabi.RolloutPolicyType[policy.upper()]
+  except KeyError:
+    raise ValueError("Unknown policy {}, expected one of {}".format(
+        policy, [t.name.lower() for t in pyhanabi.RolloutPolicyType]))
+  game = pyhanabi.HanabiGame(game_config(environment_name, num_players, seed))
+  results = {"scores": np.zeros(num_games, dtype=np.int32),
+             "lengths": np.zeros(num_games, dtype=np.int32)}
+  if record_traces:
+    results["traces"] = np.full((num_games, game.max_game_length()), 255,
+                                dtype=np.uint8)
+  pyhanabi.play_rollouts(game, num_games, policy_type, first_episode,
+                         results["scores"], results["lengths"],
+                         results.get("traces"))
+  return results
+
+
 #-------------------------------------------------------------------------------
 # Hanabi Agent API
 #-------------------------------------------------------------------------------